@@ -1,4 +1,5 @@
 """Convert Ui file to PY file."""
+import hashlib
 import sys
 from pathlib import Path
 from platform import system
@@ -75,6 +76,7 @@ def ui_to_py(ui_folder: Path, venv_activate: str, cmd_sep: str):
         print(f"Converting {py_file.name} to .py")
         run_cmd(f"""{venv_activate} {cmd_sep} pyside6-uic "{ui_file}" -o "{py_file}" """)
         replace_icon_paths(py_file)
+        add_source_hash(ui_file, py_file)
 
 
 def replace_icon_paths(py_file: Path):
@@ -97,6 +99,26 @@ def replace_icon_paths(py_file: Path):
         file.write(content)
 
 
+def add_source_hash(ui_file: Path, py_file: Path):
+    """Append the hash of the .ui file to the .py file.
+
+    The GUI uses the generated class only if the hash matches the .ui file, see
+    ibridgesgui.gui_utils.setup_ui.
+
+    Args:
+    ----
+        ui_file : Path
+            .ui file the .py file was generated from
+        py_file : Path
+            .py file to update
+
+    """
+    # same hash as ibridgesgui.gui_utils.ui_source_hash
+    ui_hash = hashlib.sha256(ui_file.read_bytes().replace(b"\r\n", b"\n")).hexdigest()
+    with py_file.open('a', encoding='utf-8') as file:
+        file.write(f"\n# ui source sha256: {ui_hash}\n")
+
+
 def remove_pyui_files(ui_folder: Path):
     """Remove the locally stored .py versions of the files.
 
@@ -1,34 +1,47 @@
 #!/usr/bin/env python3
 """iBridges GUI startup script."""
+# The tabs, the login and the transfers import ibridges and irods, which takes long.
+# Their modules are imported when they are needed, so the main window shows quickly.
+# The startup profile starts before the other imports, so that they are timed.
+# ruff: noqa: E402
+# pylint: disable=import-outside-toplevel, wrong-import-position, wrong-import-order
+# pylint: disable=ungrouped-imports
 
 import logging
 import os
 import sys
+from datetime import datetime
 from functools import partial
 from pathlib import Path
 
+from ibridgesgui.startup_profile import mark, measure, start, write_report
+
+start()
+
+import PySide6.QtCore
 import PySide6.QtGui
-import PySide6.QtUiTools
 import PySide6.QtWidgets
 import setproctitle
 
-from ibridgesgui.browser import Browser
 from ibridgesgui.config import (
     config_add_tab,
     config_remove_tab,
     ensure_irods_location,
+    get_last_ienv_path,
     get_log_level,
     get_tabs,
     init_logger,
+    is_session_from_config,
     set_log_level,
 )
-from ibridgesgui.gui_utils import UI_FILE_DIR, find_tab_provider, get_tab_providers, load_ui
-from ibridgesgui.info import Info
-from ibridgesgui.login import Login
+from ibridgesgui.gui_utils import (
+    find_tab_provider,
+    get_tab_providers,
+    setup_ui,
+    transfer_status_text,
+)
+from ibridgesgui.lazy_tab import LazyTab
 from ibridgesgui.logviewer import LogViewer
-from ibridgesgui.popup_widgets import CheckConfig
-from ibridgesgui.search import Search
-from ibridgesgui.sync import Sync
 from ibridgesgui.ui_files.MainMenu import Ui_MainWindow
 from ibridgesgui.welcome import Welcome
 
@@ -50,10 +63,7 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
     def __init__(self, app_name):
         """Initialise the main window."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "MainMenu.ui", self)
+        setup_ui(self, "MainMenu")
 
         app.aboutToQuit.connect(self.close_event)
 
@@ -62,19 +72,10 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
         self.app_name = app_name
         self.welcome_tab()
 
-        # Plugin tabs
+        # Plugin tabs, their entry points are loaded when they are needed the first time
         self.prev_tabs = get_tabs()  # previously checked tabs
-        self.third_party_tabs = get_tab_providers()
-        self.logger.info("Third party tabs: %s", self.third_party_tabs)
-        self.logger.info("Tab names: %s", [tab.name for tab in self.third_party_tabs])
-        # populate Plugin/Tabs drop down
-        for tab in self.third_party_tabs:
-            # obj_str = str(tab).split("'")[1]
-            action = PySide6.QtGui.QAction(tab.name, self.menuPlugins, checkable=True)
-            if tab.name in self.prev_tabs:
-                action.setChecked(True)
-            action.triggered.connect(partial(self.load_and_unload_tab, widget=action))
-            self.menuPlugins.addAction(action)
+        self._third_party_tabs = None
+        self.menuPlugins.aboutToShow.connect(self._add_third_party_actions)
         # Standard tabs
         self.standard_tabs = ["Browser", "Synchronise Data", "Search", "Info", "Logs"]
 
@@ -94,14 +95,48 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
 
         self.session = None
         self.irods_browser = None
+        self.browser_tab = None
         self.session_dict = {}
+        # interrupted transfers from the transfer journal
+        self.resume_queue = []
+        self.resume_thread = None
         self.action_connect.triggered.connect(self.connect)
         self.action_exit.triggered.connect(self.exit)
         self.action_close_session.triggered.connect(self.disconnect)
         self.action_add_configuration.triggered.connect(self.create_env_file)
         self.action_check_configuration.triggered.connect(self.inspect_env_file)
+        # tabs are created when they are shown for the first time
+        self.tab_widget.currentChanged.connect(self.build_tab)
         self.tab_widget.setCurrentIndex(0)
 
+    @property
+    def third_party_tabs(self) -> list:
+        """Tab providers of the installed plugins."""
+        if self._third_party_tabs is None:
+            with measure("load plugin entry points"):
+                self._third_party_tabs = get_tab_providers()
+            self.logger.info("Third party tabs: %s", self._third_party_tabs)
+            self.logger.info("Tab names: %s", [tab.name for tab in self._third_party_tabs])
+        return self._third_party_tabs
+
+    def _add_third_party_actions(self):
+        """Populate the Plugin/Tabs drop down with the plugins when it is opened first."""
+        self.menuPlugins.aboutToShow.disconnect(self._add_third_party_actions)
+        # the plugins are listed before the standard tabs
+        first_standard = self.menuPlugins.actions()[0]
+        for tab in self.third_party_tabs:
+            action = PySide6.QtGui.QAction(tab.name, self.menuPlugins, checkable=True)
+            if tab.name in self.prev_tabs:
+                action.setChecked(True)
+            action.triggered.connect(partial(self.load_and_unload_tab, widget=action))
+            self.menuPlugins.insertAction(first_standard, action)
+
+    def build_tab(self, tab_idx: int):
+        """Create the content of a tab that is shown for the first time."""
+        tab = self.tab_widget.widget(tab_idx)
+        if isinstance(tab, LazyTab):
+            tab.build()
+
     def checked_tabs(self):
         """Retrieve names of checked third party tabs."""
         selected_tabs = []
@@ -148,12 +183,19 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
 
     def disconnect(self):
         """Close iRODS session."""
+        from ibridgesgui.catalog import LISTING_CACHE
+        from ibridgesgui.session_pool import close_session_pools
+
         if "session" in self.session_dict:
             self.logger.info("Disconnecting %s from %s", self.session.username, self.session.host)
             self.session.close()
             self.session = None
             self.session_dict.clear()
+        close_session_pools()
+        LISTING_CACHE.clear()
         self.tab_widget.clear()
+        self.irods_browser = None
+        self.browser_tab = None
         self.menuPlugins.setEnabled(False)
         self.welcome_tab()
 
@@ -163,6 +205,8 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
             PySide6.QtWidgets.QMessageBox.about(self, "Information", "Please close session first.")
             return
 
+        from ibridgesgui.login import Login
+
         login_window = Login(self.session_dict, self.app_name)
         login_window.exec()
         # Trick to get the session object from the QDialog
@@ -170,11 +214,13 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
         if "session" in self.session_dict:
             self.session = self.session_dict["session"]
             try:
-                self.setup_tabs()
+                with measure("tabs after login"):
+                    self.setup_tabs()
                 self.menuPlugins.setEnabled(True)
             except:
                 self.session = None
                 raise
+            self.offer_resume_transfers()
         else:
             self.logger.exception("No session created. %s", self.session_dict)
 
@@ -223,6 +269,89 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
 
         self.tab_widget.setCurrentIndex(1)
 
+    def offer_resume_transfers(self):
+        """Offer to resume the transfers that were interrupted in an earlier session."""
+        from ibridgesgui.transfer_journal import TransferJournal
+
+        if not is_session_from_config(self.session):
+            return
+        try:
+            journal = TransferJournal()
+            transfers = journal.unfinished(Path(get_last_ienv_path()))
+        except Exception:
+            self.logger.exception("Cannot read the transfer journal.")
+            return
+        if len(transfers) == 0:
+            journal.close()
+            return
+        details = "\n".join(
+            f"{datetime.fromtimestamp(transfer['started']).strftime('%d-%m-%Y %H:%M')}: "
+            f"{transfer['remaining']} of {transfer['uploads'] + transfer['downloads']} "
+            "files remaining"
+            for transfer in transfers
+        )
+        reply = PySide6.QtWidgets.QMessageBox.question(
+            self,
+            "Unfinished transfers",
+            f"Some transfers did not complete:\n{details}\n\nResume them now?\n"
+            "'No' keeps them for the next session, 'Discard' removes them.",
+            PySide6.QtWidgets.QMessageBox.StandardButton.Yes
+            | PySide6.QtWidgets.QMessageBox.StandardButton.No
+            | PySide6.QtWidgets.QMessageBox.StandardButton.Discard,
+        )
+        if reply == PySide6.QtWidgets.QMessageBox.StandardButton.Discard:
+            for transfer in transfers:
+                journal.finish(transfer["id"])
+                self.logger.info("Discarded unfinished transfer %d", transfer["id"])
+        elif reply == PySide6.QtWidgets.QMessageBox.StandardButton.Yes:
+            self.resume_queue = [
+                (transfer["id"], *journal.load(transfer["id"], self.session))
+                for transfer in transfers
+            ]
+            self._resume_next_transfer()
+        journal.close()
+
+    def _resume_next_transfer(self):
+        """Run the queued transfers from the journal one after the other."""
+        if len(self.resume_queue) == 0:
+            return
+        from ibridgesgui.threads import TransferDataThread
+
+        transfer_id, ops, overwrite = self.resume_queue.pop(0)
+        try:
+            # large objects with a recorded offset are continued also without overwrite
+            self.resume_thread = TransferDataThread(
+                Path(get_last_ienv_path()), self.logger, ops, overwrite, transfer_id=transfer_id
+            )
+        except Exception as err:
+            self.logger.error("Cannot resume transfer %d: %s", transfer_id, repr(err))
+            self.statusBar().showMessage(f"Cannot resume transfer: {repr(err)}")
+            self._resume_next_transfer()
+            return
+        self.logger.info("Resume transfer %d", transfer_id)
+        self.resume_thread.current_progress.connect(self._resume_status)
+        self.resume_thread.result.connect(self._resume_result)
+        self.resume_thread.finished.connect(self._finish_resume)
+        self.resume_thread.start()
+
+    def _resume_status(self, state):
+        # the status bar shows a single line
+        status = transfer_status_text(state).split("\n", maxsplit=1)[0]
+        self.statusBar().showMessage(f"Resuming transfer: {status}")
+
+    def _resume_result(self, thread_output: dict):
+        if thread_output["error"] == "":
+            self.statusBar().showMessage("Resumed transfer finished.")
+        else:
+            self.statusBar().showMessage(
+                "Errors occurred during the resumed transfer. Consult the logs."
+            )
+
+    def _finish_resume(self):
+        self.resume_thread.wait()
+        self.resume_thread = None
+        self._resume_next_transfer()
+
     def welcome_tab(self):
         """Create first tab."""
         try:
@@ -234,33 +363,62 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
 
     def init_info_tab(self):
         """Create info."""
-        irods_info = Info(self.session)
+        irods_info = LazyTab("Info", self._create_info, self.logger)
         self.tab_widget.addTab(irods_info, "Info")
 
+    def _create_info(self):
+        from ibridgesgui.info import Info
+
+        return Info(self.session, self.app_name)
+
     def init_log_tab(self):
         """Create log tab."""
+        # created right away, it shows the records logged from now on
         ibridges_log = LogViewer(self.logger)
         self.tab_widget.addTab(ibridges_log, "Logs")
 
     def init_browser_tab(self):
         """Create browser."""
+        self.browser_tab = LazyTab("Browser", self._create_browser, self.logger)
+        self.tab_widget.addTab(self.browser_tab, "Browser")
+
+    def _create_browser(self):
+        from ibridgesgui.browser import Browser
+
         self.irods_browser = Browser(self.session, self.app_name)
-        self.tab_widget.addTab(self.irods_browser, "Browser")
+        return self.irods_browser
 
     def init_search_tab(self):
         """Create search. Depends on Browser."""
-        irods_search = Search(self.session, self.app_name, self.irods_browser)
+        irods_search = LazyTab("Search", self._create_search, self.logger)
         self.tab_widget.addTab(irods_search, "Search")
 
+    def _create_search(self):
+        from ibridgesgui.search import Search
+
+        # search results are opened in the browser, which is created if necessary
+        if self.irods_browser is None and self.browser_tab is not None:
+            self.browser_tab.build()
+        return Search(self.session, self.app_name, self.irods_browser)
+
     def init_sync_tab(self):
         """Create sync."""
-        irods_sync = Sync(self.session, self.app_name)
+        irods_sync = LazyTab("Synchronise Data", self._create_sync, self.logger)
         self.tab_widget.addTab(irods_sync, "Synchronise Data")
 
+    def _create_sync(self):
+        from ibridgesgui.sync import Sync
+
+        return Sync(self.session, self.app_name)
+
     def init_third_party_tab(self, tab_class: object):
         """Create third-party tabs."""
-        third_party_tab = tab_class(self.session, self.app_name, self.logger)
-        self.tab_widget.addTab(third_party_tab, third_party_tab.name)
+        third_party_tab = LazyTab(
+            tab_class.name,
+            partial(tab_class, self.session, self.app_name, self.logger),
+            self.logger,
+        )
+        self.tab_widget.addTab(third_party_tab, tab_class.name)
 
     def remove_tab(self, tab_idx: int):
         """Remove a third party tab from tab widget."""
@@ -268,38 +426,52 @@ class MainMenu(PySide6.QtWidgets.QMainWindow, Ui_MainWindow):
 
     def create_env_file(self):
         """Populate drop down menu to create a new environment.json."""
+        from ibridgesgui.popup_widgets import CheckConfig
+
         create_widget = CheckConfig(self.logger, self.irods_path)
         create_widget.exec()
 
     def inspect_env_file(self):
         """Init drop down menu to inspect an environment.json."""
+        from ibridgesgui.popup_widgets import CheckConfig
+
         create_widget = CheckConfig(self.logger, self.irods_path)
         create_widget.exec()
 
 
 def main():
     """Call main function."""
+    mark("modules imported")
     setproctitle.setproctitle(THIS_APPLICATION)
 
-    log_level = get_log_level()
-    if log_level is not None:
-        init_logger(THIS_APPLICATION, log_level)
-    else:
-        set_log_level("debug")
-        init_logger(THIS_APPLICATION, "debug")
+    with measure("logger"):
+        log_level = get_log_level()
+        if log_level is not None:
+            init_logger(THIS_APPLICATION, log_level)
+        else:
+            set_log_level("debug")
+            init_logger(THIS_APPLICATION, "debug")
 
     main_deprecated()
 
     # Set the working directory to the directory of the current file
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     ensure_irods_location()
-    main_widget = PySide6.QtWidgets.QStackedWidget()
-    main_app = MainMenu(THIS_APPLICATION)
-    main_widget.addWidget(main_app)
-    main_widget.show()
+    with measure("main window"):
+        main_widget = PySide6.QtWidgets.QStackedWidget()
+        main_app = MainMenu(THIS_APPLICATION)
+        main_widget.addWidget(main_app)
+        main_widget.show()
+    # runs as soon as the event loop shows the window
+    PySide6.QtCore.QTimer.singleShot(0, _startup_done)
     app.exec()
 
 
+def _startup_done():
+    mark("main window shown")
+    write_report()
+
+
 def main_deprecated():
     """Deprecate the ibridges-gui call."""
     logger = logging.getLogger(THIS_APPLICATION)
@@ -1,7 +1,7 @@
 """Browser tab."""
 
 import logging
-import sys
+from pathlib import Path
 from typing import Union
 
 import irods.exception
@@ -12,14 +12,12 @@ from ibridges import IrodsPath
 from ibridges.permissions import Permissions
 from ibridges.util import obj_replicas
 
-from ibridgesgui.gui_utils import (
-    UI_FILE_DIR,
-    get_irods_item,
-    load_ui,
-    populate_table,
-    populate_textfield,
-)
+from ibridgesgui.catalog import LISTING_CACHE, cached_listing
+from ibridgesgui.config import get_last_ienv_path, is_session_from_config
+from ibridgesgui.gui_utils import get_irods_item, populate_table, populate_textfield, setup_ui
 from ibridgesgui.popup_widgets import CreateCollection, DownloadData, Rename, UploadData
+from ibridgesgui.table_models import BrowserTableModel
+from ibridgesgui.threads import CatalogTaskThread, ListingThread
 from ibridgesgui.ui_files.tabBrowser import Ui_tabBrowser
 
 
@@ -29,10 +27,7 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
     def __init__(self, session, app_name: str):
         """Initialize an iRODS browser view."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "tabBrowser.ui", self)
+        setup_ui(self, "tabBrowser")
 
         self.logger = logging.getLogger(app_name)
         self.session = session
@@ -40,6 +35,13 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         self.last_selected_row = -1
         self.current_selected_row = -1
         self.updated_info_tabs = []
+        self.browser_model = BrowserTableModel(self.browser_table)
+        self.browser_table.setModel(self.browser_model)
+        # catalog queries run in background threads with sessions from the session pool,
+        # if the session was not created from the ibridges config they run in the GUI thread
+        self.ienv_path = Path(get_last_ienv_path()) if is_session_from_config(session) else None
+        self.listing_thread = None
+        self.threads = set()
         self.init_browser()
 
     def init_browser(self):
@@ -108,15 +110,16 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         self.update_input_path(parent_path)
 
     def refresh_browser(self):
-        """Reload table and reset the caching for the info tabs."""
+        """Reload table from the catalog and reset the caching for the info tabs."""
         irods_path = IrodsPath(self.session, self.input_path.text())
+        LISTING_CACHE.discard(irods_path)
         self.update_input_path(irods_path)
 
     def load_path(self):
         """Take path from input_path and loads browser table."""
-        irods_path = self._get_item_path(self.browser_table.currentRow())
-        if irods_path.collection_exists():
-            self.update_input_path(irods_path)
+        row = self._current_row()
+        if self.browser_model.listing.is_collection(row):
+            self.update_input_path(self._get_item_path(row))
 
     def create_collection(self):
         """Create a new collection in current collection."""
@@ -130,7 +133,7 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         """Rename/move a collection or data object."""
         if self._nothing_selected_error():
             return
-        item_name = self.browser_table.item(self.browser_table.currentRow(), 1).text()
+        item_name = self.browser_model.item_name(self._current_row())
         current_collection = IrodsPath(self.session, "/" + self.input_path.text().strip("/"))
         irods_path = current_collection.joinpath(item_name)
         rename_widget = Rename(irods_path, self.logger)
@@ -141,8 +144,8 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         """Download collection or data object."""
         if self._nothing_selected_error():
             return
-        if self.browser_table.item(self.browser_table.currentRow(), 1) is not None:
-            item_name = self.browser_table.item(self.browser_table.currentRow(), 1).text()
+        if 0 <= self._current_row() < self.browser_model.rowCount():
+            item_name = self.browser_model.item_name(self._current_row())
             path = IrodsPath(self.session, "/", *self.input_path.text().split("/"), item_name)
             download_dialog = DownloadData(self.logger, self.session, path)
             download_dialog.exec()
@@ -162,8 +165,8 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         if self._nothing_selected_error():
             return
 
-        if self.browser_table.item(self.browser_table.currentRow(), 1) is not None:
-            item_name = self.browser_table.item(self.browser_table.currentRow(), 1).text()
+        if 0 <= self._current_row() < self.browser_model.rowCount():
+            item_name = self.browser_model.item_name(self._current_row())
             irods_path = IrodsPath(self.session, "/", *self.input_path.text().split("/"), item_name)
             quit_msg = f"Are you sure you want to delete {str(irods_path)}?"
             reply = PySide6.QtWidgets.QMessageBox.critical(
@@ -176,6 +179,7 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
             if reply == PySide6.QtWidgets.QMessageBox.StandardButton.Yes:
                 try:
                     irods_path.remove()
+                    LISTING_CACHE.invalidate(irods_path)
                     self.logger.info("Delete data %s", str(irods_path))
                     self.refresh_browser()
                 except (irods.exception.CAT_NO_ACCESS_PERMISSION, PermissionError):
@@ -185,73 +189,44 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
                     self.error_label.setText(f"FAILED: Delete data {irods_path}. Consult the logs.")
 
     def load_browser_table(self):
-        """Load main browser table."""
+        """Load main browser table, the rows are streamed in by a background thread."""
         self.error_label.clear()
         self._clear_info_tabs()
+        self._cancel_listing()
         irods_path = IrodsPath(self.session, self.input_path.text())
-        if irods_path.collection_exists():
-            try:
-                coll_data = [
-                    (
-                        "C-",
-                        subcoll.name,
-                        "",
-                        "",
-                        subcoll.create_time.strftime("%d-%m-%Y"),
-                        subcoll.modify_time.strftime("%d-%m-%Y %H:%m"),
-                    )
-                    for subcoll in irods_path.collection.subcollections
-                ]
-                obj_data = [
-                    (
-                        max(repl[4] for repl in obj_replicas(obj)),
-                        obj.name,
-                        str(obj.size),
-                        obj.checksum,
-                        obj.create_time.strftime("%d-%m-%Y"),
-                        obj.modify_time.strftime("%d-%m-%Y %H:%m"),
-                    )
-                    for obj in irods_path.collection.data_objects
-                ]
-
-                populate_table(
-                    self.browser_table,
-                    len(irods_path.collection.data_objects)
-                    + len(irods_path.collection.subcollections),
-                    coll_data + obj_data,
-                )
-            except Exception as err:
-                self.browser_table.setRowCount(0)
-                self.logger.exception("Cannot load browser.")
-                self.error_label.setText(f"Cannot load browser table for {str(irods_path)}: {err}")
-        else:
-            self.browser_table.setRowCount(0)
-            self.error_label.setText(f"Collection does not exist: {str(irods_path)}.")
+        listing = LISTING_CACHE.get(irods_path)
+        if listing is not None:
+            self.browser_model.set_listing(listing)
+            self.browser_table.resizeColumnsToContents()
+            return
+        if self.ienv_path is None:
+            self._load_browser_table_blocking(irods_path)
+            return
+        self.browser_model.begin_listing(str(irods_path))
+        try:
+            self.listing_thread = ListingThread(self.ienv_path, self.logger, str(irods_path))
+        except Exception as err:
+            self.browser_model.end_listing()
+            self.logger.exception("Cannot load browser.")
+            self.error_label.setText(f"Cannot load browser table for {str(irods_path)}: {err}")
+            return
+        self.listing_thread.page.connect(self._listing_page)
+        self.listing_thread.result.connect(self._listing_end)
+        self.error_label.setText(f"Loading {str(irods_path)} ...")
+        self._start_thread(self.listing_thread)
 
     def fill_info_tab_content(self):
         """Fill lower tabs with info."""
         if self._nothing_selected_error():
             return
         tab_name = self.info_tabs.currentWidget().objectName()
-        irods_path = self._get_item_path(self.browser_table.currentRow())
+        irods_path = self._get_item_path(self._current_row())
         if (
-            self.last_selected_row != self.browser_table.currentRow()
+            self.last_selected_row != self._current_row()
             or tab_name not in self.updated_info_tabs
         ):
             self.last_selected_row = self.current_selected_row
-            try:
-                if tab_name == "metadata":
-                    self._fill_metadata_tab(irods_path)
-                elif tab_name == "permissions":
-                    self._fill_acls_tab(irods_path)
-                elif tab_name == "replicas":
-                    self._fill_replicas_tab(irods_path)
-                elif tab_name == "preview":
-                    self._fill_preview_tab(irods_path)
-                self.updated_info_tabs.append(tab_name)
-            except Exception as err:
-                self.logger.exception("Error loading %s of %s .", tab_name, irods_path)
-                self.error_label.setText(f"Error loading {tab_name} of {irods_path}: {repr(err)}")
+            self._load_info_tab(tab_name, irods_path)
 
     def update_icat_meta(self):
         """Button metadata set."""
@@ -311,7 +286,7 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         """Send acls to iRODS server."""
         if self._nothing_selected_error():
             return
-        irods_path = self._get_item_path(self.browser_table.currentRow())
+        irods_path = self._get_item_path(self._current_row())
         user_name = self.acl_user_field.text()
         user_zone = self.acl_zone_field.text()
         acc_name = self.acl_box.currentText()
@@ -359,7 +334,7 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
                     user_zone,
                     str(recursive),
                 )
-            self._fill_acls_tab(irods_path)
+            self._load_info_tab("permissions", irods_path)
         except (irods.exception.CAT_INVALID_USER, irods.exception.SYS_NOT_ALLOWED):
             self.error_label.setText(f"Cannot update ACLs. {user_name}#{user_zone} not known.")
         except irods.exception.MSI_OPERATION_NOT_ALLOWED:
@@ -377,13 +352,17 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         self.preview_browser.clear()
         self.no_meta_label.clear()
 
+    def _current_row(self) -> int:
+        """Return the row of the selected table item, -1 if nothing is selected."""
+        return self.browser_table.currentIndex().row()
+
     def _get_item_path(self, row: int):
-        item_name = self.browser_table.item(row, 1).text()
+        item_name = self.browser_model.item_name(row)
         return IrodsPath(self.session, "/", *self.input_path.text().split("/"), item_name)
 
     def _nothing_selected_error(self):
         self.error_label.clear()
-        if self.browser_table.currentRow() == -1:
+        if self._current_row() == -1:
             self.error_label.setText("Please select an item from the table.")
             return True
         return False
@@ -392,33 +371,133 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         """On click on a row in the browser table, empty cached information and store indices."""
         self.updated_info_tabs = []
         self.last_selected_row = self.current_selected_row
-        self.current_selected_row = self.browser_table.currentRow()
+        self.current_selected_row = self._current_row()
         # fill currently selected tab with info
         self.fill_info_tab_content()
 
-    def _fill_replicas_tab(self, irods_path: Union[IrodsPath, str]):
+    def _load_browser_table_blocking(self, irods_path: IrodsPath):
+        """Load the browser table in the GUI thread with the GUI session."""
+        if irods_path.collection_exists():
+            try:
+                self.browser_model.set_listing(cached_listing(self.session, irods_path))
+                self.browser_table.resizeColumnsToContents()
+            except Exception as err:
+                self.browser_model.clear()
+                self.logger.exception("Cannot load browser.")
+                self.error_label.setText(f"Cannot load browser table for {str(irods_path)}: {err}")
+        else:
+            self.browser_model.clear()
+            self.error_label.setText(f"Collection does not exist: {str(irods_path)}.")
+
+    def _start_thread(self, thread: PySide6.QtCore.QThread):
+        """Keep a reference to a running thread until it finished."""
+        self.threads.add(thread)
+        thread.finished.connect(self._thread_finished)
+        thread.start()
+
+    def _thread_finished(self):
+        thread = self.sender()
+        thread.wait()
+        self.threads.discard(thread)
+
+    def _cancel_listing(self):
+        """Stop the running listing, pages it still sends are dropped."""
+        if self.listing_thread is not None:
+            self.listing_thread.requestInterruption()
+            self.listing_thread = None
+
+    def _listing_page(self, page):
+        if self.sender() is not self.listing_thread:
+            return
+        first_page = self.browser_model.rowCount() == 0
+        self.browser_model.append_listing(page)
+        if first_page and self.browser_model.rowCount() > 0:
+            self.browser_table.resizeColumnsToContents()
+
+    def _listing_end(self, listing_out: dict):
+        if self.sender() is not self.listing_thread:
+            return
+        self.listing_thread = None
+        self.browser_model.end_listing()
+        irods_path = self.browser_model.listing.path
+        self.error_label.clear()
+        if listing_out["error"] != "":
+            self.browser_model.clear()
+            self.error_label.setText(
+                f"Cannot load browser table for {irods_path}: {listing_out['error']}"
+            )
+        elif not listing_out["exists"]:
+            self.error_label.setText(f"Collection does not exist: {irods_path}.")
+        else:
+            self.browser_table.resizeColumnsToContents()
+
+    def _run_catalog_task(self, task, callback, *args):
+        """Run task(session, *args) in a background thread and pass its output to callback."""
+        if self.ienv_path is None:
+            task_out = {"error": "", "args": args}
+            try:
+                task_out["result"] = task(self.session, *args)
+            except Exception as err:
+                self.logger.exception("Catalog task %s failed", task.__name__)
+                task_out["error"] = repr(err)
+            callback(task_out)
+            return
+        try:
+            thread = CatalogTaskThread(self.ienv_path, self.logger, task, *args)
+        except Exception as err:
+            callback({"error": repr(err), "args": args})
+            return
+        thread.result.connect(callback)
+        self._start_thread(thread)
+
+    def _load_info_tab(self, tab_name: str, irods_path: IrodsPath):
+        """Retrieve the information for an info tab in the background."""
+        self._run_catalog_task(_fetch_info_tab, self._info_tab_loaded, tab_name, str(irods_path))
+
+    def _info_tab_loaded(self, task_out: dict):
+        tab_name, irods_path = task_out["args"]
+        # drop information of items that are not selected anymore
+        row = self._current_row()
+        if row == -1 or str(self._get_item_path(row)) != irods_path:
+            return
+        if task_out["error"] != "":
+            self.logger.error("Error loading %s of %s: %s", tab_name, irods_path, task_out["error"])
+            self.error_label.setText(
+                f"Error loading {tab_name} of {irods_path}: {task_out['error']}"
+            )
+            return
+        if tab_name == "metadata":
+            self._fill_metadata_tab(irods_path, task_out["result"])
+        elif tab_name == "permissions":
+            self._fill_acls_tab(irods_path, task_out["result"])
+        elif tab_name == "replicas":
+            self._fill_replicas_tab(task_out["result"])
+        elif tab_name == "preview":
+            self._fill_preview_tab(task_out["result"])
+        self.updated_info_tabs.append(tab_name)
+
+    def _fill_replicas_tab(self, replicas: list):
         """Populate the table in the Replicas tab.
 
         Parameters
         ----------
-        irods_path : str
-            Path of iRODS collection or data object selected.
+        replicas : list
+            Replica information of the selected data object, empty for collections.
 
         """
         self.replica_table.setRowCount(0)
-        if irods_path.dataobject_exists():
-            obj = irods_path.dataobject
-            populate_table(self.replica_table, len(obj_replicas(obj)), obj_replicas(obj))
-            self.replica_table.setRowCount(len(obj.replicas))
+        populate_table(self.replica_table, len(replicas), replicas)
         self.replica_table.resizeColumnsToContents()
 
-    def _fill_acls_tab(self, irods_path: Union[IrodsPath, str]):
+    def _fill_acls_tab(self, irods_path: str, acl_info: Union[None, dict]):
         """Populate the table in the ACLs tab.
 
         Parameters
         ----------
         irods_path : str
             Path of iRODS collection or data object selected.
+        acl_info : dict or None
+            Output of _fetch_acls, None if the item does not exist.
 
         """
         self.acl_table.setRowCount(0)
@@ -427,83 +506,53 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         self.acl_box.setEnabled(True)
         self.recursive_box.setEnabled(False)
         self.acl_box.clear()
-        obj = None
         obj_acl_box_items = ["read", "write", "own", "delete"]
         coll_acl_box_items = obj_acl_box_items + [
             "Newly added items to collection will inherit permissions",
             "Remove inheritance.",
         ]
+        if acl_info is None:
+            self.error_label.setText(f"{irods_path} does not exist.")
+            return
 
-        if irods_path.collection_exists():
-            obj = irods_path.collection
-            inheritance = f"{obj.inheritance}"
+        if acl_info["collection"]:
             self.recursive_box.setEnabled(True)
             _ = [self.acl_box.addItem(item) for item in coll_acl_box_items]
-        elif irods_path.dataobject_exists():
+        else:
             _ = [self.acl_box.addItem(item) for item in obj_acl_box_items]
-            obj = irods_path.dataobject
-            self.recursive_box.setEnabled(False)
-            inheritance = ""
-        if obj is not None:
-            acls = Permissions(self.session, obj)
-            acl_data = [(p.user_name, p.user_zone, p.access_name, inheritance) for p in acls]
-            populate_table(self.acl_table, len(list(acls)), acl_data)
+        populate_table(self.acl_table, len(acl_info["acls"]), acl_info["acls"])
         self.acl_table.resizeColumnsToContents()
-        self.owner_label.setText(f"{obj.owner_name}")
+        self.owner_label.setText(f"{acl_info['owner']}")
 
-    def _fill_metadata_tab(self, irods_path: Union[IrodsPath, str]):
+    def _fill_metadata_tab(self, irods_path: str, metadata: list):
         """Populate the table in the metadata tab.
 
         Parameters
         ----------
         irods_path : str
             Full name of iRODS collection or data object selected.
+        metadata : list
+            (key, value[, units]) tuples of the item.
 
         """
         self.meta_key_field.clear()
         self.meta_value_field.clear()
         self.meta_units_field.clear()
         self.no_meta_label.clear()
-        if irods_path.exists():
-            populate_table(self.meta_table, len(list(irods_path.meta)), irods_path.meta)
-        if len(irods_path.meta) == 0:
-            self.no_meta_label.setText(f"Metadata for {str(irods_path)} is empty.")
+        populate_table(self.meta_table, len(metadata), metadata)
+        if len(metadata) == 0:
+            self.no_meta_label.setText(f"Metadata for {irods_path} is empty.")
         self.meta_table.resizeColumnsToContents()
 
-    def _fill_preview_tab(self, irods_path: Union[IrodsPath, str]):
-        """Populate the table in the metadata tab.
+    def _fill_preview_tab(self, content: list):
+        """Populate the text field in the preview tab.
 
         Parameters
         ----------
-        irods_path : str
-            Full name of iRODS collection or data object selected.
+        content : list
+            Lines to show.
 
         """
-        if irods_path.collection_exists():
-            obj = irods_path.collection
-            content = ["Collections:", "-----------------"]
-            content.extend([sc.name for sc in obj.subcollections])
-            content.extend(["\n", "DataObjects:", "-----------------"])
-            content.extend([do.name for do in obj.data_objects])
-        elif irods_path.dataobject_exists():
-            file_type = ""
-            obj = irods_path.dataobject
-            if "." in irods_path.parts[-1]:
-                file_type = irods_path.parts[-1].split(".")[1]
-            if file_type in ["txt", "json", "csv"]:
-                try:
-                    with obj.open("r") as objfd:
-                        content = [objfd.read(1024).decode("utf-8")]
-                except Exception as error:
-                    content = [
-                        f"No Preview for: {irods_path}",
-                        repr(error),
-                        "Storage resource might be down.",
-                    ]
-            else:
-                content = [f"No Preview for: {irods_path}"]
-        else:
-            content = [f"No Preview for: {irods_path}"]
         populate_textfield(self.preview_browser, content)
         self.preview_browser.verticalScrollBar().setValue(0)
 
@@ -512,11 +561,11 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
         if self._nothing_selected_error():
             return
 
-        irods_path = self._get_item_path(self.browser_table.currentRow())
+        irods_path = self._get_item_path(self._current_row())
         new_key = self.meta_key_field.text()
         new_val = self.meta_value_field.text()
         new_units = self.meta_units_field.text()
-        irods_path = self._get_item_path(self.browser_table.currentRow())
+        irods_path = self._get_item_path(self._current_row())
         if operation == "add":
             irods_path.meta.add(new_key, new_val, new_units)
             self.logger.info(
@@ -544,4 +593,75 @@ class Browser(PySide6.QtWidgets.QWidget, Ui_tabBrowser):
             self.logger.info(
                 "Delete metadata (%s, %s, %s) from %s", new_key, new_val, new_units, irods_path
             )
-        self._fill_metadata_tab(irods_path)
+        self._load_info_tab("metadata", irods_path)
+
+
+# Information for the info tabs, retrieved in background threads.
+# The functions only return plain python data, no objects bound to the thread's session.
+def _fetch_info_tab(session, tab_name: str, irods_path: str):
+    fetch = {
+        "metadata": _fetch_metadata,
+        "permissions": _fetch_acls,
+        "replicas": _fetch_replicas,
+        "preview": _fetch_preview,
+    }[tab_name]
+    return fetch(IrodsPath(session, irods_path))
+
+
+def _fetch_metadata(irods_path: IrodsPath) -> list:
+    if irods_path.exists():
+        return [tuple(meta) for meta in irods_path.meta]
+    return []
+
+
+def _fetch_acls(irods_path: IrodsPath) -> Union[None, dict]:
+    if irods_path.collection_exists():
+        obj = irods_path.collection
+        inheritance = f"{obj.inheritance}"
+    elif irods_path.dataobject_exists():
+        obj = irods_path.dataobject
+        inheritance = ""
+    else:
+        return None
+    acls = Permissions(irods_path.session, obj)
+    return {
+        "collection": inheritance != "",
+        "acls": [(p.user_name, p.user_zone, p.access_name, inheritance) for p in acls],
+        "owner": obj.owner_name,
+    }
+
+
+def _fetch_replicas(irods_path: IrodsPath) -> list:
+    if irods_path.dataobject_exists():
+        return obj_replicas(irods_path.dataobject)
+    return []
+
+
+def _fetch_preview(irods_path: IrodsPath) -> list:
+    if irods_path.collection_exists():
+        listing = cached_listing(irods_path.session, irods_path)
+        names = range(len(listing))
+        content = ["Collections:", "-----------------"]
+        content.extend([listing.names[i] for i in names if listing.is_collection(i)])
+        content.extend(["\n", "DataObjects:", "-----------------"])
+        content.extend([listing.names[i] for i in names if not listing.is_collection(i)])
+    elif irods_path.dataobject_exists():
+        file_type = ""
+        obj = irods_path.dataobject
+        if "." in irods_path.parts[-1]:
+            file_type = irods_path.parts[-1].split(".")[1]
+        if file_type in ["txt", "json", "csv"]:
+            try:
+                with obj.open("r") as objfd:
+                    content = [objfd.read(1024).decode("utf-8")]
+            except Exception as error:
+                content = [
+                    f"No Preview for: {irods_path}",
+                    repr(error),
+                    "Storage resource might be down.",
+                ]
+        else:
+            content = [f"No Preview for: {irods_path}"]
+    else:
+        content = [f"No Preview for: {irods_path}"]
+    return content
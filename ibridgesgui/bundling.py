@@ -0,0 +1,170 @@
+"""Bundling of small files for uploads.
+
+Each uploaded object costs several round trips to the iRODS server: create,
+open, write, close and the registration in the catalog. For many tiny files this
+overhead dominates the transfer. Small files that go to the same collection are
+therefore streamed into a tar archive that is written directly into a data
+object. The server extracts the archive into the collection, or the archive is
+kept together with a manifest of its members.
+"""
+
+import json
+import tarfile
+import uuid
+from pathlib import Path
+
+from ibridges import IrodsPath, Session
+from ibridges.rules import execute_rule
+from irods import keywords as kw
+
+BUNDLE_PREFIX = "ibridges_bundle_"
+# limits of a single bundle
+BUNDLE_MAX_SIZE = 256 << 20
+BUNDLE_MAX_FILES = 10000
+# directories with fewer small files are uploaded file by file
+BUNDLE_MIN_FILES = 10
+TAR_BUFFER_SIZE = 8 << 20
+
+
+class Bundle:
+    """Small files that are uploaded to one collection as one tar archive."""
+
+    def __init__(self, collection: IrodsPath):
+        """Create an empty bundle for the collection."""
+        self.collection = collection
+        self.name = f"{BUNDLE_PREFIX}{uuid.uuid4().hex[:12]}.tar"
+        # (local path, irods path, size) of the members
+        self.members = []
+        self.size = 0
+        # whether the server extracted the archive, otherwise it is kept with a manifest
+        self.extracted = False
+
+    def __len__(self) -> int:
+        """Return the number of members."""
+        return len(self.members)
+
+    @property
+    def path(self) -> str:
+        """Path of the archive in iRODS."""
+        return f"{self.collection}/{self.name}"
+
+    def add(self, local_path: Path, irods_path: IrodsPath, size: int):
+        """Add a file to the bundle."""
+        self.members.append((local_path, irods_path, size))
+        self.size += size
+
+    def full(self) -> bool:
+        """Whether the bundle reached its maximum size or number of files."""
+        return self.size >= BUNDLE_MAX_SIZE or len(self.members) >= BUNDLE_MAX_FILES
+
+
+def plan_bundles(uploads: list, sizes: dict, threshold: int) -> tuple[list, list[Bundle]]:
+    """Split uploads in single uploads and bundles of small files.
+
+    Parameters
+    ----------
+    uploads : list
+        (local path, irods path) pairs of Operations.upload.
+    sizes : dict
+        Size in bytes of each local path, keyed by str(local path).
+    threshold : int
+        Files smaller than threshold bytes are bundled.
+
+    Returns
+    -------
+    tuple
+        The uploads that are not bundled and the bundles.
+
+    """
+    small = {}
+    for local_path, irods_path in uploads:
+        size = sizes.get(str(local_path), 0)
+        if size < threshold:
+            small.setdefault(str(irods_path.parent), []).append((local_path, irods_path, size))
+
+    bundles = []
+    bundled = set()
+    for files in small.values():
+        if len(files) < BUNDLE_MIN_FILES:
+            continue
+        bundle = Bundle(files[0][1].parent)
+        for local_path, irods_path, size in files:
+            bundle.add(local_path, irods_path, size)
+            bundled.add(str(local_path))
+            if bundle.full():
+                bundles.append(bundle)
+                bundle = Bundle(files[0][1].parent)
+        if len(bundle) > 0:
+            bundles.append(bundle)
+    singles = [
+        (local_path, irods_path)
+        for local_path, irods_path in uploads
+        if str(local_path) not in bundled
+    ]
+    return singles, bundles
+
+
+def write_bundle(session: Session, bundle: Bundle, resc_name: str, progress=None):
+    """Stream the members of the bundle as tar archive into a new data object.
+
+    Parameters
+    ----------
+    session : Session
+        Session to write with.
+    bundle : Bundle
+        The files to archive.
+    resc_name : str
+        Resource to store the archive on, the default resource if empty.
+    progress : Callable, optional
+        Called with the number of bytes of each archived member.
+
+    """
+    options = {kw.DEST_RESC_NAME_KW: resc_name} if resc_name else {}
+    with session.irods_session.data_objects.open(bundle.path, "w", **options) as dest:
+        with tarfile.open(fileobj=dest, mode="w|", bufsize=TAR_BUFFER_SIZE) as tar:
+            for local_path, irods_path, size in bundle.members:
+                tar.add(str(local_path), arcname=irods_path.name, recursive=False)
+                if progress is not None:
+                    progress(size)
+
+
+def extract_bundle(session: Session, bundle: Bundle, resc_name: str):
+    """Extract the archive into its collection on the server and remove it.
+
+    Raises
+    ------
+    ValueError
+        If the server could not extract the archive, e.g. because a member exists.
+
+    """
+    params = {
+        "*bundle": f'"{bundle.path}"',
+        "*coll": f'"{bundle.collection}"',
+        "*resc": f'"{resc_name or "null"}"',
+    }
+    _, stderr = execute_rule(
+        session,
+        None,
+        params,
+        body="msiTarFileExtract(*bundle, *coll, *resc, *status);",
+    )
+    if stderr != "":
+        raise ValueError(f"Cannot extract {bundle.path}: {stderr}")
+    IrodsPath(session, bundle.path).remove()
+
+
+def write_manifest(session: Session, bundle: Bundle, resc_name: str):
+    """Store the members of the archive as JSON next to it."""
+    manifest = {
+        "archive": bundle.name,
+        "members": [
+            {"name": irods_path.name, "source": str(local_path), "size": size}
+            for local_path, irods_path, size in bundle.members
+        ],
+    }
+    options = {kw.DEST_RESC_NAME_KW: resc_name} if resc_name else {}
+    data = json.dumps(manifest, indent=1).encode()
+    with session.irods_session.data_objects.open(
+        f"{bundle.path}.manifest.json", "w", **options
+    ) as dest:
+        dest.write(data)
@@ -0,0 +1,446 @@
+"""Bulk catalog queries.
+
+Walking `collection.subcollections` and `collection.data_objects` creates a
+python-irodsclient object per item and needs extra catalog calls per data object,
+e.g. for the replica status. The functions here fetch everything the GUI shows for
+a whole collection with one GenQuery per item type, page by page as the server
+returns them, and keep the result in a compact columnar structure.
+
+Complete listings are kept in LISTING_CACHE for a while, so that revisiting a
+collection does not query the catalog again. Everything in the GUI that changes
+collections invalidates the affected listings.
+"""
+
+import posixpath
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterator, Optional, Union
+
+from ibridges import IrodsPath, Session
+from irods.column import Like
+from irods.models import Collection, CollectionMeta, DataObject, DataObjectMeta
+
+CREATED_FORMAT = "%d-%m-%Y"
+MODIFIED_FORMAT = "%d-%m-%Y %H:%m"
+COLLECTION_STATUS = "C-"
+# seconds a cached listing is used
+LISTING_CACHE_TTL = 120
+# maximum number of cached listings, the least recently used are dropped first
+LISTING_CACHE_SIZE = 256
+
+
+class CollectionListing:
+    """Columnar listing of the subcollections and data objects of one collection.
+
+    Each item is stored as one entry in a couple of flat columns instead of as an
+    object per item. Collections have the status "C-", a size of -1 and no checksum.
+    """
+
+    __slots__ = ("path", "status", "names", "sizes", "checksums", "created", "modified")
+
+    def __init__(self, path: str):
+        """Create an empty listing for the collection path."""
+        self.path = path
+        self.status = []
+        self.names = []
+        self.sizes = array("q")
+        self.checksums = []
+        self.created = array("d")
+        self.modified = array("d")
+
+    def __len__(self) -> int:
+        """Return the number of items."""
+        return len(self.names)
+
+    def append(
+        self,
+        status: str,
+        name: str,
+        size: int,
+        checksum: Union[None, str],
+        created: datetime,
+        modified: datetime,
+    ):
+        """Add an item to the listing."""
+        self.status.append(status)
+        self.names.append(name)
+        self.sizes.append(size)
+        self.checksums.append(checksum or "")
+        self.created.append(created.timestamp())
+        self.modified.append(modified.timestamp())
+
+    def extend(self, other: "CollectionListing"):
+        """Add all items of another listing."""
+        self.status.extend(other.status)
+        self.names.extend(other.names)
+        self.sizes.extend(other.sizes)
+        self.checksums.extend(other.checksums)
+        self.created.extend(other.created)
+        self.modified.extend(other.modified)
+
+    def is_collection(self, idx: int) -> bool:
+        """Whether the item at idx is a collection."""
+        return self.status[idx] == COLLECTION_STATUS
+
+    def cell(self, idx: int, col: int) -> str:
+        """Return one column of the item at idx as display string, see row."""
+        if col == 0:
+            return self.status[idx]
+        if col == 1:
+            return self.names[idx]
+        if col == 2:
+            return "" if self.is_collection(idx) else str(self.sizes[idx])
+        if col == 3:
+            return self.checksums[idx]
+        if col == 4:
+            return datetime.fromtimestamp(self.created[idx]).strftime(CREATED_FORMAT)
+        return datetime.fromtimestamp(self.modified[idx]).strftime(MODIFIED_FORMAT)
+
+    def row(self, idx: int) -> tuple:
+        """Return the item at idx as display strings (status, name, size, checksum, times)."""
+        return tuple(self.cell(idx, col) for col in range(6))
+
+    def rows(self) -> Iterator[tuple]:
+        """Iterate over all items as display strings."""
+        return (self.row(idx) for idx in range(len(self)))
+
+
+def iter_collection_listing(
+    session: Session, irods_path: Union[str, IrodsPath]
+) -> Iterator[CollectionListing]:
+    """Yield the content of a collection in pages as they are returned by the catalog.
+
+    Subcollections come first, then data objects. Data objects with several replicas
+    are merged into one item with the highest replica status.
+
+    Parameters
+    ----------
+    session : ibridges.Session
+        Session to query the catalog with.
+    irods_path : str or IrodsPath
+        Absolute path of the collection.
+
+    """
+    path = str(irods_path)
+    coll_query = session.irods_session.query(
+        Collection.name, Collection.create_time, Collection.modify_time
+    ).filter(Collection.parent_name == path)
+    for batch in coll_query.get_batches():
+        page = CollectionListing(path)
+        for res in batch:
+            # the root collection is its own parent
+            if res[Collection.name] == path:
+                continue
+            page.append(
+                COLLECTION_STATUS,
+                res[Collection.name].rsplit("/", 1)[-1],
+                -1,
+                None,
+                res[Collection.create_time],
+                res[Collection.modify_time],
+            )
+        yield page
+
+    obj_query = (
+        session.irods_session.query(
+            DataObject.name,
+            DataObject.size,
+            DataObject.checksum,
+            DataObject.create_time,
+            DataObject.modify_time,
+            DataObject.replica_status,
+        )
+        .filter(Collection.name == path)
+        .order_by(DataObject.name)
+    )
+    # ordered by name the replicas of an object are adjacent, but they can be split over
+    # two batches: the last object is held back until the next row shows a different name
+    pending = []
+    for batch in obj_query.get_batches():
+        page = CollectionListing(path)
+        for res in batch:
+            status = str(res[DataObject.replica_status])
+            if pending and pending[1] == res[DataObject.name]:
+                # further replica of the pending object
+                pending[0] = max(pending[0], status)
+                pending[3] = pending[3] or res[DataObject.checksum]
+                continue
+            if pending:
+                page.append(*pending)
+            pending = [
+                status,
+                res[DataObject.name],
+                res[DataObject.size],
+                res[DataObject.checksum],
+                res[DataObject.create_time],
+                res[DataObject.modify_time],
+            ]
+        yield page
+    if pending:
+        page = CollectionListing(path)
+        page.append(*pending)
+        yield page
+
+
+def list_collection(session: Session, irods_path: Union[str, IrodsPath]) -> CollectionListing:
+    """Retrieve the complete content of a collection, see iter_collection_listing."""
+    listing = CollectionListing(str(irods_path))
+    for page in iter_collection_listing(session, irods_path):
+        listing.extend(page)
+    return listing
+
+
+def iter_search(
+    session: Session,
+    search_path: Union[str, IrodsPath],
+    path_pattern: Optional[str] = None,
+    checksum: Optional[str] = None,
+    meta_searches: Optional[list] = None,
+    case_sensitive: bool = False,
+) -> Iterator[list]:
+    """Yield the matching collections and data objects in pages.
+
+    The pages are yielded as the catalog returns them, collections first. The
+    criteria follow ibridges.search_data. Each hit is a display row (type, path,
+    size, checksum, created, modified), the type is "-d" for data objects and "-C"
+    for collections.
+
+    Parameters
+    ----------
+    session : ibridges.Session
+        Session to query the catalog with.
+    search_path : str or IrodsPath
+        Collection to search in.
+    path_pattern : str, optional
+        Pattern for the end of the paths, "%" and "_" are wildcards.
+    checksum : str, optional
+        Pattern for the checksum, only data objects are searched.
+    meta_searches : list of ibridges.search.MetaSearch, optional
+        Key, value and units patterns of metadata entries.
+    case_sensitive : bool
+        Match the patterns case sensitive.
+
+    """
+    base = str(search_path).rstrip("/")
+    pattern = None
+    if path_pattern is not None:
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile(f"(?:.*/)?{_like_to_regex(path_pattern)}", flags | re.DOTALL)
+
+    def in_scope(coll_name: str, item_path: str) -> bool:
+        """Filter the catalog pre-selection on the exact search path and pattern."""
+        if not (coll_name == base or coll_name.startswith(base + "/")):
+            return False
+        return pattern is None or pattern.fullmatch(item_path[len(base) + 1 :]) is not None
+
+    if checksum is None:
+        coll_query = session.irods_session.query(
+            Collection.name,
+            Collection.create_time,
+            Collection.modify_time,
+            case_sensitive=case_sensitive,
+        ).filter(Like(Collection.name, f"{base}/%"))
+        if path_pattern is not None:
+            coll_query = coll_query.filter(Like(Collection.name, f"{base}/%{path_pattern}"))
+        for meta_search in meta_searches or []:
+            coll_query = _filter_meta(coll_query, CollectionMeta, meta_search)
+        emitted = set()
+        for batch in coll_query.get_batches():
+            page = []
+            for res in batch:
+                path = res[Collection.name]
+                if path not in emitted and in_scope(path, path):
+                    emitted.add(path)
+                    page.append(
+                        _search_row(
+                            "-C",
+                            path,
+                            "",
+                            "",
+                            res[Collection.create_time],
+                            res[Collection.modify_time],
+                        )
+                    )
+            yield page
+
+    obj_query = session.irods_session.query(
+        Collection.name,
+        DataObject.name,
+        DataObject.size,
+        DataObject.checksum,
+        DataObject.create_time,
+        DataObject.modify_time,
+        case_sensitive=case_sensitive,
+    ).filter(Like(Collection.name, f"{base}%"))
+    if path_pattern is not None:
+        obj_query = obj_query.filter(Like(DataObject.name, path_pattern.rsplit("/", 1)[-1]))
+    if checksum is not None:
+        obj_query = obj_query.filter(Like(DataObject.checksum, checksum))
+    for meta_search in meta_searches or []:
+        obj_query = _filter_meta(obj_query, DataObjectMeta, meta_search)
+    # replicas of the same object are returned as separate rows
+    emitted = set()
+    for batch in obj_query.get_batches():
+        page = []
+        for res in batch:
+            path = f"{res[Collection.name].rstrip('/')}/{res[DataObject.name]}"
+            if path not in emitted and in_scope(res[Collection.name], path):
+                emitted.add(path)
+                page.append(
+                    _search_row(
+                        "-d",
+                        path,
+                        res[DataObject.size],
+                        res[DataObject.checksum] or "",
+                        res[DataObject.create_time],
+                        res[DataObject.modify_time],
+                    )
+                )
+        yield page
+
+
+def _search_row(
+    item_type: str, path: str, size, checksum: str, created: datetime, modified: datetime
+) -> tuple:
+    return (
+        item_type,
+        path,
+        size,
+        checksum,
+        created.strftime(CREATED_FORMAT),
+        modified.strftime(CREATED_FORMAT),
+    )
+
+
+def _filter_meta(query, meta_model, meta_search):
+    return (
+        query.filter(Like(meta_model.name, meta_search.key))
+        .filter(Like(meta_model.value, meta_search.value))
+        .filter(Like(meta_model.units, meta_search.units))
+    )
+
+
+def _like_to_regex(like_pattern: str) -> str:
+    """Translate a GenQuery LIKE pattern into a regular expression."""
+    return "".join(
+        ".*" if char == "%" else "." if char == "_" else re.escape(char) for char in like_pattern
+    )
+
+
+class ListingCache:
+    """Thread-safe cache of complete collection listings with TTL and LRU eviction.
+
+    Listings are keyed by the absolute iRODS path of the collection. Every invalidation
+    increases the generation; listings that were retrieved before an invalidation are
+    not stored, so a slow listing cannot overwrite newer information.
+    """
+
+    def __init__(self, ttl: float = LISTING_CACHE_TTL, max_entries: int = LISTING_CACHE_SIZE):
+        """Initialise an empty cache.
+
+        Parameters
+        ----------
+        ttl : float
+            Seconds a listing is valid.
+        max_entries : int
+            Maximum number of listings.
+
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path: (listing, time stored)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Counter of invalidations, pass it to put when the listing was requested."""
+        with self._lock:
+            return self._generation
+
+    def get(self, irods_path: Union[str, IrodsPath]) -> Optional[CollectionListing]:
+        """Return the cached listing of a collection or None."""
+        path = str(irods_path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.ttl:
+                del self._entries[path]
+                return None
+            self._entries.move_to_end(path)
+            return entry[0]
+
+    def put(self, listing: CollectionListing, generation: Optional[int] = None):
+        """Store a complete listing.
+
+        Parameters
+        ----------
+        listing : CollectionListing
+            Complete listing of listing.path, it must not be changed afterwards.
+        generation : int, optional
+            Value of generation before the listing was retrieved. The listing is
+            dropped if the cache was invalidated in the meantime.
+
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[listing.path] = (listing, time.monotonic())
+            self._entries.move_to_end(listing.path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, irods_path: Union[str, IrodsPath]):
+        """Drop the listing of one collection, e.g. to force a refresh."""
+        with self._lock:
+            self._entries.pop(str(irods_path), None)
+            self._generation += 1
+
+    def invalidate(self, *irods_paths: Union[str, IrodsPath]):
+        """Drop all listings affected by created, changed or removed items.
+
+        The listings of the items' parents, of the items themselves and of everything
+        below them are dropped.
+        """
+        changed = {str(path) for path in irods_paths}
+        parents = {posixpath.dirname(path) for path in changed}
+        with self._lock:
+            for path in list(self._entries):
+                if path in parents or _in_subtree(path, changed):
+                    del self._entries[path]
+            self._generation += 1
+
+    def clear(self):
+        """Drop all listings."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+def _in_subtree(path: str, roots: set) -> bool:
+    """Whether path or one of its ancestors is in roots."""
+    while True:
+        if path in roots:
+            return True
+        parent = posixpath.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+
+
+LISTING_CACHE = ListingCache()
+
+
+def cached_listing(session: Session, irods_path: Union[str, IrodsPath]) -> CollectionListing:
+    """Return the listing of a collection from LISTING_CACHE, retrieve it if needed."""
+    listing = LISTING_CACHE.get(irods_path)
+    if listing is None:
+        generation = LISTING_CACHE.generation
+        listing = list_collection(session, irods_path)
+        LISTING_CACHE.put(listing, generation)
+    return listing
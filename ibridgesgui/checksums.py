@@ -0,0 +1,183 @@
+"""Checksums of local files for comparing them with the iRODS checksums.
+
+Local files are hashed through a memory map in a thread pool, hashlib releases
+the GIL while it hashes so several files are hashed in parallel. The results are
+stored in a SQLite database under CONFIG_DIR, keyed by the path together with the
+size, modification time and inode of the file. Unchanged files are therefore only
+hashed once, also across syncs.
+"""
+
+import base64
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+
+from ibridgesgui.config import CONFIG_DIR, ensure_log_config_location
+
+CHECKSUM_CACHE_FILE = CONFIG_DIR.joinpath("checksum_cache.sqlite")
+HASH_WORKERS = 4
+# bytes of the memory map that are hashed at once
+HASH_CHUNK_SIZE = 64 << 20
+# cached checksums are committed in batches
+COMMIT_EVERY = 100
+COMMIT_INTERVAL = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checksums (
+    path TEXT NOT NULL,
+    checksum_type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    PRIMARY KEY (path, checksum_type)
+);
+"""
+
+
+def checksum_type_of(checksum: str) -> str:
+    """Return the type of an iRODS checksum, "sha2" or "md5"."""
+    return "sha2" if checksum.startswith("sha2:") else "md5"
+
+
+def file_checksum(path: Union[str, Path], checksum_type: str = "sha2") -> str:
+    """Compute the checksum of a local file in the format of iRODS.
+
+    Parameters
+    ----------
+    path : str or Path
+        The local file.
+    checksum_type : str
+        "sha2" for the base64 encoded SHA-256 prefixed by "sha2:", "md5" for the
+        hex digest of MD5, see ibridges.util.calc_checksum.
+
+    """
+    f_hash = hashlib.sha256() if checksum_type == "sha2" else hashlib.md5()
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        # empty files cannot be mapped
+        if size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    for offset in range(0, size, HASH_CHUNK_SIZE):
+                        f_hash.update(view[offset : offset + HASH_CHUNK_SIZE])
+    if checksum_type == "md5":
+        return f_hash.hexdigest()
+    return f"sha2:{str(base64.b64encode(f_hash.digest()), encoding='utf-8')}"
+
+
+class ChecksumCache:
+    """Thread-safe access to the cached checksums of local files."""
+
+    def __init__(self, path: Union[str, Path] = CHECKSUM_CACHE_FILE):
+        """Open or create the cache.
+
+        Parameters
+        ----------
+        path : str or Path
+            Location of the SQLite database.
+
+        """
+        ensure_log_config_location()
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def close(self):
+        """Commit outstanding changes and close the database."""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def get(self, path: str, stat_result: os.stat_result, checksum_type: str) -> Optional[str]:
+        """Return the cached checksum if the file did not change since, otherwise None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, checksum FROM checksums "
+                "WHERE path = ? AND checksum_type = ?",
+                (path, checksum_type),
+            ).fetchone()
+        if row is None or row[:3] != (
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stat_result.st_ino,
+        ):
+            return None
+        return row[3]
+
+    def put(self, path: str, stat_result: os.stat_result, checksum_type: str, checksum: str):
+        """Cache the checksum of a file, committed in batches."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checksums "
+                "(path, checksum_type, size, mtime_ns, inode, checksum) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    path,
+                    checksum_type,
+                    stat_result.st_size,
+                    stat_result.st_mtime_ns,
+                    stat_result.st_ino,
+                    checksum,
+                ),
+            )
+            self._uncommitted += 1
+            if (
+                self._uncommitted >= COMMIT_EVERY
+                or time.monotonic() - self._last_commit > COMMIT_INTERVAL
+            ):
+                self._conn.commit()
+                self._uncommitted = 0
+                self._last_commit = time.monotonic()
+
+
+class LocalChecksums:
+    """Compute checksums of local files in parallel and cache them."""
+
+    def __init__(self, cache: Optional[ChecksumCache] = None, workers: int = HASH_WORKERS):
+        """Create the thread pool, without cache every checksum is computed."""
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+
+    def close(self):
+        """Stop the threads and close the cache."""
+        self._pool.shutdown(cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
+
+    def compute(self, files: list) -> list[str]:
+        """Return the checksums of files.
+
+        Parameters
+        ----------
+        files : list
+            (path, stat result, checksum type) of each file, the stat result is the
+            key in the cache.
+
+        Returns
+        -------
+        list of str
+            The checksums in the order of files.
+
+        """
+        checksums = [None] * len(files)
+        futures = {}
+        for idx, (path, stat_result, checksum_type) in enumerate(files):
+            if self.cache is not None:
+                checksums[idx] = self.cache.get(str(path), stat_result, checksum_type)
+            if checksums[idx] is None:
+                futures[idx] = self._pool.submit(file_checksum, path, checksum_type)
+        for idx, future in futures.items():
+            checksums[idx] = future.result()
+            if self.cache is not None:
+                path, stat_result, checksum_type = files[idx]
+                self.cache.put(str(path), stat_result, checksum_type, checksums[idx])
+        return checksums
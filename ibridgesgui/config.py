@@ -1,26 +1,21 @@
 """Setting up logger and configuration files."""
 
+import atexit
+import copy
 import datetime
 import json
 import logging
 import logging.handlers
+import queue
 import sys
 from json import JSONDecodeError
 from pathlib import Path
-from typing import Union
-
-from ibridges.cli.config import IbridgesConf
-from ibridges.session import Session
-from irods.auth.pam import PamLoginException
-from irods.connection import PlainTextPAMPasswordError
-from irods.exception import (
-    CAT_INVALID_AUTHENTICATION,
-    CAT_INVALID_USER,
-    PAM_AUTH_PASSWORD_FAILED,
-    PAM_AUTH_PASSWORD_INVALID_TTL,
-    NetworkException,
-)
-from irods.session import iRODSSession
+from typing import TYPE_CHECKING, Union
+
+# ibridges and irods are imported in the functions that need them, every module
+# imports this one and the main window should not wait for them at start
+if TYPE_CHECKING:
+    from ibridges.session import Session
 
 try:  # Python < 3.10 (backport)
     from importlib_metadata import version  # type: ignore
@@ -39,6 +34,16 @@ LOG_LEVEL = {
 CONFIG_DIR = Path("~", ".ibridges").expanduser()
 CONFIG_FILE = CONFIG_DIR.joinpath("ibridges_gui.json")
 IRODSA = Path.home() / ".irods" / ".irodsA"
+DEFAULT_TRANSFER_WORKERS = 4
+# uploads of files smaller than this are bundled when bundling is selected
+DEFAULT_BUNDLE_THRESHOLD = 1 << 20
+# size in bytes at which the log file is rotated and the number of rotated files kept
+DEFAULT_LOG_MAX_BYTES = 10 << 20
+DEFAULT_LOG_BACKUPS = 5
+# attributes of every LogRecord, the remaining ones were passed as extra
+_LOG_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+# listeners that write the log files in the background by app name, see init_logger
+_LOG_LISTENERS = {}
 
 
 def ensure_log_config_location():
@@ -53,9 +58,60 @@ def ensure_irods_location():
 
 
 # logging functions
+class JsonLinesFormatter(logging.Formatter):
+    """Format log records as one JSON object per line.
+
+    Besides time, level, logger, module, function and message, the fields passed
+    with extra are included, e.g. the source and destination of transferred files.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Return the record as a JSON object on one line."""
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _LOG_RECORD_ATTRS
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """Put log records on the queue of a listener in the same process.
+
+    QueueHandler.prepare formats the traceback into the message and drops exc_info,
+    so that the record can be pickled. The listener runs in this process, the record
+    keeps its exception and the formatters of the listener format it, e.g. as the
+    "exception" field of JsonLinesFormatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge the arguments into the message, keep the exception information."""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
 def init_logger(app_name: str, log_level: str) -> logging.Logger:
     """Create a logger for the app.
 
+    Records are put on a queue and written to the log files by a single background
+    thread, so logging does not wait for the disk. The log file is rotated at the
+    configured size, see get_log_rotation. If enabled with set_log_json, the records
+    are also written as JSON lines to a second file.
+
     app_name : str
         Name of the app, will be used as file name
     log_level : str
@@ -63,12 +119,27 @@ def init_logger(app_name: str, log_level: str) -> logging.Logger:
     """
     logger = logging.getLogger(app_name)
     logfile = CONFIG_DIR.joinpath(f"{app_name}.log")
+    max_bytes, backups = get_log_rotation()
 
     # Direct logging to logfile
     formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    file_handler = logging.handlers.RotatingFileHandler(logfile, "a", 100000, 1)
+    file_handler = logging.handlers.RotatingFileHandler(logfile, "a", max_bytes, backups)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    handlers = [file_handler]
+    if get_log_json():
+        json_handler = logging.handlers.RotatingFileHandler(
+            CONFIG_DIR.joinpath(f"{app_name}.jsonl"), "a", max_bytes, backups, encoding="utf-8"
+        )
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    # a second call replaces the handlers of the first one
+    _stop_listener(_LOG_LISTENERS.pop(app_name, None))
+    for handler in logger.handlers[:]:
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(_LocalQueueHandler(log_queue))
     logger.setLevel(LOG_LEVEL.get(log_level, LOG_LEVEL["info"]))
     try:
         release = version("ibridgesgui")
@@ -85,9 +156,29 @@ def init_logger(app_name: str, log_level: str) -> logging.Logger:
         )
         logfd.write(underscores * 2)
 
+    _LOG_LISTENERS[app_name] = logging.handlers.QueueListener(log_queue, *handlers)
+    _LOG_LISTENERS[app_name].start()
     return logger
 
 
+def stop_logger():
+    """Write the queued log records and stop the background writers."""
+    while _LOG_LISTENERS:
+        _stop_listener(_LOG_LISTENERS.popitem()[1])
+
+
+def _stop_listener(listener: Union[None, logging.handlers.QueueListener]):
+    """Write the queued records of a listener and close its log files."""
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(stop_logger)
+
+
 # ibridges config functions
 def get_last_ienv_name() -> Union[None, str]:
     """Retrieve last used environment name as in the login drop down from the config file."""
@@ -135,6 +226,100 @@ def set_log_level(level: str):
     _save_config(config)
 
 
+def get_transfer_workers() -> int:
+    """Retrieve the number of parallel transfers from config."""
+    config = _get_config()
+    if config is not None:
+        return int(config.get("transfer_workers", DEFAULT_TRANSFER_WORKERS))
+    return DEFAULT_TRANSFER_WORKERS
+
+
+def set_transfer_workers(workers: int):
+    """Save the number of parallel transfers to config."""
+    config = _get_config()
+    if config is not None:
+        config["transfer_workers"] = workers
+    else:
+        config = {"transfer_workers": workers}
+    _save_config(config)
+
+
+def get_bundle_threshold() -> int:
+    """Retrieve the size in bytes below which uploaded files are bundled."""
+    config = _get_config()
+    if config is not None:
+        return int(config.get("bundle_threshold", DEFAULT_BUNDLE_THRESHOLD))
+    return DEFAULT_BUNDLE_THRESHOLD
+
+
+def set_bundle_threshold(threshold: int):
+    """Save the size in bytes below which uploaded files are bundled."""
+    config = _get_config()
+    if config is not None:
+        config["bundle_threshold"] = threshold
+    else:
+        config = {"bundle_threshold": threshold}
+    _save_config(config)
+
+
+def get_bundle_extract() -> bool:
+    """Retrieve whether bundles are extracted on the server or kept with a manifest."""
+    config = _get_config()
+    if config is not None:
+        return bool(config.get("bundle_extract", True))
+    return True
+
+
+def set_bundle_extract(extract: bool):
+    """Save whether bundles are extracted on the server or kept with a manifest."""
+    config = _get_config()
+    if config is not None:
+        config["bundle_extract"] = extract
+    else:
+        config = {"bundle_extract": extract}
+    _save_config(config)
+
+
+def get_log_rotation() -> tuple[int, int]:
+    """Retrieve the size in bytes at which the log is rotated and the number of files kept."""
+    config = _get_config()
+    if config is not None:
+        return (
+            int(config.get("log_max_bytes", DEFAULT_LOG_MAX_BYTES)),
+            int(config.get("log_backups", DEFAULT_LOG_BACKUPS)),
+        )
+    return DEFAULT_LOG_MAX_BYTES, DEFAULT_LOG_BACKUPS
+
+
+def set_log_rotation(max_bytes: int, backups: int):
+    """Save the size at which the log is rotated and the number of files kept."""
+    config = _get_config()
+    if config is not None:
+        config["log_max_bytes"] = max_bytes
+        config["log_backups"] = backups
+    else:
+        config = {"log_max_bytes": max_bytes, "log_backups": backups}
+    _save_config(config)
+
+
+def get_log_json() -> bool:
+    """Retrieve whether the log is also written as JSON lines."""
+    config = _get_config()
+    if config is not None:
+        return bool(config.get("log_json", False))
+    return False
+
+
+def set_log_json(enabled: bool):
+    """Save whether the log is also written as JSON lines."""
+    config = _get_config()
+    if config is not None:
+        config["log_json"] = enabled
+    else:
+        config = {"log_json": enabled}
+    _save_config(config)
+
+
 def config_add_tab(tab_provider: object):
     """Add a tab name to the config file."""
     try:
@@ -199,6 +384,8 @@ def save_current_settings(env_path_name: Path):
 
     Will be stored in ibridges_cli.json and in ibridges_gui.json.
     """
+    from ibridges.cli.config import IbridgesConf  # pylint: disable=import-outside-toplevel
+
     ibridges_conf = IbridgesConf(None)
     with open(IRODSA, "r", encoding="utf-8") as f:
         pw = f.read()
@@ -232,7 +419,7 @@ def get_prev_settings() -> dict:
 # irods config functions
 
 
-def is_session_from_config(session: Session) -> Union[Session, None]:
+def is_session_from_config(session: "Session") -> Union["Session", None]:
     """Create a new session from the given session.
 
     For the QThreads we need an own session to avoid hickups.
@@ -298,6 +485,19 @@ def check_irods_config(ienv: Union[Path, dict], include_network=True) -> str:
     if not isinstance(env["irods_port"], int):
         return '"irods_port" needs to be an integer, remove quotes.'
     if include_network:
+        # pylint: disable=import-outside-toplevel
+        from ibridges.session import Session
+        from irods.auth.pam import PamLoginException
+        from irods.connection import PlainTextPAMPasswordError
+        from irods.exception import (
+            CAT_INVALID_AUTHENTICATION,
+            CAT_INVALID_USER,
+            PAM_AUTH_PASSWORD_FAILED,
+            PAM_AUTH_PASSWORD_INVALID_TTL,
+            NetworkException,
+        )
+        from irods.session import iRODSSession
+
         if not Session.network_check(env["irods_host"], env["irods_port"]):
             return f'No connection: Network might be down or\n \
                     server name {env["irods_host"]} is incorrect or\n \
@@ -356,6 +556,8 @@ def save_irods_config(env_path: Union[Path, str], conf: dict):
 
 def combine_envs_gui_cli() -> dict[str, (tuple[Path, str])]:
     """Read in the saved aliases from the CLI and combine with the GUI environments."""
+    from ibridges.cli.config import IbridgesConf  # pylint: disable=import-outside-toplevel
+
     cli_servers = IbridgesConf(None).servers
     gui = get_prev_settings()
     aliases = {}
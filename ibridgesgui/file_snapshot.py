@@ -0,0 +1,84 @@
+"""Snapshot of the metadata of local files.
+
+On network filesystems every stat() is a round trip to the file server. The
+planners stat each local file once while they walk a folder and keep the result
+here, the later stages of a transfer (sizes for the progress and the journal,
+the sync diff table) read it from the snapshot instead of asking the filesystem
+again. A sync also keeps the stamps of the data objects that local files are
+downloaded from, the sync state records what was planned.
+"""
+
+import os
+from array import array
+from pathlib import Path
+from typing import Optional, Union
+
+
+class FileSnapshot:
+    """Size, modification time and inode of local files.
+
+    The values are kept in flat arrays with one row per file, a dictionary maps
+    the paths to their rows.
+    """
+
+    __slots__ = ("_rows", "sizes", "mtimes_ns", "inodes", "_remote")
+
+    def __init__(self):
+        """Create an empty snapshot."""
+        self._rows = {}
+        self.sizes = array("q")
+        self.mtimes_ns = array("q")
+        self.inodes = array("Q")
+        # local path: (size, modify time, checksum) of the data object it is downloaded from
+        self._remote = {}
+
+    def __len__(self) -> int:
+        """Return the number of files."""
+        return len(self._rows)
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        """Whether the file is in the snapshot."""
+        return str(path) in self._rows
+
+    def add(self, path: Union[str, Path], stat_result: os.stat_result) -> int:
+        """Store the stat result of a file and return its row, e.g. from DirEntry.stat."""
+        key = str(path)
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self.sizes)
+            self._rows[key] = row
+            self.sizes.append(stat_result.st_size)
+            self.mtimes_ns.append(stat_result.st_mtime_ns)
+            self.inodes.append(stat_result.st_ino)
+        else:
+            self.sizes[row] = stat_result.st_size
+            self.mtimes_ns[row] = stat_result.st_mtime_ns
+            self.inodes[row] = stat_result.st_ino
+        return row
+
+    def row(self, path: Union[str, Path]) -> int:
+        """Return the row of a file, stat it if it is not in the snapshot yet."""
+        row = self._rows.get(str(path))
+        if row is None:
+            row = self.add(path, os.stat(path))
+        return row
+
+    def size(self, path: Union[str, Path]) -> int:
+        """Return the size in bytes of a file."""
+        return self.sizes[self.row(path)]
+
+    def mtime_ns(self, path: Union[str, Path]) -> int:
+        """Return the modification time of a file in nanoseconds."""
+        return self.mtimes_ns[self.row(path)]
+
+    def inode(self, path: Union[str, Path]) -> int:
+        """Return the inode number of a file."""
+        return self.inodes[self.row(path)]
+
+    def add_remote(self, path: Union[str, Path], stamps: tuple):
+        """Store the (size, modify time, checksum) of the data object a file is downloaded from."""
+        self._remote[str(path)] = stamps
+
+    def remote(self, path: Union[str, Path]) -> Optional[tuple]:
+        """Return the stamps of the data object a file is downloaded from, see add_remote."""
+        return self._remote.get(str(path))
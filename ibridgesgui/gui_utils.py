@@ -2,20 +2,26 @@
 # ruff: noqa: N802 # Overriding a pyside6 function that is not snake_case
 # pylint: disable=R0903, R1705, C0103
 
+import functools
+import hashlib
 import os
 import pathlib
 import sys
-from typing import Union
+import warnings
+from typing import TYPE_CHECKING, Union
 
-import irods
 import PySide6.QtCore
 import PySide6.QtUiTools
 import PySide6.QtWidgets
-from ibridges import IrodsPath
-from ibridges.executor import Operations
 
 from ibridgesgui.config import get_last_ienv_path, is_session_from_config
 
+# only for annotations, the main window imports this module before ibridges is needed
+if TYPE_CHECKING:
+    import irods
+    from ibridges import IrodsPath
+    from ibridges.executor import Operations
+
 try:
     from importlib_metadata import entry_points
 except ImportError:
@@ -32,6 +38,8 @@ if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
 else:
     UI_FILE_DIR = files(__package__) / "ui_files"
     LOGO_DIR = files(__package__) / "icons"
+# build_tools/ui_to_py.py ends the generated Ui classes with the hash of their .ui file
+UI_SOURCE_HASH = "# ui source sha256: "
 
 
 class UiLoader(PySide6.QtUiTools.QUiLoader):
@@ -56,14 +64,56 @@ class UiLoader(PySide6.QtUiTools.QUiLoader):
 
 def load_ui(ui_file, base_instance=None):
     """Load ui, as available in pyqt."""
-    ui_dir = os.path.dirname(ui_file)
-    os.chdir(ui_dir)
     loader = UiLoader(base_instance)
-    widget = loader.load(ui_file)
+    # icons in the ui files are relative to their folder
+    loader.setWorkingDirectory(PySide6.QtCore.QDir(os.path.dirname(str(ui_file))))
+    widget = loader.load(str(ui_file))
     PySide6.QtCore.QMetaObject.connectSlotsByName(widget)
     return widget
 
 
+def ui_source_hash(ui_source: bytes) -> str:
+    """Return the hash of the content of a .ui file, independent of its line endings."""
+    return hashlib.sha256(ui_source.replace(b"\r\n", b"\n")).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_ui_is_current(ui_name: str) -> bool:
+    """Whether ui_files/<ui_name>.py was generated from the current ui_files/<ui_name>.ui."""
+    try:
+        ui_source = (UI_FILE_DIR / f"{ui_name}.ui").read_bytes()
+    except OSError:
+        # only the generated classes are installed
+        return True
+    try:
+        compiled = (UI_FILE_DIR / f"{ui_name}.py").read_text(encoding="utf-8")
+    except OSError:
+        return False
+    return f"{UI_SOURCE_HASH}{ui_source_hash(ui_source)}" in compiled
+
+
+def setup_ui(widget, ui_name: str):
+    """Create the child widgets of a window from its generated Ui class.
+
+    widget inherits the Ui class generated from ui_files/<ui_name>.ui. When the
+    .ui file changed after the class was generated, e.g. in Qt Designer, the .ui
+    file is loaded at runtime instead until build_tools/ui_to_py.py is run again.
+    """
+    if (
+        getattr(sys, "frozen", False)
+        or ("__compiled__" in globals())
+        or compiled_ui_is_current(ui_name)
+    ):
+        widget.setupUi(widget)
+        return
+    warnings.warn(
+        f"ui_files/{ui_name}.py is outdated, loading {ui_name}.ui instead. "
+        "Run build_tools/ui_to_py.py to update it.",
+        stacklevel=2,
+    )
+    load_ui(UI_FILE_DIR / f"{ui_name}.ui", widget)
+
+
 # Widget utils
 def populate_table(table_widget, rows: int, data_by_row: list):
     """Populate a table-like pyqt widget with data."""
@@ -97,7 +147,7 @@ def populate_textfield(text_widget, text_by_row: Union[str, list]):
 
 
 # iBridges/iRODS utils
-def get_irods_item(irods_path: IrodsPath):
+def get_irods_item(irods_path: "IrodsPath"):
     """Get the item behind an iRODS path."""
     if irods_path.collection_exists():
         item = irods_path.collection
@@ -106,7 +156,7 @@ def get_irods_item(irods_path: IrodsPath):
     return item
 
 
-def get_coll_dict(root_coll: irods.collection.iRODSCollection) -> dict:
+def get_coll_dict(root_coll: "irods.collection.iRODSCollection") -> dict:
     """Create a recursive metadata dictionary for `coll`.
 
     Parameters
@@ -137,7 +187,7 @@ def prep_session_for_copy(session, error_label) -> pathlib.Path:
     return None
 
 
-def combine_operations(operations: list[Operations]) -> Operations:
+def combine_operations(operations: "list[Operations]") -> "Operations":
     """Combine the operations of several upload or download dry-runs."""
     ops = operations[0]
     ops.create_dir = set().union(*[o.create_dir for o in operations])
@@ -149,6 +199,62 @@ def combine_operations(operations: list[Operations]) -> Operations:
     return ops
 
 
+def _format_size(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1000:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1000
+    return f"{num_bytes:.1f} TB"
+
+
+def transfer_status_text(state: list) -> str:
+    """Describe the progress list of a TransferDataThread in one line.
+
+    Parameters
+    ----------
+    state : list
+        [total_size, transferred_size, obj_count, num_objs, obj_failed,
+        bytes_per_second, eta_seconds, current_file, file_transferred, file_size, planning]
+
+    Returns
+    -------
+    str
+        Files done, throughput, remaining time and the progress of the current file.
+
+    """
+    _, _, obj_count, num_objs, obj_failed, rate, eta, current, file_done, file_size = state[:10]
+    planning = state[10]
+    if planning:
+        text = f"{obj_count} of {num_objs} files found so far; failed: {obj_failed}."
+    else:
+        text = f"{obj_count} of {num_objs} files; failed: {obj_failed}."
+    if rate > 0:
+        text += f" {rate / 1e6:.1f} MB/s"
+    if eta >= 0:
+        minutes, seconds = divmod(int(eta), 60)
+        hours, minutes = divmod(minutes, 60)
+        text += f", {hours}:{minutes:02d}:{seconds:02d} remaining"
+    if current != "" and file_size > 0:
+        text += (
+            f"\n{pathlib.PurePath(current).name}: "
+            f"{_format_size(file_done)} of {_format_size(file_size)}"
+        )
+    return text
+
+
+def diff_totals_text(count: int, num_bytes: int) -> str:
+    """Describe the number and size of the transfers of a sync diff."""
+    return f"{count} files, {_format_size(num_bytes)}"
+
+
+def transfer_percentage(state: list) -> int:
+    """Return the percentage of transferred bytes of a progress list."""
+    total_size, transferred_size = state[:2]
+    if total_size <= 0:
+        return 0
+    return min(100, int(transferred_size * 100 / total_size))
+
+
 # OS utils
 def get_downloads_dir() -> pathlib.Path:
     """Find the platform-dependent 'Downloads' directory.
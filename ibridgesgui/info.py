@@ -1,26 +1,29 @@
 """Provide the GUI with iRODS information."""
 
-import sys
+import logging
+from pathlib import Path
 
 import PySide6.QtWidgets
 from ibridges.resources import Resources
 
-from ibridgesgui.config import CONFIG_DIR
-from ibridgesgui.gui_utils import UI_FILE_DIR, load_ui, populate_table, populate_textfield
+from ibridgesgui.config import CONFIG_DIR, get_last_ienv_path, is_session_from_config
+from ibridgesgui.gui_utils import populate_table, populate_textfield, setup_ui
+from ibridgesgui.threads import CatalogTaskThread
 from ibridgesgui.ui_files.tabInfo import Ui_tabInfo
 
 
 class Info(PySide6.QtWidgets.QWidget, Ui_tabInfo):
     """Set iRODS information in the GUI."""
 
-    def __init__(self, session):
+    def __init__(self, session, app_name: str):
         """Initialise the tab."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "tabInfo.ui", self)
+        setup_ui(self, "tabInfo")
         self.session = session
+        self.logger = logging.getLogger(app_name)
+        # the catalog is queried in the background with sessions from the session pool
+        self.ienv_path = Path(get_last_ienv_path()) if is_session_from_config(session) else None
+        self.info_thread = None
 
         self.refresh_button.clicked.connect(self.refresh_info)
         self.refresh_info()
@@ -28,26 +31,68 @@ class Info(PySide6.QtWidgets.QWidget, Ui_tabInfo):
     def refresh_info(self):
         """Find and set the information of the connected iRODS system."""
         self.resc_table.setRowCount(0)
-        self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.WaitCursor))
         # irods Zone
         self.zone_label.setText(self.session.zone)
         # irods user
         self.user_label.setText(self.session.username)
-        # irods user type and groups
-        user_type, user_groups = self.session.get_user_info()
-        self.type_label.setText(user_type)
-        populate_textfield(self.groups_browser, user_groups)
         # ibridges log location
         self.log_label.setText(str(CONFIG_DIR))
         # default resource
         self.resc_label.setText(self.session.default_resc)
-        # irods server and version
+        # irods server
         self.server_label.setText(self.session.host)
-        self.version_label.setText(".".join((str(num) for num in self.session.server_version)))
+        # user type, groups, server version and resources are queried in the background
+        if self.ienv_path is None:
+            task_out = {"error": ""}
+            try:
+                task_out["result"] = _fetch_server_info(self.session)
+            except Exception as err:
+                self.logger.exception("Cannot retrieve the iRODS information")
+                task_out["error"] = repr(err)
+            self._fill_server_info(task_out)
+            return
+        if self.info_thread is not None:
+            return
+        try:
+            self.info_thread = CatalogTaskThread(self.ienv_path, self.logger, _fetch_server_info)
+        except Exception as err:
+            self._fill_server_info({"error": repr(err)})
+            return
+        self.refresh_button.setEnabled(False)
+        self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.WaitCursor))
+        self.info_thread.result.connect(self._fill_server_info)
+        self.info_thread.finished.connect(self._finish_info_thread)
+        self.info_thread.start()
+
+    def _fill_server_info(self, task_out: dict):
+        if task_out["error"] != "":
+            self.type_label.setText(f"Cannot retrieve information: {task_out['error']}")
+            return
+        user_type, user_groups, server_version, resc_info = task_out["result"]
+        # irods user type and groups
+        self.type_label.setText(user_type)
+        populate_textfield(self.groups_browser, user_groups)
+        # irods version
+        self.version_label.setText(".".join((str(num) for num in server_version)))
         # irods resources
-        resc_info = Resources(self.session).root_resources
         populate_table(self.resc_table, len(resc_info[0]), resc_info)
         header = self.resc_table.horizontalHeader()
         for col in range(header.count()):
             header.setSectionResizeMode(col, PySide6.QtWidgets.QHeaderView.ResizeToContents)
+
+    def _finish_info_thread(self):
+        self.info_thread.wait()
+        self.info_thread = None
+        self.refresh_button.setEnabled(True)
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
+
+
+def _fetch_server_info(session) -> tuple:
+    """Return user type, groups, server version and root resources, a catalog task."""
+    user_type, user_groups = session.get_user_info()
+    return (
+        user_type,
+        user_groups,
+        tuple(session.server_version),
+        Resources(session).root_resources,
+    )
@@ -2,120 +2,309 @@
 
 The IRODS database is huge and retrieving a complete tree of all files
 can take ages.  To improve the loading time the tree is only grown as
-far as it displays.
+far as it displays. The content of expanded collections is listed in
+background threads, a "loading…" child is shown until it arrives.
 """
+# ruff: noqa: N802 # Overriding a pyside6 function that is not snake_case
+# pylint: disable=R0903, C0103
+
+import posixpath
+from pathlib import Path
+from typing import Optional
 
-import irods
-import irods.exception
 import PySide6.QtCore
 import PySide6.QtGui
 import PySide6.QtWidgets
 from ibridges import IrodsPath
 
+from ibridgesgui.catalog import LISTING_CACHE, CollectionListing, cached_listing
+from ibridgesgui.table_models import FETCH_SIZE
+from ibridgesgui.threads import ListingThread
+
+LOADING = "loading\u2026"
+
+_ICONS = {}
+
+
+def _icon(is_collection: bool) -> PySide6.QtGui.QIcon:
+    """Return the folder or file icon, all nodes share the same two icons."""
+    if not _ICONS:
+        icon_provider = PySide6.QtWidgets.QFileIconProvider()
+        _ICONS[True] = icon_provider.icon(PySide6.QtWidgets.QFileIconProvider.IconType.Folder)
+        _ICONS[False] = icon_provider.icon(PySide6.QtWidgets.QFileIconProvider.IconType.File)
+    return _ICONS[is_collection]
+
+
+class TreeNode:
+    """Collection or data object in the tree.
+
+    The children of a collection are created in chunks from its listing when the
+    view asks for them.
+    """
 
-class IrodsTreeModel(PySide6.QtGui.QStandardItemModel):
+    __slots__ = ("name", "path", "is_collection", "parent", "row", "children", "listing")
+
+    def __init__(
+        self, name: str, path: Optional[str], is_collection: bool, parent=None, row: int = 0
+    ):
+        """Create a node without children, the path of the loading placeholder is None."""
+        self.name = name
+        self.path = path
+        self.is_collection = is_collection
+        self.parent = parent
+        self.row = row
+        self.children = []
+        # CollectionListing of a collection, None until it was retrieved
+        self.listing = None
+
+    def can_fetch_more(self) -> bool:
+        """Whether the node has children that are not in the tree yet."""
+        if not self.is_collection:
+            return False
+        return self.listing is None or len(self.children) < len(self.listing)
+
+
+class IrodsTreeModel(PySide6.QtCore.QAbstractItemModel):
     """Model for an iRODS tree view."""
 
-    def __init__(self, tree_view, irods_root_path: IrodsPath):
+    def __init__(
+        self, tree_view, irods_root_path: IrodsPath, logger, ienv_path: Optional[Path] = None
+    ):
         """Initialise the tree view with the root node and first level.
 
-        Class variables 'user_groups' and 'base_path' _must_ be
-        populated with a list of group names and the path name of the
-        iRODS top-level collection (i.e., /<zone name>/home),
-        respectively.
-
         Parameters
         ----------
         tree_view : PyQt6.QtWidgets
             Defined iRODS tree view UI element.
-        session : ibridges.Session
-            A valid session to iRODS
         irods_root_path : IrodsPath
             The root collection for the tree
+        logger : logging.Logger
+            Logger
+        ienv_path : Path, optional
+            Environment of the session pool for the background listings, without
+            it collections are listed in the GUI thread.
 
         """
         super().__init__()
         self.tree_view = tree_view
         self.session = irods_root_path.session
         self.irods_root_path = irods_root_path
-        # Empty tree
-        self.clear()
+        self.logger = logger
+        self.ienv_path = ienv_path
+        # Empty tree, the invisible root holds the node of irods_root_path
+        self.root = TreeNode("", "", True)
+        self.root.listing = ()
+        # running listings: thread -> (node, listing so far, placeholder)
+        self.loading = {}
+        self.threads = set()
 
-    def _tree_row_from_irods_item(self, item, parent_id, level, display_path=False):
-        icon_provider = PySide6.QtWidgets.QFileIconProvider()
-        if display_path:
-            display = PySide6.QtGui.QStandardItem(item.path)
-        else:
-            display = PySide6.QtGui.QStandardItem(item.name)
-        if isinstance(item, irods.collection.iRODSCollection):
-            display.setIcon(icon_provider.icon(PySide6.QtWidgets.QFileIconProvider.IconType.Folder))
-            datatype = "C"
-        else:
-            display.setIcon(icon_provider.icon(PySide6.QtWidgets.QFileIconProvider.IconType.File))
-            datatype = "d"
-        row = [
-            display,  # display name
-            PySide6.QtGui.QStandardItem(str(level + 1)),  # item level in the tree
-            PySide6.QtGui.QStandardItem(str(item.id)),  # id in iRODS
-            PySide6.QtGui.QStandardItem(str(parent_id)),  # parent id
-            PySide6.QtGui.QStandardItem(datatype),  # C or d
-            PySide6.QtGui.QStandardItem(item.path),  # absolute irods path
+    def _node(self, index: PySide6.QtCore.QModelIndex) -> TreeNode:
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def index(self, row, column, parent=PySide6.QtCore.QModelIndex()):
+        """Return the index of a child of parent."""
+        node = self._node(parent)
+        if column != 0 or not 0 <= row < len(node.children):
+            return PySide6.QtCore.QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index=PySide6.QtCore.QModelIndex()):
+        """Return the index of the parent of index."""
+        if not index.isValid():
+            return PySide6.QtCore.QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return PySide6.QtCore.QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=PySide6.QtCore.QModelIndex()) -> int:
+        """Return the number of children in the tree."""
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, _parent=PySide6.QtCore.QModelIndex()) -> int:
+        """Return the number of columns."""
+        return 1
+
+    def hasChildren(self, parent=PySide6.QtCore.QModelIndex()) -> bool:
+        """Return whether a node has children, collections do until their listing is empty."""
+        node = self._node(parent)
+        if node.listing is None:
+            return node.is_collection
+        return len(node.listing) > 0 or len(node.children) > 0
+
+    def flags(self, index):
+        """Return the item flags, the loading placeholder cannot be selected."""
+        if index.isValid() and index.internalPointer().path is None:
+            return PySide6.QtCore.Qt.ItemFlag.ItemIsEnabled
+        return super().flags(index)
+
+    def data(self, index, role=PySide6.QtCore.Qt.ItemDataRole.DisplayRole):
+        """Return the name or icon of a node."""
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == PySide6.QtCore.Qt.ItemDataRole.DisplayRole:
+            return node.name
+        if role == PySide6.QtCore.Qt.ItemDataRole.DecorationRole and node.path is not None:
+            return _icon(node.is_collection)
+        return None
+
+    def headerData(
+        self, _section, orientation, role=PySide6.QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        """Return the column name."""
+        if (
+            role == PySide6.QtCore.Qt.ItemDataRole.DisplayRole
+            and orientation == PySide6.QtCore.Qt.Orientation.Horizontal
+        ):
+            return "Name"
+        return None
+
+    def canFetchMore(self, parent=PySide6.QtCore.QModelIndex()) -> bool:
+        """Whether the collection has children that are not in the tree yet."""
+        node = self._node(parent)
+        return node.can_fetch_more() and not self._is_loading(node)
+
+    def fetchMore(self, parent=PySide6.QtCore.QModelIndex()):
+        """Add the next chunk of children, start listing the collection if needed."""
+        node = self._node(parent)
+        if node.listing is None:
+            node.listing = LISTING_CACHE.get(node.path)
+        if node.listing is None:
+            if self.ienv_path is not None:
+                self._start_loading(parent, node)
+                return
+            node.listing = cached_listing(self.session, node.path)
+        self._insert_children(parent, node, node.listing, FETCH_SIZE)
+
+    def _insert_children(self, parent, node: TreeNode, listing, max_rows: int):
+        """Insert up to max_rows children from listing after the present children."""
+        start = len(node.children)
+        if node.children and node.children[-1].path is None:
+            # keep the loading placeholder at the end
+            start -= 1
+        end = min(start + max_rows, len(listing))
+        if end <= start:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        node.children[start:start] = [
+            TreeNode(
+                listing.names[idx],
+                posixpath.join(node.path, listing.names[idx]),
+                listing.is_collection(idx),
+                node,
+                idx,
+            )
+            for idx in range(start, end)
         ]
-        return row
+        for row in range(end, len(node.children)):
+            node.children[row].row = row
+        self.endInsertRows()
 
-    def init_tree(self):
-        """Draw the first levels of an iRODS filesystem as a tree."""
-        self.setRowCount(0)
-        root = self.invisibleRootItem()
+    def _index(self, node: TreeNode) -> PySide6.QtCore.QModelIndex:
+        if node is self.root:
+            return PySide6.QtCore.QModelIndex()
+        return self.createIndex(node.row, 0, node)
 
-        # Start the tree, add the highest level to the invisible root
-        root_coll = IrodsPath(self.session, self.irods_root_path).collection
-        root_row = self._tree_row_from_irods_item(root_coll, -1, -1, True)
-        root.appendRow(root_row)
+    def _is_loading(self, node: TreeNode) -> bool:
+        return any(loading_node is node for loading_node, _, _ in self.loading.values())
 
-        new_node = root.child(root.rowCount() - 1)
+    def _start_loading(self, parent, node: TreeNode):
+        """List the collection of node in a background thread behind a placeholder."""
+        try:
+            thread = ListingThread(self.ienv_path, self.logger, node.path)
+        except Exception as err:
+            self.logger.error("Cannot list %s: %s", node.path, repr(err))
+            node.listing = ()
+            return
+        self.beginInsertRows(parent, len(node.children), len(node.children))
+        placeholder = TreeNode(LOADING, None, False, node, len(node.children))
+        node.children.append(placeholder)
+        self.endInsertRows()
+        self.loading[thread] = (node, CollectionListing(node.path), placeholder)
+        thread.page.connect(self._loading_page)
+        thread.result.connect(self._loading_end)
+        thread.finished.connect(self._thread_finished)
+        self.threads.add(thread)
+        thread.start()
 
-        # insert a dummy child to get the link to open the collection
-        new_node.appendRow(None)
+    def _loading_page(self, page: CollectionListing):
+        if self.sender() not in self.loading:
+            # the node was collapsed or removed
+            return
+        node, listing, _ = self.loading[self.sender()]
+        listing.extend(page)
+        # the first chunk is shown while loading, the rest on demand
+        shown = len(node.children) - 1
+        self._insert_children(self._index(node), node, listing, FETCH_SIZE - shown)
 
-    def delete_subtree(self, tree_item):
-        """Delete subtree.
+    def _loading_end(self, listing_out: dict):
+        if self.sender() not in self.loading:
+            return
+        node, listing, placeholder = self.loading.pop(self.sender())
+        self.beginRemoveRows(self._index(node), placeholder.row, placeholder.row)
+        node.children.remove(placeholder)
+        self.endRemoveRows()
+        if listing_out["error"] != "":
+            self.logger.error("Cannot list %s: %s", node.path, listing_out["error"])
+        # an incomplete listing is kept, refresh_subtree retrieves it again
+        node.listing = listing
+
+    def _thread_finished(self):
+        thread = self.sender()
+        thread.wait()
+        self.threads.discard(thread)
+
+    def _cancel_loading(self, node: TreeNode, subtree: bool = False):
+        """Stop listing node, with subtree also all nodes below it."""
+        for thread, (loading_node, _, _) in list(self.loading.items()):
+            ancestor = loading_node
+            while subtree and ancestor is not None and ancestor is not node:
+                ancestor = ancestor.parent
+            if ancestor is node:
+                thread.requestInterruption()
+                del self.loading[thread]
+
+    def collapse_subtree(self, model_index):
+        """Drop the children of a collapsed collection that is still loading.
 
         Parameters
         ----------
-        tree_item : QStandardItem
-            Item in the QTreeView
+        model_index : PyQt6.QtCore.QModelIndex
+            Location in tree
 
         """
-        # Remove all children from tree_item
-        tree_item.removeRows(0, tree_item.rowCount())
+        node = self._node(model_index)
+        if self._is_loading(node):
+            self.delete_subtree(model_index)
 
-    def add_subtree(self, tree_item, tree_item_data: list):
-        """Grow tree_view from tree_item.
+    def init_tree(self):
+        """Draw the first level of an iRODS filesystem as a tree."""
+        self.beginResetModel()
+        root_path = str(self.irods_root_path)
+        self.root.children = [TreeNode(root_path, root_path, True, self.root, 0)]
+        self.endResetModel()
+
+    def delete_subtree(self, model_index):
+        """Delete subtree, the children are retrieved again when the view needs them.
 
         Parameters
         ----------
-        tree_item : PyQt6.QtGui.QStandardItem
-            The root of the subtree in the tree view
-        tree_item_data : list
-            [display_name, level, id, parent_id, 'C/d', absolute iRODS Path]
+        model_index : PyQt6.QtCore.QModelIndex
+            Location in tree
 
         """
-        _, level, _, _, _, abs_irods_path = tree_item_data
-        parent_coll = IrodsPath(self.session, abs_irods_path).collection
-
-        # the irods root also contains the irods root as subcollection
-        subcolls = [c for c in parent_coll.subcollections if c.path != "/"]
-        dataobjs = parent_coll.data_objects
-        # we assume that tree_item has no children yet.
-        new_nodes = {}
-        for item in subcolls + dataobjs:
-            row = self._tree_row_from_irods_item(item, parent_coll.id, int(level))
-            tree_item.appendRow(row)
-            new_nodes[item.id] = tree_item.child(tree_item.rowCount() - 1)
-            if isinstance(item, irods.collection.iRODSCollection):
-                # insert a dummy child to get the link to open the collection
-                new_nodes[item.id].appendRow(None)
+        node = self._node(model_index)
+        self._cancel_loading(node, subtree=True)
+        if node.children:
+            self.beginRemoveRows(model_index, 0, len(node.children) - 1)
+            node.children = []
+            self.endRemoveRows()
+        node.listing = None
 
     def refresh_subtree(self, position):
         """Refresh the tree view.
@@ -126,20 +315,11 @@ class IrodsTreeModel(PySide6.QtGui.QStandardItemModel):
             Location in tree
 
         """
-        model_index = position
-        tree_item = self.itemFromIndex(model_index)  # clicked item
-        parent = tree_item.parent()
-        if parent is None:
-            parent = self.invisibleRootItem()
-        row = tree_item.row()
-
-        # retrieve information of clicked item, the information is stored in its parent
-        tree_item_data = [parent.child(row, col).data(0) for col in range(parent.columnCount())]
-        irods_path = IrodsPath(self.session, tree_item_data[-1])
-        if irods_path.collection_exists():
-            # Delete subtree in irodsFsdata and the tree_view.
-            self.delete_subtree(tree_item)
-            self.add_subtree(tree_item, tree_item_data)
+        if not self._node(position).is_collection:
+            return
+        self.delete_subtree(position)
+        if self.tree_view.isExpanded(position):
+            self.fetchMore(position)
 
     def irods_path_from_tree_index(self, model_index):
         """Convert a tree index to iRODS path.
@@ -150,11 +330,4 @@ class IrodsTreeModel(PySide6.QtGui.QStandardItemModel):
             Selected row in tree view
 
         """
-        tree_item = self.itemFromIndex(model_index)  # clicked item
-        row = tree_item.row()
-
-        parent = tree_item.parent()  # contains the data of tree_item
-        if parent is None:
-            parent = self.invisibleRootItem()
-        irods_path = [parent.child(row, col).data(0) for col in range(parent.columnCount())][-1]
-        return IrodsPath(self.session, irods_path)
+        return IrodsPath(self.session, self._node(model_index).path)
@@ -0,0 +1,63 @@
+"""Placeholder for tabs that are created when they are first shown."""
+
+import logging
+from typing import Callable, Optional
+
+import PySide6.QtCore
+import PySide6.QtGui
+import PySide6.QtWidgets
+
+from ibridgesgui.startup_profile import measure
+
+
+class LazyTab(PySide6.QtWidgets.QWidget):  # pylint: disable=too-few-public-methods
+    """Tab page that creates its content on the first call to build.
+
+    Until then it only shows a label, so adding the tab does not cost more than
+    adding an empty widget. The main window calls build when the tab is selected.
+    """
+
+    def __init__(
+        self, name: str, factory: Callable[[], PySide6.QtWidgets.QWidget], logger: logging.Logger
+    ):
+        """Keep the factory of the tab content.
+
+        Parameters
+        ----------
+        name : str
+            Name of the tab.
+        factory : Callable
+            Called without arguments, returns the widget of the tab.
+        logger : logging.Logger
+            Logger for errors of the factory.
+
+        """
+        super().__init__()
+        self.name = name
+        self.factory = factory
+        self.logger = logger
+        self.widget: Optional[PySide6.QtWidgets.QWidget] = None
+        self._layout = PySide6.QtWidgets.QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._placeholder = PySide6.QtWidgets.QLabel("Loading ...", self)
+        self._placeholder.setAlignment(PySide6.QtCore.Qt.AlignmentFlag.AlignCenter)
+        self._layout.addWidget(self._placeholder)
+
+    def build(self) -> Optional[PySide6.QtWidgets.QWidget]:
+        """Create the content if that did not happen yet and return it, None on errors."""
+        if self.widget is not None:
+            return self.widget
+        self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.WaitCursor))
+        try:
+            with measure(f"tab {self.name}"):
+                self.widget = self.factory()
+        except Exception as err:
+            self.logger.exception("Cannot create tab %s", self.name)
+            self._placeholder.setText(f"Cannot create tab: {repr(err)}")
+            return None
+        finally:
+            self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
+        self._layout.removeWidget(self._placeholder)
+        self._placeholder.deleteLater()
+        self._layout.addWidget(self.widget)
+        return self.widget
@@ -2,7 +2,6 @@
 
 import logging
 import os
-import sys
 from pathlib import Path
 
 from ibridges import IrodsPath, Session
@@ -20,7 +19,7 @@ from ibridgesgui.config import (
     save_current_settings,
     set_last_ienv,
 )
-from ibridgesgui.gui_utils import UI_FILE_DIR, load_ui
+from ibridgesgui.gui_utils import setup_ui
 from ibridgesgui.ui_files.irodsLogin import Ui_irodsLogin
 
 
@@ -35,10 +34,7 @@ class Login(QDialog, Ui_irodsLogin):
     def __init__(self, session_dict, app_name):
         """Initialise tab."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "irodsLogin.ui", self)
+        setup_ui(self, "irodsLogin")
 
         self.logger = logging.getLogger(app_name)
         self.irods_config_dir = Path("~", ".irods").expanduser()
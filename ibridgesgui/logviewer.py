@@ -1,29 +1,74 @@
 """Logging tab."""
 
 import logging
-import sys
+import threading
+from collections import deque
 
 import PySide6
+import PySide6.QtCore
+import PySide6.QtGui
 
 from ibridgesgui.config import CONFIG_DIR
-from ibridgesgui.gui_utils import UI_FILE_DIR, load_ui
+from ibridgesgui.gui_utils import setup_ui
 from ibridgesgui.ui_files.tabLogging import Ui_tabLogging
 
+# milliseconds between appending the buffered log lines to the Logs tab
+LOG_FLUSH_INTERVAL = 250
+# lines kept in the Logs tab, the log file has all of them
+LOG_MAX_LINES = 5000
+
 
 class QPlainTextEditLogger(logging.Handler, PySide6.QtCore.QObject):
-    """log handler."""
+    """Log handler that shows the records in a text widget.
+
+    Records can be emitted from any thread. They are formatted right away and
+    buffered, a timer of the GUI thread appends them to the widget in batches. The
+    buffer and the widget keep at most LOG_MAX_LINES lines, older lines are dropped.
+    """
 
-    def __init__(self, widget: PySide6.QtWidgets.QPlainTextEdit):
-        """Initialize the log handler."""
+    def __init__(self, widget: PySide6.QtWidgets.QTextEdit):
+        """Initialize the log handler, must be called in the GUI thread."""
         PySide6.QtCore.QObject.__init__(self)
         super().__init__()
         self.widget = widget
         self.widget.setReadOnly(True)
+        self.widget.document().setMaximumBlockCount(LOG_MAX_LINES)
+        self._lines = deque(maxlen=LOG_MAX_LINES)
+        self._dropped = 0
+        self._buffer_lock = threading.Lock()
+        self._timer = PySide6.QtCore.QTimer(self)
+        self._timer.timeout.connect(self.write_buffered)
+        self._timer.start(LOG_FLUSH_INTERVAL)
 
     def emit(self, record: logging.LogRecord):
-        """Pass `record` to all connected slots."""
-        msg = self.format(record) + "\n"
-        self.widget.insertPlainText(msg)
+        """Buffer the formatted record until the next flush."""
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._buffer_lock:
+            if len(self._lines) == LOG_MAX_LINES:
+                self._dropped += 1
+            self._lines.append(msg)
+
+    def write_buffered(self):
+        """Append the buffered lines to the widget, called by the timer of the GUI thread."""
+        with self._buffer_lock:
+            if not self._lines:
+                return
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+        if dropped > 0:
+            lines.insert(0, f"... {dropped} log lines skipped ...")
+        scroll_bar = self.widget.verticalScrollBar()
+        at_bottom = scroll_bar.value() == scroll_bar.maximum()
+        cursor = PySide6.QtGui.QTextCursor(self.widget.document())
+        cursor.movePosition(PySide6.QtGui.QTextCursor.MoveOperation.End)
+        cursor.insertText("\n".join(lines) + "\n")
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
 
 
 class LogViewer(PySide6.QtWidgets.QWidget, Ui_tabLogging):
@@ -32,10 +77,7 @@ class LogViewer(PySide6.QtWidgets.QWidget, Ui_tabLogging):
     def __init__(self, logger):
         """Initialise the tab."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "tabLogging.ui", self)
+        setup_ui(self, "tabLogging")
 
         self.logger = logger
         self.log_label.setText(str(CONFIG_DIR))
@@ -0,0 +1,706 @@
+"""Streaming planners for uploads and downloads.
+
+`ibridges.upload` and `ibridges.download` with dry_run walk the complete local
+tree and the complete remote collection before they return the operations. The
+planners below produce the same operations one directory or collection at a time,
+so the transfer engine can start with the first files while the rest of the tree
+is still enumerated. Without overwrite an existing file or data object stops the
+transfer before anything is written, such plans are completed before the first
+chunk is handed out.
+
+Each local folder is read with one os.scandir, the stat results of the files go
+into a FileSnapshot that the later stages of the transfer use. Files whose size
+differs from the data object are transferred without comparing checksums.
+
+For a sync, files that did not change since the last sync according to the
+SyncState of the folder and collection are not compared at all. In the checksum
+mode of a sync all files of equal size are compared by checksum instead, the local
+checksums are cached by LocalChecksums.
+
+Both sides are walked at the same time: while the planner lists a collection in
+the catalog, a small thread pool already reads and stats the next local folders
+of the walk. At most PREFETCH_LOOKAHEAD folders are read ahead, so the memory
+stays bounded for large trees.
+
+The two sides of a folder are matched by name in a dictionary, not by merging two
+sorted streams. os.scandir returns the entries in no particular order and the
+collection listing is needed completely anyway, to find the new subcollections and
+the stamps for the sync state, so sorting both sides would only add work. Matching
+per folder is linear in the number of entries and keeps a single pass over each
+folder, the time of a plan goes into the catalog round trips and the stat calls
+that the prefetching overlaps.
+"""
+
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from ibridges import IrodsPath, Session, download, upload
+from ibridges.data_operations import _transfer_needed
+from ibridges.exception import (
+    CollectionDoesNotExistError,
+    DataObjectExistsError,
+    NotACollectionError,
+)
+from ibridges.executor import Operations
+from ibridges.path import CachedIrodsPath
+
+from ibridgesgui.catalog import list_collection
+from ibridgesgui.checksums import LocalChecksums, checksum_type_of
+from ibridgesgui.file_snapshot import FileSnapshot
+from ibridgesgui.sync_state import SyncState
+
+# threads that read local folders ahead of the planner
+PREFETCH_WORKERS = 4
+# number of folders that are read ahead
+PREFETCH_LOOKAHEAD = 16
+# outcomes of the comparison of a file that exists on both sides, see _classify
+TRANSFER = "transfer"
+COMPARE = "compare"
+UNCHANGED = "unchanged"
+EQUAL = "equal"
+
+
+def iter_upload_plan(
+    session: Session,
+    local_paths: Iterable[Union[str, Path]],
+    irods_path: Union[str, IrodsPath],
+    overwrite: bool,
+    snapshot: Optional[FileSnapshot] = None,
+) -> Iterator[Operations]:
+    """Plan the upload of files and folders into a collection, one folder at a time.
+
+    Parameters
+    ----------
+    session : Session
+        Session to compare with the catalog.
+    local_paths : Iterable
+        Files and folders to upload.
+    irods_path : str or IrodsPath
+        Collection to upload into.
+    overwrite : bool
+        Overwrite data objects that differ from the local files.
+    snapshot : FileSnapshot, optional
+        Receives the stat results of the files to upload.
+
+    Raises
+    ------
+    DataObjectExistsError
+        If data exists and overwrite is False, see ibridges.upload. Without overwrite
+        all local paths are planned before the first chunk is yielded, so a conflict
+        raises before anything is transferred.
+
+    """
+    if snapshot is None:
+        snapshot = FileSnapshot()
+    chunks = _upload_chunks(session, local_paths, irods_path, overwrite, snapshot)
+    yield from chunks if overwrite else list(chunks)
+
+
+def _upload_chunks(
+    session: Session,
+    local_paths: Iterable[Union[str, Path]],
+    irods_path: Union[str, IrodsPath],
+    overwrite: bool,
+    snapshot: FileSnapshot,
+) -> Iterator[Operations]:
+    ipath = IrodsPath(session, irods_path)
+    for local_path in local_paths:
+        local_path = Path(local_path)
+        if local_path.is_dir():
+            idest_path = ipath / local_path.name
+            if not overwrite and idest_path.dataobject_exists():
+                raise DataObjectExistsError(f"Data object {idest_path} already exists.")
+            ops = Operations()
+            if not ipath.collection_exists():
+                ops.add_create_coll(ipath)
+            yield from _plan_upload_tree(session, local_path, idest_path, overwrite, snapshot, ops)
+        else:
+            ops = upload(session, local_path, ipath, overwrite=overwrite, dry_run=True)
+            for lpath, _ in ops.upload:
+                snapshot.row(lpath)
+            yield ops
+
+
+class _Prefetcher:
+    """Call a function for the next items of a walk in a thread pool."""
+
+    def __init__(self, func: Callable):
+        self._func = func
+        self._pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+        self._futures = {}
+
+    def prefetch(self, items: list):
+        """Start the function for the last PREFETCH_LOOKAHEAD items, the top of a stack."""
+        for item in items[-PREFETCH_LOOKAHEAD:]:
+            if item not in self._futures:
+                self._futures[item] = self._pool.submit(self._func, item)
+
+    def get(self, item):
+        """Return the result for item, call the function if it was not prefetched."""
+        future = self._futures.pop(item, None)
+        if future is None:
+            return self._func(item)
+        return future.result()
+
+    def discard(self, item):
+        """Drop the result for item."""
+        future = self._futures.pop(item, None)
+        if future is not None:
+            future.cancel()
+
+    def close(self):
+        """Stop the threads, prefetched results that are not needed anymore are dropped."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._futures.clear()
+
+
+def _scandir(folder: Path) -> tuple[list, list]:
+    """Return the names of the subfolders and the DirEntry of the files, without symlinks.
+
+    The files are statted here, DirEntry keeps the stat result.
+    """
+    folders = []
+    files = []
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_symlink():
+                    warnings.warn(f"Ignoring symlink {entry.path}.")
+                elif entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    entry.stat(follow_symlinks=False)
+                    files.append(entry)
+    except FileNotFoundError:
+        pass
+    return folders, files
+
+
+def _scandir_files(folder: Path) -> Optional[dict]:
+    """Return the DirEntry of the files by name, None if the folder does not exist."""
+    try:
+        with os.scandir(folder) as entries:
+            files = {entry.name: entry for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        return None
+    for entry in files.values():
+        entry.stat()
+    return files
+
+
+def _equal_checksums(checksums: Optional[LocalChecksums], compare: list) -> list[bool]:
+    """Compare local files with their data objects by checksum.
+
+    compare holds the (local path, stat result, data object) of each file. The
+    checksum type follows the checksum of the data object, the server computes it
+    if the catalog has none. The local checksums are computed in parallel.
+    """
+    if not compare:
+        return []
+    remote = [ipath.checksum for _, _, ipath in compare]
+    local = checksums.compute(
+        [
+            (lpath, stat_result, checksum_type_of(checksum))
+            for (lpath, stat_result, _), checksum in zip(compare, remote)
+        ]
+    )
+    return [local_sum == remote_sum for local_sum, remote_sum in zip(local, remote)]
+
+
+def _unchanged(
+    state: Optional[SyncState],
+    recorded: dict,
+    name: str,
+    stat_result: os.stat_result,
+    stamps: tuple,
+) -> bool:
+    """Whether neither side of a file changed since the last sync, False without a state.
+
+    recorded holds the entries of the folder in the state, see SyncState.folder, and
+    stamps the (size, modify time, checksum) of the data object.
+    """
+    return state is not None and state.unchanged(recorded.get(name), stat_result, *stamps)
+
+
+def _classify(
+    source: Union[Path, IrodsPath],
+    dest: Union[Path, IrodsPath],
+    local_size: int,
+    remote: IrodsPath,
+    overwrite: bool,
+    unchanged: bool,
+    by_checksum: bool,
+) -> str:
+    """Decide what to do with a file that exists locally and in iRODS.
+
+    Returns COMPARE when the file has to be compared by checksum, UNCHANGED when
+    neither side changed since the last sync, TRANSFER when the file has to be
+    transferred from source to dest and EQUAL otherwise.
+
+    Raises
+    ------
+    DataObjectExistsError, FileExistsError
+        If the file differs and overwrite is False, see _transfer_needed.
+
+    """
+    if by_checksum:
+        return COMPARE if remote.size == local_size else TRANSFER
+    if unchanged:
+        return UNCHANGED
+    if (overwrite and remote.size != local_size) or _transfer_needed(
+        source, dest, overwrite, False
+    ):
+        return TRANSFER
+    return EQUAL
+
+
+def _plan_compared(
+    add: Callable[[Path, IrodsPath], None],
+    checksums: Optional[LocalChecksums],
+    compare: list,
+    state: Optional[SyncState],
+    rel_folder: str,
+    stale: set,
+):
+    """Plan the files of a folder that are compared by checksum and update the sync state.
+
+    compare holds the (local path, stat result, data object, remote stamps) of each
+    file, add is called with the local path and data object of the differing files.
+    Equal files are recorded in the state, the stale names are removed from it.
+    """
+    equal = _equal_checksums(checksums, [item[:3] for item in compare])
+    for (lpath, stat_result, ipath, stamps), same in zip(compare, equal):
+        if not same:
+            add(lpath, ipath)
+        elif state is not None:
+            state.record(rel_folder, lpath.name, stat_result, *stamps)
+    if state is not None:
+        state.prune(rel_folder, stale)
+
+
+def _upload_remote_items(
+    session: Session, root_ipath: IrodsPath, new_colls: set, recursive: bool, ops: Operations
+) -> tuple[dict, set, dict]:
+    """Return the remote items of a folder, see _remote_items, nothing for new collections.
+
+    The collections that do not exist yet are added to ops.
+    """
+    if str(root_ipath) in new_colls:
+        new_colls.discard(str(root_ipath))
+        ops.add_create_coll(root_ipath)
+        return {}, set(), {}
+    data_objects, collections, stamps = _remote_items(session, root_ipath)
+    if not recursive and not (data_objects or collections):
+        if not root_ipath.collection_exists():
+            ops.add_create_coll(root_ipath)
+    return data_objects, collections, stamps
+
+
+def _plan_upload_tree(
+    session: Session,
+    local_path: Path,
+    idest_path: IrodsPath,
+    overwrite: bool,
+    snapshot: FileSnapshot,
+    ops: Operations,
+    state: Optional[SyncState] = None,
+    start_folders: Optional[Iterable[Path]] = None,
+    skip: Optional[Callable[[Path, os.stat_result], bool]] = None,
+    checksums: Optional[LocalChecksums] = None,
+) -> Iterator[Operations]:
+    """Plan the upload of the content of local_path into idest_path, one folder at a time.
+
+    The first chunk starts with ops. With a sync state, files that did not change on
+    either side since the last sync are not compared. With start_folders only these
+    folders of the tree are planned, and their subfolders that are new in iRODS.
+    Files for which skip returns True are left out. With checksums every file of equal
+    size is compared with its data object by checksum, see _equal_checksums.
+    """
+    # collections that do not exist yet, there is nothing to compare with
+    new_colls = set()
+    if not idest_path.collection_exists():
+        new_colls.add(str(idest_path))
+
+    # depth first like os.walk, a folder before its subfolders
+    recursive = start_folders is None
+    stack = [local_path] if recursive else sorted(set(start_folders), reverse=True)
+    visited = set()
+    scans = _Prefetcher(_scandir)
+    scans.prefetch(stack)
+    try:
+        while stack:
+            root = stack.pop()
+            if root in visited:
+                scans.discard(root)
+                continue
+            visited.add(root)
+            rel_parts = root.relative_to(local_path).parts
+            root_ipath = idest_path.joinpath(*rel_parts)
+            if ops is None:
+                ops = Operations()
+            data_objects, collections, stamps = _upload_remote_items(
+                session, root_ipath, new_colls, recursive, ops
+            )
+            # read by the prefetch threads while the collection was listed
+            folders, files = scans.get(root)
+            rel_folder = "/".join(rel_parts)
+            recorded = state.folder(rel_folder) if state is not None else {}
+            # (local path, stat result, data object, stamps) to compare by checksum
+            compare = []
+            for entry in files:
+                lpath = root / entry.name
+                stat_result = entry.stat(follow_symlinks=False)
+                if skip is not None and skip(lpath, stat_result):
+                    continue
+                size = snapshot.sizes[snapshot.add(lpath, stat_result)]
+                remote = data_objects.get(entry.name)
+                if remote is None:
+                    ops.add_upload(
+                        lpath,
+                        CachedIrodsPath(session, None, False, None, str(root_ipath), entry.name),
+                    )
+                    continue
+                remote_stamps = (remote.size, *stamps[entry.name])
+                verdict = _classify(
+                    lpath,
+                    remote,
+                    size,
+                    remote,
+                    overwrite,
+                    _unchanged(state, recorded, entry.name, stat_result, remote_stamps),
+                    checksums is not None,
+                )
+                if verdict == TRANSFER:
+                    ops.add_upload(lpath, remote)
+                elif verdict == COMPARE:
+                    compare.append((lpath, stat_result, remote, remote_stamps))
+                elif verdict == EQUAL and state is not None:
+                    state.record(rel_folder, entry.name, stat_result, *remote_stamps)
+            _plan_compared(
+                ops.add_upload,
+                checksums,
+                compare,
+                state,
+                rel_folder,
+                set(recorded) - {entry.name for entry in files},
+            )
+            new_colls.update(
+                str(root_ipath / folder) for folder in folders if folder not in collections
+            )
+            stack.extend(
+                root / folder
+                for folder in reversed(folders)
+                if recursive or str(root_ipath / folder) in new_colls
+            )
+            # the local folders that come next are read while this one is planned
+            scans.prefetch(stack)
+            yield ops
+            ops = None
+    finally:
+        scans.close()
+
+
+def _remote_items(session: Session, ipath: IrodsPath) -> tuple[dict, set, dict]:
+    """Return the data objects, the subcollection names and the data object stamps of ipath.
+
+    The data objects and their (modify time, checksum) stamps are keyed by name.
+    """
+    listing = list_collection(session, ipath)
+    data_objects = {}
+    collections = set()
+    stamps = {}
+    for idx, name in enumerate(listing.names):
+        if listing.is_collection(idx):
+            collections.add(name)
+        else:
+            data_objects[name] = CachedIrodsPath(
+                session,
+                listing.sizes[idx],
+                True,
+                listing.checksums[idx] or None,
+                listing.path,
+                name,
+            )
+            stamps[name] = (listing.modified[idx], listing.checksums[idx])
+    return data_objects, collections, stamps
+
+
+def iter_download_plan(
+    session: Session,
+    irods_paths: Iterable[Union[str, IrodsPath]],
+    local_path: Union[str, Path],
+    overwrite: bool,
+    metadata: Optional[Union[str, Path]] = None,
+) -> Iterator[Operations]:
+    """Plan the download of data objects and collections, one collection at a time.
+
+    Parameters
+    ----------
+    session : Session
+        Session to list the collections with.
+    irods_paths : Iterable
+        Data objects and collections to download.
+    local_path : str or Path
+        Folder to download into.
+    overwrite : bool
+        Overwrite local files that differ from the data objects.
+    metadata : str or Path, optional
+        File to store the metadata of the downloaded items in.
+
+    Raises
+    ------
+    FileExistsError
+        If a file exists and overwrite is False, see ibridges.download. Without
+        overwrite all data is planned before the first chunk is yielded, so a conflict
+        raises before anything is transferred.
+    NotADirectoryError
+        If a collection is downloaded into a file.
+
+    """
+    chunks = _download_chunks(session, irods_paths, Path(local_path), overwrite, metadata)
+    yield from chunks if overwrite else list(chunks)
+
+
+def _download_chunks(
+    session: Session,
+    irods_paths: Iterable[Union[str, IrodsPath]],
+    local_path: Path,
+    overwrite: bool,
+    metadata: Optional[Union[str, Path]],
+) -> Iterator[Operations]:
+    for irods_path in irods_paths:
+        ipath = IrodsPath(session, irods_path)
+        if ipath.collection_exists():
+            if local_path.is_file():
+                raise NotADirectoryError(
+                    f"Cannot download to directory {local_path} "
+                    "since a file with the same name exists."
+                )
+            yield from _plan_download_coll(
+                session, ipath, local_path / ipath.name, overwrite, metadata
+            )
+        else:
+            yield download(
+                session, ipath, local_path, overwrite=overwrite, metadata=metadata, dry_run=True
+            )
+
+
+def _plan_download_coll(
+    session: Session,
+    isource_path: IrodsPath,
+    ldest_path: Path,
+    overwrite: bool,
+    metadata: Optional[Union[str, Path]],
+    state: Optional[SyncState] = None,
+    checksums: Optional[LocalChecksums] = None,
+    snapshot: Optional[FileSnapshot] = None,
+) -> Iterator[Operations]:
+    def local_dir(coll: IrodsPath) -> Path:
+        return ldest_path.joinpath(*coll.relative_to(isource_path).parts)
+
+    stack = [isource_path]
+    scans = _Prefetcher(_scandir_files)
+    try:
+        while stack:
+            coll = stack.pop()
+            rel_parts = coll.relative_to(isource_path).parts
+            ldir = ldest_path.joinpath(*rel_parts)
+            listing = list_collection(session, coll)
+            ops = Operations()
+            if metadata is not None:
+                ops.add_meta_download(isource_path, coll, metadata)
+            # read by the prefetch threads while the collection was listed
+            local_files = scans.get(ldir)
+            if local_files is None:
+                ops.add_create_dir(ldir)
+                local_files = {}
+            rel_folder = "/".join(rel_parts)
+            recorded = state.folder(rel_folder) if state is not None else {}
+            # (local path, stat result, data object, stamps) to compare by checksum
+            compare = []
+            subcollections = []
+            for idx, name in enumerate(listing.names):
+                if listing.is_collection(idx):
+                    subcollections.append(coll / name)
+                    continue
+                ipath = CachedIrodsPath(
+                    session,
+                    listing.sizes[idx],
+                    True,
+                    listing.checksums[idx] or None,
+                    listing.path,
+                    name,
+                )
+                if metadata is not None:
+                    ops.add_meta_download(isource_path, ipath, metadata)
+                lpath = ldir / name
+                stamps = (listing.sizes[idx], listing.modified[idx], listing.checksums[idx])
+                if snapshot is not None:
+                    snapshot.add_remote(lpath, stamps)
+                local = local_files.get(name)
+                if local is None:
+                    ops.add_download(ipath, lpath)
+                    continue
+                stat_result = local.stat()
+                verdict = _classify(
+                    ipath,
+                    lpath,
+                    stat_result.st_size,
+                    ipath,
+                    overwrite,
+                    _unchanged(state, recorded, name, stat_result, stamps),
+                    checksums is not None,
+                )
+                if verdict == TRANSFER:
+                    ops.add_download(ipath, lpath)
+                elif verdict == COMPARE:
+                    compare.append((lpath, stat_result, ipath, stamps))
+                elif verdict == EQUAL and state is not None:
+                    state.record(rel_folder, name, stat_result, *stamps)
+            _plan_compared(
+                lambda lpath, ipath: ops.add_download(ipath, lpath),
+                checksums,
+                compare,
+                state,
+                rel_folder,
+                set(recorded) - set(local_files),
+            )
+            # depth first in the order of the listing
+            stack.extend(reversed(subcollections))
+            # the local folders that come next are read while this one is planned
+            scans.prefetch([local_dir(coll) for coll in stack[-PREFETCH_LOOKAHEAD:]])
+            yield ops
+    finally:
+        scans.close()
+
+
+def iter_sync_plan(
+    session: Session,
+    source: Union[str, Path, IrodsPath],
+    target: Union[str, Path, IrodsPath],
+    snapshot: Optional[FileSnapshot] = None,
+    state: Optional[SyncState] = None,
+    checksums: Optional[LocalChecksums] = None,
+) -> Iterator[Operations]:
+    """Plan the sync of a folder or collection, one folder or collection at a time.
+
+    The operations are those of ibridges.sync with copy_empty_folders and without
+    metadata: the content of source is transferred into target, differing files
+    are overwritten.
+
+    Parameters
+    ----------
+    session : Session
+        Session to compare with the catalog.
+    source : str, Path or IrodsPath
+        Folder or collection to sync from, the other side is target.
+    target : str, Path or IrodsPath
+        Collection or folder to sync to.
+    snapshot : FileSnapshot, optional
+        Receives the stat results of the local files, or the stamps of the data
+        objects when source is a collection.
+    state : SyncState, optional
+        State of the last sync of the pair, unchanged files are skipped and files
+        found equal are recorded.
+    checksums : LocalChecksums, optional
+        Verify all files of equal size by checksum, also those that did not change
+        according to the state.
+
+    Raises
+    ------
+    CollectionDoesNotExistError
+        If the source collection does not exist.
+    NotACollectionError
+        If the source is a data object.
+    NotADirectoryError
+        If the local source is not a directory.
+
+    """
+    if isinstance(source, IrodsPath):
+        if not source.collection_exists():
+            if source.dataobject_exists():
+                raise NotACollectionError(
+                    f"Source '{source.absolute()}' is a data object, can only sync collections."
+                )
+            raise CollectionDoesNotExistError(
+                f"Source collection '{source.absolute()}' does not exist"
+            )
+        yield from _plan_download_coll(
+            session, source, Path(target), True, None, state, checksums, snapshot
+        )
+    else:
+        if not Path(source).is_dir():
+            raise NotADirectoryError(
+                f"Source folder '{source}' is not a directory or does not exist."
+            )
+        if snapshot is None:
+            snapshot = FileSnapshot()
+        yield from _plan_upload_tree(
+            session,
+            Path(source),
+            IrodsPath(session, target),
+            True,
+            snapshot,
+            Operations(),
+            state,
+            checksums=checksums,
+        )
+
+
+def iter_watch_plan(
+    session: Session,
+    local_path: Union[str, Path],
+    irods_path: Union[str, IrodsPath],
+    folders: Optional[Iterable[Union[str, Path]]],
+    snapshot: Optional[FileSnapshot] = None,
+    state: Optional[SyncState] = None,
+    skip: Optional[Callable[[Path, os.stat_result], bool]] = None,
+) -> Iterator[Operations]:
+    """Plan the upload of changed folders of a folder that is synced into a collection.
+
+    Like iter_sync_plan from local_path to irods_path, but only the files directly in
+    folders are compared. Subfolders are only planned when their collection does not
+    exist yet.
+
+    Parameters
+    ----------
+    session : Session
+        Session to compare with the catalog.
+    local_path : str or Path
+        Synchronised folder.
+    irods_path : str or IrodsPath
+        Synchronised collection.
+    folders : Iterable or None
+        Changed folders within local_path, None plans the complete tree.
+    snapshot : FileSnapshot, optional
+        Receives the stat results of the local files.
+    state : SyncState, optional
+        State of the last sync of the pair, see iter_sync_plan.
+    skip : Callable, optional
+        Called with the path and stat result of each file, files for which it returns
+        True are not planned, e.g. because they are still being written.
+
+    """
+    local_path = Path(local_path)
+    start_folders = None
+    if folders is not None:
+        # folders that were removed or moved out of the tree are ignored
+        start_folders = [
+            Path(folder)
+            for folder in folders
+            if Path(folder).is_relative_to(local_path) and Path(folder).is_dir()
+        ]
+    yield from _plan_upload_tree(
+        session,
+        local_path,
+        IrodsPath(session, irods_path),
+        True,
+        snapshot if snapshot is not None else FileSnapshot(),
+        Operations(),
+        state,
+        start_folders=start_folders,
+        skip=skip,
+    )
@@ -2,20 +2,33 @@
 
 import json
 import os
-import sys
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 import irods
 import PySide6.QtCore
 import PySide6.QtGui
 import PySide6.QtWidgets
-from ibridges import IrodsPath, download, upload
+from ibridges import IrodsPath
 from ibridges.exception import DataObjectExistsError
 from ibridges.util import find_environment_provider, get_environment_providers
 
-from ibridgesgui.config import _read_json, check_irods_config, get_last_ienv_path, save_irods_config
-from ibridgesgui.gui_utils import UI_FILE_DIR, combine_operations, load_ui, populate_textfield
+from ibridgesgui.catalog import LISTING_CACHE
+from ibridgesgui.config import (
+    _read_json,
+    check_irods_config,
+    get_bundle_threshold,
+    get_last_ienv_path,
+    save_irods_config,
+)
+from ibridgesgui.gui_utils import (
+    populate_textfield,
+    setup_ui,
+    transfer_percentage,
+    transfer_status_text,
+)
+from ibridgesgui.planner import iter_download_plan, iter_upload_plan
 from ibridgesgui.threads import TransferDataThread
 from ibridgesgui.ui_files.configCheck import Ui_configCheck
 from ibridgesgui.ui_files.createCollection import Ui_createCollection
@@ -30,10 +43,7 @@ class CreateCollection(PySide6.QtWidgets.QDialog, Ui_createCollection):
     def __init__(self, parent, logger):
         """Initialise window."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "createCollection.ui", self)
+        setup_ui(self, "createCollection")
 
         self.logger = logger
         self.setWindowTitle("Create iRODS collection")
@@ -51,6 +61,11 @@ class CreateCollection(PySide6.QtWidgets.QDialog, Ui_createCollection):
             else:
                 try:
                     IrodsPath.create_collection(new_coll_path.session, new_coll_path)
+                    # intermediate collections are created as well
+                    new_colls = [new_coll_path]
+                    while str(new_colls[-1].parent) not in (str(self.parent), "/"):
+                        new_colls.append(new_colls[-1].parent)
+                    LISTING_CACHE.invalidate(*new_colls)
                     self.logger.info(f"Created collection {new_coll_path}")
                     self.done(0)
                 except irods.exception.CAT_NO_ACCESS_PERMISSION:
@@ -69,10 +84,7 @@ class CreateDirectory(PySide6.QtWidgets.QDialog, Ui_createCollection):
     def __init__(self, parent):
         """Initialise window."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "createCollection.ui", self)
+        setup_ui(self, "createCollection")
         self.setWindowTitle("Create Directory")
         self.setWindowFlags(PySide6.QtCore.Qt.WindowType.WindowStaysOnTopHint)
         self.parent = parent
@@ -101,10 +113,7 @@ class Rename(PySide6.QtWidgets.QDialog, Ui_renameItem):
     def __init__(self, irods_path: IrodsPath, logger):
         """Initialise window."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "renameItem.ui", self)
+        setup_ui(self, "renameItem")
 
         self.logger = logger
         self.setWindowTitle("Create iRODS collection")
@@ -123,6 +132,7 @@ class Rename(PySide6.QtWidgets.QDialog, Ui_renameItem):
             else:
                 try:
                     new_irods_path = self.irods_path.rename(new_path)
+                    LISTING_CACHE.invalidate(self.irods_path, new_irods_path)
                     self.logger.info(f"Rename/Move {self.irods_path} --> {new_irods_path}")
                     self.done(0)
                 except irods.exception.CAT_NO_ACCESS_PERMISSION:
@@ -138,10 +148,7 @@ class CheckConfig(PySide6.QtWidgets.QDialog, Ui_configCheck):
     def __init__(self, logger, env_path):
         """Initialise window."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "configCheck.ui", self)
+        setup_ui(self, "configCheck")
 
         self.logger = logger
         self.env_path = env_path
@@ -281,10 +288,7 @@ class UploadData(PySide6.QtWidgets.QDialog, Ui_uploadData):
     def __init__(self, logger, session, irods_path):
         """Initialise window."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "uploadData.ui", self)
+        setup_ui(self, "uploadData")
 
         self.active_upload = False
         self.upload_thread = None
@@ -355,69 +359,66 @@ class UploadData(PySide6.QtWidgets.QDialog, Ui_uploadData):
         env_path = Path(get_last_ienv_path())
 
         try:
-            ops = combine_operations(
-                [
-                    upload(
-                        self.session,
-                        p,
-                        self.irods_path,
-                        overwrite=self.overwrite.isChecked(),
-                        dry_run=True,
-                    )
-                    for p in lpaths
-                ]
+            # the thread plans the upload while it transfers the first files
+            self.upload_thread = TransferDataThread(
+                env_path,
+                self.logger,
+                None,
+                overwrite=self.overwrite.isChecked(),
+                bundle_threshold=get_bundle_threshold() if self.bundle_files.isChecked() else 0,
+                planner=partial(
+                    iter_upload_plan,
+                    local_paths=lpaths,
+                    irods_path=str(self.irods_path),
+                    overwrite=self.overwrite.isChecked(),
+                ),
             )
-
-            if len(ops.upload) == 0:
-                self.error_label.setText("Data already present and up to date.")
-                self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
-            else:
-                self._enable_buttons(False)
-                self.active_upload = True
-                self.upload_thread = TransferDataThread(
-                    env_path, self.logger, ops, overwrite=self.overwrite.isChecked()
-                )
-                self.upload_thread.result.connect(self._upload_fetch_result)
-                self.upload_thread.finished.connect(self._finish_upload)
-                self.upload_thread.current_progress.connect(self._upload_status)
-                self.upload_thread.start()
-
-        except DataObjectExistsError:
-            self.error_label.setText("Data already exists. Check 'overwrite' to overwrite.")
-            self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
-            self._enable_buttons(True)
-            return
+            self._enable_buttons(False)
+            self.active_upload = True
+            self.upload_thread.result.connect(self._upload_fetch_result)
+            self.upload_thread.finished.connect(self._finish_upload)
+            self.upload_thread.current_progress.connect(self._upload_status)
+            self.upload_thread.start()
         except Exception as err:
             self.error_label.setText(
                 f"Could not instantiate a new session from {env_path}: {repr(err)}."
             )
             self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
             self._enable_buttons(True)
-            return
 
     def _finish_upload(self):
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
         del self.upload_thread
 
     def _upload_status(self, state):
-        up_size, transferred_size, obj_count, num_objs, obj_failed = state
-        if up_size > 0:
-            self.progress_bar.setValue(int(transferred_size * 100 / up_size))
-        text = f"{obj_count} of {num_objs} files; failed: {obj_failed}."
-        self.error_label.setText(text)
+        self.progress_bar.setValue(transfer_percentage(state))
+        self.error_label.setText(transfer_status_text(state))
 
     def _upload_fetch_result(self, thread_output: dict):
         self.active_upload = False
-        if thread_output["error"] == "":
+        if isinstance(thread_output["planning_error"], DataObjectExistsError):
+            self.error_label.setText("Data already exists. Check 'overwrite' to overwrite.")
+            self._enable_buttons(True)
+        elif thread_output["planned"] == 0 and thread_output["error"] == "":
+            self.error_label.setText("Data already present and up to date.")
+            self._enable_buttons(True)
+        elif thread_output["error"] == "":
             self.error_label.setText("Upload finished.")
         else:
             self.error_label.setText("Errors occurred during upload. Consult the logs.")
+        if thread_output.get("bundles", 0) > 0:
+            files, bundles = thread_output["bundled_files"], thread_output["bundles"]
+            self.error_label.setText(
+                f"{self.error_label.text()}\n{files} small files uploaded in {bundles} "
+                f"bundles, {files - bundles} uploads saved."
+            )
 
     def _enable_buttons(self, enable):
         self.upload_button.setEnabled(enable)
         self.folder_button.setEnabled(enable)
         self.file_button.setEnabled(enable)
         self.overwrite.setEnabled(enable)
+        self.bundle_files.setEnabled(enable)
 
     def _fs_select(self, path_select):
         """Retrieve the path (file or folder) from a QFileDialog."""
@@ -435,10 +436,7 @@ class DownloadData(PySide6.QtWidgets.QDialog, Ui_downloadData):
     def __init__(self, logger, session, irods_path):
         """Initialise window."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "downloadData.ui", self)
+        setup_ui(self, "downloadData")
 
         self.active_download = False
         self.download_thread = None
@@ -528,53 +526,48 @@ class DownloadData(PySide6.QtWidgets.QDialog, Ui_downloadData):
         self.error_label.setText(f"Downloading to {local_path} ....")
         env_path = Path(get_last_ienv_path())
         try:
-            ops = download(
-                self.session,
-                self.irods_path,
-                local_path,
+            # the thread plans the download while it transfers the first objects
+            self.download_thread = TransferDataThread(
+                env_path,
+                self.logger,
+                None,
                 overwrite=self.overwrite.isChecked(),
-                metadata=self.meta_path,
-                dry_run=True,
+                planner=partial(
+                    iter_download_plan,
+                    irods_paths=[str(self.irods_path)],
+                    local_path=local_path,
+                    overwrite=self.overwrite.isChecked(),
+                    metadata=self.meta_path,
+                ),
             )
-
-            if len(ops.download) == 0 and len(ops.meta_download) == 0:
-                self.error_label.setText("Data already present and up to date.")
-                self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
-            else:
-                self._enable_buttons(False)
-                self.active_download = True
-                self.download_thread = TransferDataThread(
-                    env_path, self.logger, ops, overwrite=self.overwrite.isChecked()
-                )
-                self.download_thread.result.connect(self._download_fetch_result)
-                self.download_thread.finished.connect(self._finish_download)
-                self.download_thread.current_progress.connect(self._download_status)
-                self.download_thread.start()
-        except FileExistsError:
-            self.error_label.setText("Data already exists. Check 'overwrite' to overwrite.")
-            self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
-            self._enable_buttons(True)
-            return
+            self._enable_buttons(False)
+            self.active_download = True
+            self.download_thread.result.connect(self._download_fetch_result)
+            self.download_thread.finished.connect(self._finish_download)
+            self.download_thread.current_progress.connect(self._download_status)
+            self.download_thread.start()
         except Exception as err:
             self.error_label.setText(f"Could not instantiate thread from {env_path}: {repr(err)}.")
             self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
             self._enable_buttons(True)
-            return
 
     def _finish_download(self):
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
         del self.download_thread
 
     def _download_status(self, state):
-        down_size, transferred_size, obj_count, num_objs, obj_failed = state
-        if down_size > 0:
-            self.progress_bar.setValue(int(transferred_size * 100 / down_size))
-        text = f"{obj_count} of {num_objs} files; failed: {obj_failed}."
-        self.error_label.setText(text)
+        self.progress_bar.setValue(transfer_percentage(state))
+        self.error_label.setText(transfer_status_text(state))
 
     def _download_fetch_result(self, thread_output: dict):
         self.active_download = False
-        if thread_output["error"] == "":
+        if isinstance(thread_output["planning_error"], FileExistsError):
+            self.error_label.setText("Data already exists. Check 'overwrite' to overwrite.")
+            self._enable_buttons(True)
+        elif thread_output["planned"] == 0 and thread_output["error"] == "":
+            self.error_label.setText("Data already present and up to date.")
+            self._enable_buttons(True)
+        elif thread_output["error"] == "":
             self.error_label.setText("Download finished.")
         else:
             self.error_label.setText("Errors occurred during download. Consult the logs.")
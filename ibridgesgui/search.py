@@ -1,20 +1,23 @@
 """Search tab."""
 
 import logging
-import sys
+from functools import partial
 from pathlib import Path
 
 import PySide6.QtCore
 import PySide6.QtGui
 import PySide6.QtWidgets
-from ibridges import IrodsPath, download
+from ibridges import IrodsPath
 from ibridges.search import MetaSearch
 
 from ibridgesgui.config import get_last_ienv_path, is_session_from_config
-from ibridgesgui.gui_utils import UI_FILE_DIR, append_table, combine_operations, load_ui
+from ibridgesgui.gui_utils import append_table, setup_ui, transfer_status_text
+from ibridgesgui.planner import iter_download_plan
 from ibridgesgui.threads import SearchThread, TransferDataThread
 from ibridgesgui.ui_files.tabSearch import Ui_tabSearch
 
+BATCH_SIZE = 200
+
 
 class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
     """Search view."""
@@ -36,15 +39,11 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
 
         """
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "tabSearch.ui", self)
+        setup_ui(self, "tabSearch")
 
         self.logger = logging.getLogger(app_name)
         self.session = session
-        self.results = None
-        self.current_batch_num = 0  # number of batches of 50; loading results
+        self.results = []
         self.browser = browser
         self.search_thread = None
         self.download_thread = None
@@ -84,12 +83,16 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
         self.clear_button.show()
 
     def search(self):
-        """Validate search parameters and start search."""
+        """Validate search parameters and start search, stop the running search."""
+        if self.search_thread is not None:
+            self.search_thread.requestInterruption()
+            self.search_button.setEnabled(False)
+            self.search_button.setText("Stopping ...")
+            return
         self.hide_result_elements()
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.WaitCursor))
         self.error_label.clear()
-        self.current_batch_num = 0
-        self.results = None
+        self.results = []
         case_sensitive = self.case_sensitive_box.isChecked()
 
         msg, search_path, path_pattern, meta_searches, checksum = self._validate_search_params()
@@ -111,42 +114,32 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
 
     def next_batch(self):
         """Load next batch of results."""
-        self.load_results(batch_size=25)
+        self.load_results(batch_size=BATCH_SIZE)
 
-    def load_results(self, batch_size=25):
-        """Load seach results into the table view."""
+    def load_results(self, batch_size=BATCH_SIZE):
+        """Load the next batch_size seach results into the table view.
+
+        The results already contain the table rows (type, path, size, checksum,
+        created, modified), no catalog queries are needed.
+        """
         self.error_label.clear()
-        table_data = []  # (Path, Name, Size, Checksum, created, modified)
-        start = self.current_batch_num * batch_size
-        end = min((self.current_batch_num + 1) * 25, len(self.results))
-        for ipath in self.results[start:end]:
-            ipath = IrodsPath(self.session, str(ipath))
-            if ipath.dataobject_exists():
-                table_data.append(
-                    (
-                        "-d",
-                        str(ipath),
-                        ipath.size,
-                        ipath.dataobject.create_time.strftime("%d-%m-%Y"),
-                        ipath.dataobject.modify_time.strftime("%d-%m-%Y"),
-                    )
-                )
-            else:
-                table_data.append(
-                    (
-                        "-C",
-                        str(ipath),
-                        "",
-                        ipath.collection.create_time.strftime("%d-%m-%Y"),
-                        ipath.collection.modify_time.strftime("%d-%m-%Y"),
-                    )
-                )
-        self.current_batch_num = self.current_batch_num + 1
-        append_table(self.search_table, self.search_table.rowCount(), table_data)
-
-        if len(self.results) > batch_size * self.current_batch_num:
+        start = self.search_table.rowCount()
+        end = min(start + batch_size, len(self.results))
+        # rows would move while they are inserted into a sorted table
+        sorting = self.search_table.isSortingEnabled()
+        self.search_table.setSortingEnabled(False)
+        append_table(self.search_table, start, self.results[start:end])
+        self.search_table.setSortingEnabled(sorting)
+        self._update_load_more_button()
+
+    def _update_load_more_button(self):
+        remaining = len(self.results) - self.search_table.rowCount()
+        if remaining > 0:
+            found = f"{len(self.results)}+" if self.search_thread is not None else len(self.results)
             self.load_more_button.show()
-            self.load_more_button.setText(f"Load next {batch_size} of {len(self.results)} results.")
+            self.load_more_button.setText(
+                f"Load next {min(BATCH_SIZE, remaining)} of {found} results."
+            )
         else:
             self.load_more_button.hide()
 
@@ -202,7 +195,7 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
         """Set browser input_path to collection or parent of object."""
         row = self.search_table.currentIndex().row()
         irods_path = IrodsPath(self.session, self.search_table.item(row, 1).text())
-        if irods_path.collection_exists():
+        if self.search_table.item(row, 0).text() == "-C":
             self.browser.input_path.setText(str(irods_path))
             self.error_label.setText(f"Browser tab switched to {irods_path}")
         else:
@@ -258,16 +251,20 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
             self.error_label.setText(text)
             return
 
-        # get diff dictionary
-        single_ops = []
-        for ipath in irods_paths:
-            single_ops.append(download(self.session, ipath, folder, overwrite=True, dry_run=True))
-        ops = combine_operations(single_ops)
-
         self.error_label.setText(f"Downloading to {folder} ....")
         try:
+            # the thread plans the download while it transfers the first objects
             self.download_thread = TransferDataThread(
-                env_path, self.logger, ops, overwrite=overwrite
+                env_path,
+                self.logger,
+                None,
+                overwrite=overwrite,
+                planner=partial(
+                    iter_download_plan,
+                    irods_paths=[str(ipath) for ipath in irods_paths],
+                    local_path=folder,
+                    overwrite=True,
+                ),
             )
         except Exception as err:
             self.error_label.setText(
@@ -289,9 +286,7 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
         del self.download_thread
 
     def _download_status(self, state):
-        _, _, obj_count, num_objs, obj_failed = state
-        text = f"{obj_count} of {num_objs} files; failed: {obj_failed}."
-        self.error_label.setText(text)
+        self.error_label.setText(transfer_status_text(state))
 
     def _download_fetch_result(self, thread: dict):
         if thread["error"] == "":
@@ -301,7 +296,6 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
 
     def _start_search(self, search_path, path_pattern, meta_searches, checksum, case_sensitive):
-        self.search_button.setEnabled(False)
         # check if session comes from env file in ibridges config
         if is_session_from_config(self.session):
             env_path = Path(get_last_ienv_path())
@@ -309,6 +303,7 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
             text = "No search possible: The ibridges config changed during the session."
             text += " Please reset or restart the session."
             self.error_label.setText(text)
+            self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
             return
         self.error_label.setText("Searching ...")
         try:
@@ -322,27 +317,47 @@ class Search(PySide6.QtWidgets.QWidget, Ui_tabSearch):
                 case_sensitive,
             )
         except Exception:
+            self.search_thread = None
             self.error_label.setText(
                 "Could not instantiate a new session from{env_path}.Check configuration"
             )
+            self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
             return
+        self.search_thread.page.connect(self._fetch_page)
         self.search_thread.result.connect(self._fetch_results)
         self.search_thread.finished.connect(self._finish_search)
+        # the search can be stopped with the same button
+        self.search_button.setText("Stop search")
         self.search_thread.start()
 
     def _finish_search(self):
         self.search_button.setEnabled(True)
+        self.search_button.setText("Search")
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
-        del self.search_thread
+        self.search_thread.wait()
+        self.search_thread = None
+        self._update_load_more_button()
+
+    def _fetch_page(self, page: list):
+        """Show the first batch as soon as it arrived, keep the rest for 'Load next'."""
+        if len(self.results) == 0:
+            self.show_result_elements()
+            self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
+        self.results.extend(page)
+        if self.search_table.rowCount() < BATCH_SIZE:
+            self.load_results(batch_size=BATCH_SIZE - self.search_table.rowCount())
+        else:
+            self._update_load_more_button()
+        self.error_label.setText(f"Searching ... {len(self.results)} results found.")
 
     def _fetch_results(self, thread: dict):
         if "error" in thread:
             self.error_label.setText(thread["error"])
-        elif len(thread["results"]) == 0:
+        elif thread["cancelled"]:
+            self.error_label.setText(f"Search stopped after {len(self.results)} results.")
+        elif len(self.results) == 0:
             self.error_label.setText("No objects or collections found.")
         else:
-            self.show_result_elements()
-            self.results = thread["results"]
-            self.load_results()
+            self.error_label.setText(f"{len(self.results)} results found.")
 
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
@@ -0,0 +1,217 @@
+"""Process-wide pool of authenticated iRODS sessions for the background threads.
+
+Every QThread used to create and authenticate its own session and close it at the
+end. The pool hands out ("leases") already authenticated sessions instead, checks
+that sessions which were idle for a while still work, closes sessions that were
+not used for a long time and caps the number of open sessions per environment.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from ibridges import IrodsPath, Session
+
+from ibridgesgui.config import get_last_ienv_path
+
+DEFAULT_MAX_SESSIONS = 10
+# seconds after which an idle session is checked before it is handed out again
+HEALTH_CHECK_AFTER = 30
+# seconds after which an idle session is closed
+IDLE_TIMEOUT = 600
+# seconds a background thread waits for a free session when the pool is exhausted
+LEASE_TIMEOUT = 5
+
+
+class SessionPool:
+    """Lease pre-authenticated sessions created from one irods_environment.json."""
+
+    def __init__(
+        self,
+        ienv_path: Union[str, Path],
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        idle_timeout: float = IDLE_TIMEOUT,
+    ):
+        """Initialise an empty pool.
+
+        Parameters
+        ----------
+        ienv_path : str or Path
+            Path to the irods_environment.json the sessions are created from.
+        max_sessions : int
+            Maximum number of sessions, leased and idle, at the same time.
+        idle_timeout : float
+            Seconds after which an unused session is closed.
+
+        """
+        self.ienv_path = Path(ienv_path)
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._idle = []  # (session, time of release)
+        self._leased = set()
+        self._creating = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Total number of open sessions."""
+        with self._cond:
+            return len(self._idle) + len(self._leased) + self._creating
+
+    def lease(self, timeout: Optional[float] = None) -> Session:
+        """Hand out a working session, wait if max_sessions are leased.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum seconds to wait for a free session, by default wait forever.
+
+        Raises
+        ------
+        TimeoutError
+            If no session became available within timeout.
+        RuntimeError
+            If the pool has been closed.
+
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError(f"Session pool for {self.ienv_path} is closed.")
+                self._recycle_idle()
+                if self._idle:
+                    session, released = self._idle.pop()
+                    self._leased.add(id(session))
+                elif len(self._leased) + self._creating < self.max_sessions:
+                    session, released = None, None
+                    # reserve the slot while authenticating outside of the lock
+                    self._creating += 1
+                else:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No free iRODS session for {self.ienv_path}.")
+                    self._cond.wait(remaining)
+                    continue
+
+            if session is None:
+                try:
+                    session = Session(irods_env=self.ienv_path)
+                finally:
+                    with self._cond:
+                        self._creating -= 1
+                        if session is not None:
+                            self._leased.add(id(session))
+                        self._cond.notify()
+                return session
+
+            if time.monotonic() - released < HEALTH_CHECK_AFTER or _healthy(session):
+                return session
+            self.release(session, discard=True)
+
+    def release(self, session: Session, discard: bool = False):
+        """Return a leased session to the pool.
+
+        Parameters
+        ----------
+        session : Session
+            Session obtained by lease.
+        discard : bool
+            Close the session instead of keeping it, e.g. after a network error.
+
+        """
+        with self._cond:
+            self._leased.discard(id(session))
+            if not (discard or self._closed) and session.irods_session is not None:
+                self._idle.append((session, time.monotonic()))
+                session = None
+            self._cond.notify()
+        if session is not None:
+            _close(session)
+
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        """Lease a session for the duration of a with block."""
+        session = self.lease()
+        try:
+            yield session
+        except Exception:
+            self.release(session, discard=not _healthy(session))
+            raise
+        self.release(session)
+
+    def close(self):
+        """Close all idle sessions, leased sessions are closed when they are released."""
+        with self._cond:
+            idle = [session for session, _ in self._idle]
+            self._idle.clear()
+            self._closed = True
+            self._cond.notify_all()
+        for session in idle:
+            _close(session)
+
+    def _recycle_idle(self):
+        """Close sessions that were not used for idle_timeout seconds, lock must be held."""
+        now = time.monotonic()
+        expired = [(s, t) for s, t in self._idle if now - t > self.idle_timeout]
+        for item in expired:
+            self._idle.remove(item)
+            _close(item[0])
+
+
+def _healthy(session: Session) -> bool:
+    """Check with a cheap catalog query whether the session still works."""
+    if session.irods_session is None:
+        return False
+    try:
+        return IrodsPath(session, session.home).collection_exists()
+    except Exception:
+        return False
+
+
+def _close(session: Session):
+    try:
+        session.close()
+    except Exception:
+        pass
+
+
+_POOLS: dict = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_session_pool(ienv_path: Union[None, str, Path] = None) -> SessionPool:
+    """Retrieve the pool for an environment, by default the last used environment.
+
+    Parameters
+    ----------
+    ienv_path : str or Path, optional
+        Path to the irods_environment.json, defaults to get_last_ienv_path().
+
+    Raises
+    ------
+    ValueError
+        If no environment is given and none was used before.
+
+    """
+    if ienv_path is None:
+        ienv_path = get_last_ienv_path()
+        if ienv_path is None:
+            raise ValueError("No iRODS environment in use.")
+    key = str(Path.home().joinpath(".irods", ienv_path))
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = SessionPool(key)
+        return _POOLS[key]
+
+
+def close_session_pools():
+    """Close all pools, e.g. when the user disconnects."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,119 @@
+"""Profile the start of the GUI.
+
+With the environment variable IBRIDGES_GUI_PROFILE set to 1, the imports of the
+main thread are timed per module and the steps of the start, like creating the
+main window and the tabs, are timed with measure. The report is written to
+PROFILE_FILE once the main window is shown and again when the app exits.
+
+The entry point in __main__ calls start before its other imports, this module must
+only use the standard library. Importing the package does not change the import
+machinery.
+"""
+
+import atexit
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Union
+
+PROFILE_ENV = "IBRIDGES_GUI_PROFILE"
+PROFILE_FILE = Path("~", ".ibridges", "startup_profile.txt").expanduser()
+# imports that take less seconds are left out of the import tree
+MIN_IMPORT_TIME = 0.001
+# number of modules in the list of the slowest imports
+SLOWEST_IMPORTS = 25
+
+_started = time.perf_counter()
+_original_import = None  # pylint: disable=invalid-name
+# (depth, module, seconds including nested imports, seconds of the module itself),
+# in the order in which the imports started
+_imports = []
+# seconds spent in nested imports of each import in progress
+_nested = []
+# (step, seconds since the start, seconds the step took)
+_steps = []
+
+
+def start():
+    """Start profiling if the environment variable PROFILE_ENV is set."""
+    global _original_import  # pylint: disable=global-statement
+    if _original_import is not None or os.environ.get(PROFILE_ENV, "0") in ("", "0"):
+        return
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+    atexit.register(write_report)
+
+
+def enabled() -> bool:
+    """Whether the start is profiled."""
+    return _original_import is not None
+
+
+@contextmanager
+def measure(step: str):
+    """Time a step of the start, does nothing when profiling is off."""
+    if not enabled():
+        yield
+        return
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps.append((step, begin - _started, time.perf_counter() - begin))
+
+
+def mark(step: str):
+    """Record the time since the start at which a step is reached."""
+    if enabled():
+        _steps.append((step, time.perf_counter() - _started, 0.0))
+
+
+def write_report(path: Union[str, Path] = PROFILE_FILE):
+    """Write the timings recorded so far."""
+    if not enabled():
+        return
+    lines = [f"iBridges-GUI startup profile, {time.strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    lines.append(" start ms   took ms  step")
+    lines.extend(
+        f"{offset * 1000:9.1f} {seconds * 1000:9.1f}  {step}" for step, offset, seconds in _steps
+    )
+    finished = [entry for entry in _imports if entry is not None]
+    slowest = sorted(finished, key=lambda entry: entry[3], reverse=True)[:SLOWEST_IMPORTS]
+    lines += ["", f"Slowest imports (ms of the module itself, of {len(finished)} modules)"]
+    lines.extend(f"{self_time * 1000:8.1f}  {module}" for _, module, _, self_time in slowest)
+    lines += ["", "Import tree (ms including nested imports)"]
+    lines.extend(
+        f"{total * 1000:8.1f}  {'  ' * depth}{module}"
+        for depth, module, total, _ in finished
+        if total >= MIN_IMPORT_TIME
+    )
+    path = Path(path)
+    path.parent.mkdir(parents=True, mode=0o700, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+# pylint: disable-next=redefined-builtin
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """Time the first absolute import of a module in the main thread."""
+    if (
+        level != 0
+        or name in sys.modules
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        return _original_import(name, globals, locals, fromlist, level)
+    idx = len(_imports)
+    _imports.append(None)
+    _nested.append(0.0)
+    begin = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        total = time.perf_counter() - begin
+        nested = _nested.pop()
+        if _nested:
+            _nested[-1] += total
+        _imports[idx] = (len(_nested), name, total, total - nested)
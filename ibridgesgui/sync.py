@@ -1,19 +1,26 @@
 """Sync tab."""
 
 import logging
-import sys
 from pathlib import Path
 
 import PySide6.QtCore
 import PySide6.QtGui
 from ibridges import IrodsPath
 
-from ibridgesgui.config import get_last_ienv_path
-from ibridgesgui.gui_utils import UI_FILE_DIR, load_ui, populate_table, prep_session_for_copy
+from ibridgesgui.config import get_last_ienv_path, is_session_from_config
+from ibridgesgui.gui_utils import (
+    diff_totals_text,
+    prep_session_for_copy,
+    setup_ui,
+    transfer_percentage,
+    transfer_status_text,
+)
 from ibridgesgui.irods_tree_model import IrodsTreeModel
 from ibridgesgui.popup_widgets import CreateCollection, CreateDirectory
-from ibridgesgui.threads import SyncThread, TransferDataThread
+from ibridgesgui.table_models import DiffTableModel
+from ibridgesgui.threads import CatalogTaskThread, SyncThread, TransferDataThread
 from ibridgesgui.ui_files.tabSync import Ui_tabSync
+from ibridgesgui.watch import WatchSync
 
 
 class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
@@ -31,10 +38,7 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
 
         """
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "tabSync.ui", self)
+        setup_ui(self, "tabSync")
 
         self.logger = logging.getLogger(app_name)
         self.session = session
@@ -45,6 +49,9 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
         self.sync_source = ""  # irods or local
         self.refresh_irods_index = None
         self.diffs = None  # output of dry_run
+        self.diff_snapshot = None  # stat results of the local sources of diffs
+        self.sync_pair = None  # (local folder, collection) of the diffs
+        self.root_thread = None
 
         # widget memeber and their functionlity
         self.local_to_irods_button.setToolTip("Local to iRODS")
@@ -55,12 +62,26 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
         self.create_dir_button.clicked.connect(self.create_dir)
         self.sync_button.hide()
         self.sync_button.clicked.connect(self._start_data_sync)
+        self.watch_button.setToolTip("Upload changes of the local folder continuously")
+        self.watch_button.clicked.connect(self.watch)
+        self.checksum_box.setToolTip(
+            "Compare all files of equal size by checksum, also those that did not change"
+        )
+        # open watch windows, closed ones are kept until their upload finished
+        self.watch_windows = []
         self._init_local_fs_tree()
         self._init_irods_tree()
 
+        # the diff is shown from the operations of the dry-run, rows are loaded on scrolling
+        self.diff_model = DiffTableModel(self.diff_table)
+        self.diff_table.setModel(self.diff_model)
+        self.direction_box.currentIndexChanged.connect(self._filter_diffs)
+
         # Set minimum width for diff_table columns
         header = self.diff_table.horizontalHeader()
         header.setMinimumSectionSize(150)  # Adjust the value as needed
+        # start in the order of the dry-run, clicking a column header sorts by it
+        header.setSortIndicator(-1, PySide6.QtCore.Qt.SortOrder.AscendingOrder)
 
     def _init_local_fs_tree(self):
         """Create local FS tree."""
@@ -78,25 +99,53 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
         self.local_fs_tree.setColumnHidden(3, True)
 
     def _init_irods_tree(self):
-        root = self.irods_root()
-        self.irods_model = IrodsTreeModel(self.irods_tree, root)
+        # collections are listed in the background with sessions from the session pool
+        self.ienv_path = None
+        if is_session_from_config(self.session):
+            self.ienv_path = Path(get_last_ienv_path())
+        self.irods_model = None
+        # finding the root takes a query per parent, the tree is filled once it is known
+        home = str(IrodsPath(self.session).absolute())
+        if self.ienv_path is None:
+            root = _irods_root(self.session, home)
+            self._set_irods_root({"error": "", "args": (home,), "result": root})
+            return
+        try:
+            self.root_thread = CatalogTaskThread(self.ienv_path, self.logger, _irods_root, home)
+        except Exception as err:
+            self._set_irods_root({"error": repr(err), "args": (home,)})
+            return
+        self.root_thread.result.connect(self._set_irods_root)
+        self.root_thread.finished.connect(self._finish_root_thread)
+        self.root_thread.start()
+
+    def _set_irods_root(self, task_out: dict):
+        if task_out["error"] != "":
+            self.logger.error("Cannot determine the iRODS root: %s", task_out["error"])
+            self.error_label.setText(
+                f"Cannot determine the iRODS root, showing the home collection: "
+                f"{task_out['error']}"
+            )
+            root = task_out["args"][0]
+        else:
+            root = task_out["result"]
+        self.irods_model = IrodsTreeModel(
+            self.irods_tree, IrodsPath(self.session, root), self.logger, self.ienv_path
+        )
         self.irods_tree.setModel(self.irods_model)
-        self.irods_tree.expanded.connect(self.irods_model.refresh_subtree)
+        # children are loaded by the model when the view expands a collection
+        self.irods_tree.collapsed.connect(self.irods_model.collapse_subtree)
         self.irods_model.init_tree()
 
-        # hide unnecessary information
-        self.irods_tree.setColumnHidden(1, True)
-        self.irods_tree.setColumnHidden(2, True)
-        self.irods_tree.setColumnHidden(3, True)
-        self.irods_tree.setColumnHidden(4, True)
-        self.irods_tree.setColumnHidden(5, True)
+    def _finish_root_thread(self):
+        self.root_thread.wait()
+        self.root_thread = None
 
     def irods_root(self):
         """Retrieve lowest visible level in the iRODS tree for the user."""
-        lowest = IrodsPath(self.session).absolute()
-        while lowest.parent.exists() and str(lowest) != "/":
-            lowest = lowest.parent
-        return lowest
+        return IrodsPath(
+            self.session, _irods_root(self.session, str(IrodsPath(self.session).absolute()))
+        )
 
     def create_collection(self):
         """Create a new collection in current collection."""
@@ -163,9 +212,31 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
         self.sync_source = "irods"
         self.sync_diff()
 
+    def watch(self):
+        """Watch the selected folder and upload its changes into the selected collection."""
+        paths = self._gather_info_for_transfer()
+        if paths is None:
+            return
+        local_path, irods_path, _, _ = paths
+        env_path = prep_session_for_copy(self.session, self.error_label)
+        if env_path is None:
+            return
+        self.watch_windows = [
+            window
+            for window in self.watch_windows
+            if window.isVisible() or window.transfer_thread is not None
+        ]
+        try:
+            window = WatchSync(env_path, self.logger, local_path, irods_path)
+        except Exception as error:
+            self.error_label.setText(f"Cannot watch {local_path}: {repr(error)}")
+            return
+        self.watch_windows.append(window)
+        window.show()
+
     def _gather_info_for_transfer(self):
         self.error_label.clear()
-        self.diff_table.setRowCount(0)
+        self._clear_diffs()
         # Retrieve local fs path
         fs_selection = self.local_fs_tree.selectedIndexes()
         if len(fs_selection) == 0:
@@ -207,7 +278,12 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
             return
         try:
             self.sync_data_thread = TransferDataThread(
-                env_path, self.logger, self.diffs, overwrite=True
+                env_path,
+                self.logger,
+                self.diffs,
+                overwrite=True,
+                snapshot=self.diff_snapshot,
+                sync_pair=self.sync_pair,
             )
         except Exception as err:
             self.error_label.setText(f"Could not instantiate a new session from{env_path}: {err}")
@@ -221,7 +297,7 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
     def _start_sync_diff(self, source, target):
         self.sync_button.hide()
         self.error_label.clear()
-        self.diff_table.setRowCount(0)
+        self._clear_diffs()
         self._enable_buttons(False)
         self.progress_bar.setValue(0)
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.WaitCursor))
@@ -233,13 +309,21 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
         if env_path is None:
             return
         try:
-            self.sync_diff_thread = SyncThread(env_path, self.logger, source, target, dry_run=True)
+            self.sync_diff_thread = SyncThread(
+                env_path,
+                self.logger,
+                source,
+                target,
+                dry_run=True,
+                checksums=self.checksum_box.isChecked(),
+            )
         except Exception:
             self.error_label.setText(
                 f"Could not instantiate a new session from {env_path}. Check configuration."
             )
 
             return
+        self.sync_pair = self.sync_diff_thread.pair
         self.sync_diff_thread.result.connect(self._sync_diff_end)
         self.sync_diff_thread.finished.connect(self._finish_sync_diff)
         self.sync_diff_thread.start()
@@ -270,11 +354,8 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
         self.error_label.setText("Data synchronisation complete.")
 
     def _sync_data_status(self, state):
-        up_size, transferred_size, obj_count, num_objs, obj_failed = state
-        if up_size > 0:
-            self.progress_bar.setValue(int(transferred_size * 100 / up_size))
-        text = f"{obj_count} of {num_objs} files; failed: {obj_failed}."
-        self.error_label.setText(text)
+        self.progress_bar.setValue(transfer_percentage(state))
+        self.error_label.setText(transfer_status_text(state))
 
     def _sync_diff_end(self, thread_output: dict):
         if thread_output["error"] != "":
@@ -285,16 +366,35 @@ class Sync(PySide6.QtWidgets.QWidget, Ui_tabSync):
 
         self.error_label.clear()
 
-        table_data = [
-            (source, dest, source.size if isinstance(source, IrodsPath) else source.stat().st_size)
-            for source, dest in thread_output["result"].upload + thread_output["result"].download
-        ]
-        populate_table(self.diff_table, len(table_data), table_data)
-        if len(table_data) == 0:
+        self.diff_model.set_operations(thread_output["result"], thread_output["snapshot"])
+        self.diff_table.resizeColumnsToContents()
+        self._show_diff_totals()
+        if self.diff_model.totals(DiffTableModel.ALL)[0] == 0:
             self.error_label.setText("Data is already synchronised.")
             self.sync_source = ""
             self.refresh_irods_index = None
         else:
             self.diffs = thread_output["result"]
+            self.diff_snapshot = thread_output["snapshot"]
             self.sync_button.show()
         self.setCursor(PySide6.QtGui.QCursor(PySide6.QtCore.Qt.CursorShape.ArrowCursor))
+
+    def _clear_diffs(self):
+        self.diff_model.clear()
+        self.totals_label.clear()
+
+    def _filter_diffs(self, direction: int):
+        self.diff_model.set_direction(direction)
+        self._show_diff_totals()
+
+    def _show_diff_totals(self):
+        count, num_bytes = self.diff_model.totals()
+        self.totals_label.setText(diff_totals_text(count, num_bytes))
+
+
+def _irods_root(session, irods_path: str) -> str:
+    """Return the lowest collection above irods_path the user can see, a catalog task."""
+    lowest = IrodsPath(session, irods_path)
+    while lowest.parent.exists() and str(lowest) != "/":
+        lowest = lowest.parent
+    return str(lowest)
@@ -0,0 +1,271 @@
+"""State of synchronised folders and collections.
+
+A sync diff has to decide for every file that exists on both sides whether it
+differs from its data object. When the sizes are equal that takes a checksum of
+the local file, i.e. reading all of its bytes. After a successful sync the size,
+modification time and inode of each local file and the size, modify time and
+checksum of its data object are stored in a SQLite database under CONFIG_DIR, per
+(local folder, iRODS collection) pair. The next diff only compares the entries of
+which the local or the remote side changed since then.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from ibridges import IrodsPath, Session
+
+from ibridgesgui.catalog import list_collection
+from ibridgesgui.config import CONFIG_DIR, ensure_log_config_location
+from ibridgesgui.file_snapshot import FileSnapshot
+from ibridgesgui.transfer_journal import UPLOAD
+
+SYNC_STATE_FILE = CONFIG_DIR.joinpath("sync_state.sqlite")
+# recorded entries are committed in batches
+COMMIT_EVERY = 1000
+COMMIT_INTERVAL = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pairs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ienv_path TEXT NOT NULL,
+    local_path TEXT NOT NULL,
+    irods_path TEXT NOT NULL,
+    UNIQUE (ienv_path, local_path, irods_path)
+);
+CREATE TABLE IF NOT EXISTS entries (
+    pair_id INTEGER NOT NULL REFERENCES pairs(id) ON DELETE CASCADE,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    local_size INTEGER NOT NULL,
+    local_mtime_ns INTEGER NOT NULL,
+    local_inode INTEGER NOT NULL,
+    remote_size INTEGER NOT NULL,
+    remote_modified REAL NOT NULL,
+    checksum TEXT NOT NULL,
+    PRIMARY KEY (pair_id, folder, name)
+);
+"""
+
+
+class SyncState:
+    """Thread-safe access to the recorded state of one synchronised pair.
+
+    Entries are addressed by the folder relative to the synchronised root in posix
+    notation ("" for the root itself) and the file name.
+    """
+
+    def __init__(
+        self,
+        ienv_path: Union[str, Path],
+        local_path: Union[str, Path],
+        irods_path: Union[str, IrodsPath],
+        path: Union[str, Path] = SYNC_STATE_FILE,
+    ):
+        """Open or create the state of a pair.
+
+        Parameters
+        ----------
+        ienv_path : str or Path
+            Environment of the iRODS server.
+        local_path : str or Path
+            Synchronised local folder.
+        irods_path : str or IrodsPath
+            Synchronised collection.
+        path : str or Path
+            Location of the SQLite database.
+
+        """
+        ensure_log_config_location()
+        self.local_path = Path(local_path).absolute()
+        self.irods_path = str(irods_path)
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        key = (str(ienv_path), str(self.local_path), self.irods_path)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pairs (ienv_path, local_path, irods_path) VALUES (?, ?, ?)",
+                key,
+            )
+            self.pair_id = self._conn.execute(
+                "SELECT id FROM pairs WHERE ienv_path = ? AND local_path = ? AND irods_path = ?",
+                key,
+            ).fetchone()[0]
+
+    def close(self):
+        """Commit outstanding changes and close the database."""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def folder(self, folder: str) -> dict:
+        """Return the recorded entries of a folder by name.
+
+        The values are tuples of (local size, local mtime in ns, local inode, remote
+        size, remote modify time, checksum), see unchanged.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, local_size, local_mtime_ns, local_inode, remote_size, "
+                "remote_modified, checksum FROM entries WHERE pair_id = ? AND folder = ?",
+                (self.pair_id, folder),
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    @staticmethod
+    def unchanged(
+        recorded: Optional[tuple],
+        stat_result: os.stat_result,
+        remote_size: int,
+        remote_modified: float,
+        remote_checksum: str,
+    ) -> bool:
+        """Whether neither side of an entry changed since it was recorded as in sync."""
+        return recorded is not None and recorded == (
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stat_result.st_ino,
+            remote_size,
+            remote_modified,
+            remote_checksum or "",
+        )
+
+    def record(
+        self,
+        folder: str,
+        name: str,
+        stat_result: os.stat_result,
+        remote_size: int,
+        remote_modified: float,
+        checksum: str,
+    ):
+        """Record an entry of which both sides are equal, committed in batches."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (pair_id, folder, name, local_size, "
+                "local_mtime_ns, local_inode, remote_size, remote_modified, checksum) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.pair_id,
+                    folder,
+                    name,
+                    stat_result.st_size,
+                    stat_result.st_mtime_ns,
+                    stat_result.st_ino,
+                    remote_size,
+                    remote_modified,
+                    checksum or "",
+                ),
+            )
+            self._uncommitted += 1
+            if (
+                self._uncommitted >= COMMIT_EVERY
+                or time.monotonic() - self._last_commit > COMMIT_INTERVAL
+            ):
+                self._commit()
+
+    def prune(self, folder: str, names: Iterable[str]):
+        """Forget entries of a folder, e.g. of files that no longer exist."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM entries WHERE pair_id = ? AND folder = ? AND name = ?",
+                [(self.pair_id, folder, name) for name in names],
+            )
+
+    def relative_folder(self, local_folder: Union[str, Path]) -> str:
+        """Return the key of a local folder of the pair, see folder."""
+        folder = Path(local_folder).absolute().relative_to(self.local_path).as_posix()
+        return "" if folder == "." else folder
+
+    def _commit(self):
+        """Commit, the lock must be held."""
+        self._conn.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+
+def record_transferred(
+    session: Session, state: SyncState, transferred: Iterable[tuple], snapshot: FileSnapshot
+):
+    """Record the state of transferred files after a sync.
+
+    Each collection is listed with one catalog query, so the new modify times of the
+    data objects are known. An upload is recorded with the stat result of the planner
+    in snapshot, a download with the planned stamps of its data object. Files that
+    changed while they were transferred are not recorded, the next diff compares them.
+
+    Parameters
+    ----------
+    session : Session
+        Session to list the collections with.
+    state : SyncState
+        State of the synchronised pair.
+    transferred : Iterable
+        (direction, source, destination) of each successful upload and download.
+    snapshot : FileSnapshot
+        Snapshot of the plan of the sync.
+
+    """
+    # (local folder, collection): {name: direction}
+    directions = defaultdict(dict)
+    for direction, source, dest in transferred:
+        local_path, irods_path = (source, dest) if direction == UPLOAD else (dest, source)
+        local_path = Path(local_path)
+        directions[(str(local_path.parent), str(IrodsPath(session, irods_path).parent))][
+            local_path.name
+        ] = direction
+    for (local_folder, irods_coll), names in directions.items():
+        listing = list_collection(session, irods_coll)
+        folder = state.relative_folder(local_folder)
+        for idx, name in enumerate(listing.names):
+            if name not in names or listing.is_collection(idx):
+                continue
+            local_path = Path(local_folder, name)
+            stamps = (listing.sizes[idx], listing.modified[idx], listing.checksums[idx])
+            try:
+                stat_result = os.stat(local_path, follow_symlinks=False)
+            except OSError:
+                continue
+            if names[name] == UPLOAD:
+                planned = _planned_upload(snapshot, local_path, stat_result, stamps[0])
+            else:
+                planned = _planned_download(snapshot, local_path, stat_result, stamps)
+            if planned:
+                state.record(folder, name, stat_result, *stamps)
+
+
+def _planned_upload(
+    snapshot: FileSnapshot, local_path: Path, stat_result: os.stat_result, remote_size: int
+) -> bool:
+    """Whether an uploaded file and its data object are still those of the plan."""
+    if local_path not in snapshot:
+        return False
+    row = snapshot.row(local_path)
+    return (
+        snapshot.sizes[row] == stat_result.st_size == remote_size
+        and snapshot.mtimes_ns[row] == stat_result.st_mtime_ns
+        and snapshot.inodes[row] == stat_result.st_ino
+    )
+
+
+def _planned_download(
+    snapshot: FileSnapshot, local_path: Path, stat_result: os.stat_result, stamps: tuple
+) -> bool:
+    """Whether a downloaded file and its data object are still those of the plan.
+
+    The checksum is not compared, iRODS may have registered one after the plan.
+    """
+    planned = snapshot.remote(local_path)
+    return (
+        planned is not None
+        and planned[0] == stamps[0] == stat_result.st_size
+        and planned[1] == stamps[1]
+    )
@@ -0,0 +1,274 @@
+"""Table models for large tables.
+
+A QTableWidget needs one QTableWidgetItem per cell. The models below keep the
+data in columnar structures and only hand out the cells the view asks for. Rows
+are exposed in chunks through canFetchMore/fetchMore, so the view only lays out
+what is scrolled into view.
+"""
+# ruff: noqa: N802 # Overriding a pyside6 function that is not snake_case
+# pylint: disable=C0103
+
+from array import array
+from typing import Optional
+
+import PySide6.QtCore
+from ibridges.executor import Operations
+
+from ibridgesgui.catalog import CollectionListing
+from ibridgesgui.file_snapshot import FileSnapshot
+
+FETCH_SIZE = 500
+
+
+class BrowserTableModel(PySide6.QtCore.QAbstractTableModel):
+    """Model for the Browser table backed by a CollectionListing."""
+
+    HEADERS = ("Status", "Name", "Size [bytes]", "Checksum/Fingerprint", "Created", "Modified")
+
+    def __init__(self, parent=None):
+        """Initialise an empty model."""
+        super().__init__(parent)
+        self._listing = CollectionListing("")
+        self._loaded = 0
+        # True while pages of the listing are still arriving
+        self._streaming = False
+        # the view asked for more rows than had arrived
+        self._fetch_pending = False
+
+    def rowCount(self, parent=PySide6.QtCore.QModelIndex()) -> int:
+        """Return the number of rows handed to the view so far."""
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=PySide6.QtCore.QModelIndex()) -> int:
+        """Return the number of columns."""
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index, role=PySide6.QtCore.Qt.ItemDataRole.DisplayRole):
+        """Return the display string of a cell."""
+        if not index.isValid() or role != PySide6.QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        return self._listing.cell(index.row(), index.column())
+
+    def headerData(
+        self, section, orientation, role=PySide6.QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        """Return the column names."""
+        if role != PySide6.QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == PySide6.QtCore.Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=PySide6.QtCore.QModelIndex()) -> bool:
+        """Whether the listing has rows that are not shown yet."""
+        if parent.isValid():
+            return False
+        return self._streaming or self._loaded < len(self._listing)
+
+    def fetchMore(self, parent=PySide6.QtCore.QModelIndex()):
+        """Hand the next chunk of rows to the view."""
+        if parent.isValid():
+            return
+        remaining = len(self._listing) - self._loaded
+        if remaining <= 0:
+            self._fetch_pending = self._streaming
+            return
+        self._fetch_pending = False
+        chunk = min(FETCH_SIZE, remaining)
+        self.beginInsertRows(PySide6.QtCore.QModelIndex(), self._loaded, self._loaded + chunk - 1)
+        self._loaded += chunk
+        self.endInsertRows()
+
+    def set_listing(self, listing: CollectionListing):
+        """Replace the content of the table with a new listing."""
+        self.beginResetModel()
+        self._listing = listing
+        self._loaded = min(FETCH_SIZE, len(listing))
+        self._streaming = False
+        self._fetch_pending = False
+        self.endResetModel()
+
+    def clear(self):
+        """Remove all rows."""
+        self.set_listing(CollectionListing(""))
+
+    def begin_listing(self, path: str):
+        """Empty the table, the rows of path will arrive through append_listing."""
+        self.set_listing(CollectionListing(path))
+        self._streaming = True
+
+    def append_listing(self, page: CollectionListing):
+        """Add a page of a streamed listing, show it if the view is waiting for rows."""
+        self._listing.extend(page)
+        if self._loaded < FETCH_SIZE or self._fetch_pending:
+            self.fetchMore()
+
+    def end_listing(self):
+        """Mark the streamed listing as complete."""
+        self._streaming = False
+        self._fetch_pending = False
+
+    @property
+    def listing(self) -> CollectionListing:
+        """The listing behind the model."""
+        return self._listing
+
+    def item_name(self, row: int) -> str:
+        """Return the name of the collection or data object in row."""
+        return self._listing.names[row]
+
+
+class DiffTableModel(PySide6.QtCore.QAbstractTableModel):
+    """Model for the sync diff table backed by the Operations of a dry-run.
+
+    The rows are the uploads followed by the downloads of the operations. The model
+    only keeps the sizes and the order of the shown rows as integer arrays, the
+    paths are read from the operations when the view asks for a cell.
+    """
+
+    HEADERS = ("Source", "Destination", "Size in Bytes")
+    # direction filters, in the order of the items of the direction box
+    ALL, UPLOADS, DOWNLOADS = range(3)
+
+    def __init__(self, parent=None):
+        """Initialise an empty model."""
+        super().__init__(parent)
+        self._ops = Operations()
+        self._sizes = array("q")
+        # indexes of the shown rows in their sort order
+        self._rows = array("q")
+        self._loaded = 0
+        self._direction = self.ALL
+        # column and order of the last sort, None keeps the order of the operations
+        self._sort = None
+
+    def rowCount(self, parent=PySide6.QtCore.QModelIndex()) -> int:
+        """Return the number of rows handed to the view so far."""
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=PySide6.QtCore.QModelIndex()) -> int:
+        """Return the number of columns."""
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index, role=PySide6.QtCore.Qt.ItemDataRole.DisplayRole):
+        """Return the display string of a cell."""
+        if not index.isValid() or role != PySide6.QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        idx = self._rows[index.row()]
+        if index.column() == 2:
+            return str(self._sizes[idx])
+        return str(self._transfer(idx)[index.column()])
+
+    def headerData(
+        self, section, orientation, role=PySide6.QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        """Return the column names."""
+        if role != PySide6.QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == PySide6.QtCore.Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=PySide6.QtCore.QModelIndex()) -> bool:
+        """Whether there are rows that are not shown yet."""
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._rows)
+
+    def fetchMore(self, parent=PySide6.QtCore.QModelIndex()):
+        """Hand the next chunk of rows to the view."""
+        if parent.isValid():
+            return
+        chunk = min(FETCH_SIZE, len(self._rows) - self._loaded)
+        if chunk <= 0:
+            return
+        self.beginInsertRows(PySide6.QtCore.QModelIndex(), self._loaded, self._loaded + chunk - 1)
+        self._loaded += chunk
+        self.endInsertRows()
+
+    def sort(self, column: int, order=PySide6.QtCore.Qt.SortOrder.AscendingOrder):
+        """Sort the rows by path or size, a negative column restores the original order."""
+        self._sort = (column, order) if column >= 0 else None
+        self.layoutAboutToBeChanged.emit()
+        self._rows = self._ordered_rows()
+        self.layoutChanged.emit()
+
+    def set_operations(self, ops: Operations, snapshot: FileSnapshot):
+        """Show the uploads and downloads of ops.
+
+        Parameters
+        ----------
+        ops : Operations
+            The operations of the dry-run.
+        snapshot : FileSnapshot
+            Stat results of the local sources of the uploads.
+
+        """
+        self.beginResetModel()
+        self._ops = ops
+        self._sizes = array("q", (snapshot.size(lpath) for lpath, _ in ops.upload))
+        self._sizes.extend(ipath.size for ipath, _ in ops.download)
+        self._rows = self._ordered_rows()
+        self._loaded = min(FETCH_SIZE, len(self._rows))
+        self.endResetModel()
+
+    def set_direction(self, direction: int):
+        """Only show the uploads, the downloads or all rows, see ALL, UPLOADS and DOWNLOADS."""
+        self.beginResetModel()
+        self._direction = direction
+        self._rows = self._ordered_rows()
+        self._loaded = min(FETCH_SIZE, len(self._rows))
+        self.endResetModel()
+
+    def clear(self):
+        """Remove all rows."""
+        self.set_operations(Operations(), FileSnapshot())
+
+    def totals(self, direction: Optional[int] = None) -> tuple[int, int]:
+        """Return the number of transfers and their bytes, of the shown direction by default."""
+        direction = self._direction if direction is None else direction
+        num_uploads = len(self._ops.upload)
+        if direction == self.UPLOADS:
+            sizes = self._sizes[:num_uploads]
+        elif direction == self.DOWNLOADS:
+            sizes = self._sizes[num_uploads:]
+        else:
+            sizes = self._sizes
+        return len(sizes), sum(sizes)
+
+    def _transfer(self, idx: int) -> tuple:
+        """Return the (source, destination) of a row index."""
+        num_uploads = len(self._ops.upload)
+        if idx < num_uploads:
+            return self._ops.upload[idx]
+        return self._ops.download[idx - num_uploads]
+
+    def _ordered_rows(self) -> array:
+        """Return the indexes of the rows of the direction in the order of the last sort."""
+        num_uploads = len(self._ops.upload)
+        if self._direction == self.UPLOADS:
+            rows = range(num_uploads)
+        elif self._direction == self.DOWNLOADS:
+            rows = range(num_uploads, len(self._sizes))
+        else:
+            rows = range(len(self._sizes))
+        if self._sort is None:
+            return array("q", rows)
+        column, order = self._sort
+        if column == 2:
+            key = self._sizes.__getitem__
+        else:
+            def key(idx):
+                return str(self._transfer(idx)[column])
+        return array(
+            "q",
+            sorted(rows, key=key, reverse=order == PySide6.QtCore.Qt.SortOrder.DescendingOrder),
+        )
@@ -1,16 +1,50 @@
 """Thread classes for length iBridges functions."""
 
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
 
 import PySide6.QtCore
-from ibridges import IrodsPath, Session, search_data, sync
-from ibridges.executor import Operations, _obj_get, _obj_put
+from ibridges import IrodsPath, Session, sync
+from ibridges.executor import Operations
 from irods.exception import CAT_NO_ACCESS_PERMISSION, NetworkException
 
+from ibridgesgui.catalog import (
+    LISTING_CACHE,
+    CollectionListing,
+    iter_collection_listing,
+    iter_search,
+)
+from ibridgesgui.checksums import ChecksumCache, LocalChecksums
+from ibridgesgui.config import get_bundle_extract, get_transfer_workers
+from ibridgesgui.file_snapshot import FileSnapshot
+from ibridgesgui.gui_utils import combine_operations
+from ibridgesgui.planner import iter_sync_plan
+from ibridgesgui.session_pool import LEASE_TIMEOUT, get_session_pool
+from ibridgesgui.sync_state import SyncState, record_transferred
+from ibridgesgui.transfer_engine import TransferEngine
+from ibridgesgui.transfer_journal import TransferJournal
+
+
+def _lease_session(ienv_path: Path, logger, thread: str) -> tuple[Optional[Session], str]:
+    """Lease a session from the pool inside a thread, return it and an error message."""
+    try:
+        session = get_session_pool(ienv_path).lease(timeout=LEASE_TIMEOUT)
+    except Exception as error:
+        logger.error("%s: Cannot lease a session: %s", thread, repr(error))
+        return None, f"No free iRODS session, please try again later: {repr(error)}"
+    logger.debug("%s: Leased session from pool.", thread)
+    return session, ""
+
 
 class SearchThread(PySide6.QtCore.QThread):
-    """Start iRODS search in an own thread using the same iRODS session."""
+    """Start iRODS search in an own thread with a session from the session pool.
 
+    The found items are emitted in pages of display rows (type, path, size, checksum,
+    created, modified) as the catalog returns them, call requestInterruption to stop
+    the search after the current page.
+    """
+
+    page = PySide6.QtCore.Signal(list)
     result = PySide6.QtCore.Signal(dict)
 
     def __init__(
@@ -27,8 +61,8 @@ class SearchThread(PySide6.QtCore.QThread):
         super().__init__()
 
         self.logger = logger
-        self.thread_session = Session(irods_env=ienv_path)
-        self.logger.debug("Search thread: created new session")
+        self.ienv_path = ienv_path
+        self.thread_session = None
         self.sync_thread = None
         self.search_path = search_path
         self.path_pattern = path_pattern
@@ -36,31 +70,42 @@ class SearchThread(PySide6.QtCore.QThread):
         self.case_sensitive = case_sensitive
         self.ms = meta_searches
 
-    def _delete_session(self):
-        self.thread_session.close()
-        if self.thread_session.irods_session is None:
-            self.logger.debug("Search thread: Thread session successfully deleted.")
-        else:
-            self.logger.debug("Search thread: Thread session still exists.")
+    def _release_session(self, discard: bool = False):
+        get_session_pool(self.ienv_path).release(self.thread_session, discard=discard)
+        self.logger.debug("Search thread: Thread session returned to pool.")
 
     def run(self):
         """Run the thread."""
-        search_out = {}
+        search_out = {"count": 0, "cancelled": False}
+        self.thread_session, error = _lease_session(self.ienv_path, self.logger, "Search thread")
+        if self.thread_session is None:
+            search_out["error"] = error
+            self.result.emit(search_out)
+            return
         try:
-            res = search_data(
+            pages = iter_search(
                 self.thread_session,
-                path=self.search_path,
+                self.search_path,
                 path_pattern=self.path_pattern,
                 checksum=self.checksum,
-                metadata=self.ms,
+                meta_searches=self.ms,
                 case_sensitive=self.case_sensitive,
             )
-            # convert IrodsPaths to strings, the session  will be destroyed at the end of the thread
-            search_out["results"] = [str(ipath) for ipath in res]
-            self._delete_session()
+            for page in pages:
+                if self.isInterruptionRequested():
+                    search_out["cancelled"] = True
+                    break
+                if page:
+                    search_out["count"] += len(page)
+                    self.page.emit(page)
+            self._release_session()
         except NetworkException:
-            self._delete_session()
+            self._release_session(discard=True)
             search_out["error"] = "Search takes too long. Please provide more parameters."
+        except Exception as error:
+            self._release_session()
+            self.logger.exception("Search thread: Search failed.")
+            search_out["error"] = f"Search failed: {repr(error)}"
         self.result.emit(search_out)
 
 
@@ -68,123 +113,185 @@ class TransferDataThread(PySide6.QtCore.QThread):
     """Transfer data between local and iRODS."""
 
     result = PySide6.QtCore.Signal(dict)
+    # progress list of transfer_engine.TransferProgress
     current_progress = PySide6.QtCore.Signal(list)
 
-    def __init__(self, ienv_path: Path, logger, ops: Operations, overwrite: bool):
+    def __init__(
+        self,
+        ienv_path: Path,
+        logger,
+        ops: Optional[Operations],
+        overwrite: bool,
+        transfer_id: Optional[int] = None,
+        bundle_threshold: int = 0,
+        planner: Optional[Callable[..., Iterable[Operations]]] = None,
+        snapshot: Optional[FileSnapshot] = None,
+        sync_pair: Optional[tuple] = None,
+    ):
         """Pass parameters.
 
         ienv_path : Path
-            path to the irods_environment.json to create a new session.
+            path to the irods_environment.json, selects the session pool.
         logger : logging.Logger
             Logger
         ops : ibridges.Opertions
             Defines the data and metadata operations to perform. This thread currently uses:
             create_dir, create_collection, upload, download and execute_meta_download
             Please refer to the iBridges documentation: https://ibridges.readthedocs.io/
+            None when the operations come from a planner.
+        overwrite : bool
+            Overwrite existing data.
+        transfer_id : int, optional
+            Id of an interrupted transfer in the transfer journal to resume, ops then
+            holds its remaining operations.
+        bundle_threshold : int
+            Upload files smaller than this many bytes in tar bundles, 0 disables bundling.
+            "bundle_extract" in the ibridges_gui.json selects whether the bundles are
+            extracted on the server.
+        planner : Callable, optional
+            Called with the session of the thread and snapshot=, yields the operations in
+            chunks while it walks the data, see planner.py. The transfers of the first
+            chunks run while the planner continues.
+        snapshot : FileSnapshot, optional
+            Stat results of the local files, e.g. from the sync dry-run.
+        sync_pair : tuple, optional
+            (local folder, collection) when the transfer executes a sync diff, the
+            transferred files are recorded in the SyncState of the pair.
+
+        Uploads and downloads run on a pool of worker sessions, the number of parallel
+        transfers is configured by "transfer_workers" in the ibridges_gui.json.
+        The transfer is recorded in the transfer journal until it completed.
         """
         super().__init__()
 
         self.logger = logger
-        self.thread_session = Session(irods_env=ienv_path)
-        self.logger.debug("Transfer data thread: Created new session.")
-        self.ops = ops
+        self.ienv_path = ienv_path
+        self.thread_session = None
+        # with a planner, ops collects the metadata downloads of the chunks
+        self.ops = ops if ops is not None else Operations()
         self.overwrite = overwrite
+        self.transfer_id = transfer_id
+        self.bundle_threshold = bundle_threshold
+        self.planner = planner
+        self.snapshot = snapshot if snapshot is not None else FileSnapshot()
+        self.sync_pair = sync_pair
 
-        self.up_sizes = sum(lpath.stat().st_size for lpath, _ in self.ops.upload)
-        self.down_sizes = sum(ipath.size for ipath, _ in self.ops.download)
-
-    def _delete_session(self):
-        self.thread_session.close()
-        if self.thread_session.irods_session is None:
-            self.logger.debug("Transfer data thread: Thread session successfully deleted.")
-        else:
-            self.logger.debug("Transfer data thread: Thread session still exists.")
+    def _release_session(self, discard: bool = False):
+        get_session_pool(self.ienv_path).release(self.thread_session, discard=discard)
+        self.logger.debug("Transfer data thread: Thread session returned to pool.")
 
     def run(self):
         """Run the thread."""
-        obj_count = 0
-        obj_failed = 0
-        file_count = 0
-        file_failed = 0
-        transfer_out = {}
-        transfer_out["error"] = ""
-        transferred_size = 0
-
-        self.ops.execute_create_coll(self.thread_session)
-        self.ops.execute_create_dir()
-
-        for local_path, irods_path in self.ops.upload:
-            try:
-                _obj_put(
-                    self.thread_session,
-                    local_path,
-                    irods_path,
-                    overwrite=self.overwrite,
-                    options=self.ops.options,
-                    resc_name=self.ops.resc_name,
-                )
-                transferred_size += local_path.stat().st_size
-                obj_count += 1
-                self.logger.info(
-                    "Transfer data thread: Transfer %s -->  %s, overwrite %s",
-                    local_path,
-                    irods_path,
-                    self.overwrite,
-                )
-            except Exception as error:
-                obj_failed += 1
-                self.logger.exception(
-                    "Transfer data thread: Could not transfer  %s --> %s; %s",
-                    local_path,
-                    irods_path,
-                    repr(error),
-                )
-                transfer_out["error"] = (
-                    transfer_out["error"]
-                    + f"\nTransfer failed, cannot upload {str(local_path)}: {repr(error)}"
-                )
-            self.current_progress.emit(
-                [self.up_sizes, transferred_size, obj_count, len(self.ops.upload), obj_failed]
-            )
+        transfer_out = {"planned": 0, "planning_error": None, "bundled_files": 0, "bundles": 0}
+        self.thread_session, transfer_out["error"] = _lease_session(
+            self.ienv_path, self.logger, "Transfer data thread"
+        )
+        if self.thread_session is None:
+            self.result.emit(transfer_out)
+            return
 
-        transferred_size = 0
-        for irods_path, local_path in self.ops.download:
+        journal = None
+        engine = None
+        discard = False
+        # (direction, source, destination) of the finished items of a sync
+        transferred = []
+        try:
+            journal = self._open_journal()
+            engine = TransferEngine(
+                self.ienv_path,
+                self.logger,
+                self.ops,
+                self.overwrite,
+                get_transfer_workers(),
+                journal=journal,
+                transfer_id=self.transfer_id,
+                bundle_threshold=self.bundle_threshold,
+                bundle_extract=get_bundle_extract(),
+                snapshot=self.snapshot,
+                on_transferred=None if self.sync_pair is None else transferred.append,
+            )
             try:
-                _obj_get(
-                    self.thread_session,
-                    irods_path,
-                    local_path,
-                    overwrite=self.overwrite,
-                    resc_name=self.ops.resc_name,
-                    options=self.ops.options,
-                )
-                file_count += 1
-                transferred_size += irods_path.size
-                self.logger.info(
-                    "Transfer data thread: Transfer %s -->  %s, overwrite %s",
-                    irods_path,
-                    local_path,
-                    self.overwrite,
-                )
-            except Exception as error:
-                file_failed += 1
-                self.logger.exception(
-                    "Transfer data thread: Could not transfer  %s --> %s; %s",
-                    irods_path,
-                    local_path,
-                    repr(error),
+                transfer_out["error"] += engine.run(
+                    self._chunks(), self.thread_session, self.current_progress.emit
                 )
-                transfer_out["error"] = (
-                    transfer_out["error"]
-                    + f"\nTransfer failed, cannot download {str(irods_path)}: {repr(error)}"
-                )
-            self.current_progress.emit(
-                [self.down_sizes, transferred_size, file_count, len(self.ops.download), file_failed]
+            finally:
+                engine.close()
+            transfer_out["planned"] = engine.num_planned
+            transfer_out["planning_error"] = engine.planning_error
+            transfer_out["bundled_files"] = engine.bundle_stats["files"]
+            transfer_out["bundles"] = engine.bundle_stats["bundles"]
+
+            self.ops.execute_meta_download()
+            # failed items stay in the journal and can be resumed later, a failed plan
+            # was never confirmed by the user and is not resumed
+            if journal is not None and (
+                transfer_out["error"] == "" or engine.planning_error is not None
+            ):
+                journal.finish(self.transfer_id)
+            if self.sync_pair is not None:
+                self._record_sync_state(transferred)
+        except NetworkException as error:
+            discard = True
+            self.logger.exception("Transfer data thread: Transfer failed.")
+            transfer_out["error"] += f"\nTransfer failed: {repr(error)}"
+        except Exception as error:
+            self.logger.exception("Transfer data thread: Transfer failed.")
+            transfer_out["error"] += f"\nTransfer failed: {repr(error)}"
+        finally:
+            if journal is not None:
+                try:
+                    journal.close()
+                except Exception as error:
+                    self.logger.warning(
+                        "Transfer data thread: Cannot close the transfer journal: %s", repr(error)
+                    )
+            if engine is not None:
+                # listings of the changed collections are outdated
+                LISTING_CACHE.invalidate(*engine.changed_collections)
+            self._release_session(discard=discard)
+            self.result.emit(transfer_out)
+
+    def _record_sync_state(self, transferred: list):
+        """Record the transferred files of a sync, the next diff does not compare them."""
+        state = None
+        try:
+            state = SyncState(self.ienv_path, *self.sync_pair)
+            record_transferred(self.thread_session, state, transferred, self.snapshot)
+        except Exception as error:
+            self.logger.warning(
+                "Transfer data thread: Could not record the sync state: %s", repr(error)
             )
+        finally:
+            if state is not None:
+                state.close()
 
-        self.ops.execute_meta_download()
-        self._delete_session()
-        self.result.emit(transfer_out)
+    def _chunks(self) -> Iterator[Operations]:
+        """Yield the operations to execute, from the planner if there is one."""
+        if self.planner is None:
+            yield self.ops
+            return
+        for chunk in self.planner(self.thread_session, snapshot=self.snapshot):
+            for meta_fp, meta in chunk.meta_download.items():
+                for ipath in meta["items"]:
+                    self.ops.add_meta_download(meta["root_ipath"], ipath, meta_fp)
+            yield chunk
+
+    def _open_journal(self) -> Optional[TransferJournal]:
+        """Open the transfer journal and record a new transfer in it."""
+        journal = None
+        try:
+            journal = TransferJournal()
+            if self.transfer_id is None:
+                self.transfer_id = journal.start(self.ienv_path, self.ops, self.overwrite)
+            return journal
+        except Exception as error:
+            if journal is not None:
+                journal.close()
+            self.logger.warning(
+                "Transfer data thread: No transfer journal, the transfer cannot be resumed: %s",
+                repr(error),
+            )
+            return None
 
 
 class SyncThread(PySide6.QtCore.QThread):
@@ -192,42 +299,46 @@ class SyncThread(PySide6.QtCore.QThread):
 
     result = PySide6.QtCore.Signal(dict)
 
-    def __init__(self, ienv_path, logger, source, target, dry_run: bool):
-        """Pass download parameters."""
+    def __init__(self, ienv_path, logger, source, target, dry_run: bool, checksums: bool = False):
+        """Pass download parameters.
+
+        With checksums the dry-run compares all files of equal size by checksum, the
+        checksums of local files are cached.
+        """
         super().__init__()
 
         self.logger = logger
-        self.thread_session = Session(irods_env=ienv_path)
-        self.logger.debug("Sync thread: created new session")
+        self.ienv_path = ienv_path
+        self.thread_session = None
         self.source = source
         self.target = target
         self.dry_run = dry_run
+        self.checksums = checksums
 
-    def _delete_session(self):
-        self.thread_session.close()
-        if self.thread_session.irods_session is None:
-            self.logger.debug("Sync thread: Thread session successfully deleted.")
-        else:
-            self.logger.debug("Sync thread: Thread session still exists.")
+    def _release_session(self, discard: bool = False):
+        get_session_pool(self.ienv_path).release(self.thread_session, discard=discard)
+        self.logger.debug("Sync thread: Thread session returned to pool.")
 
     def run(self):
         """Run the thread."""
         sync_out = {}
-        sync_out["error"] = ""
+        self.thread_session, sync_out["error"] = _lease_session(
+            self.ienv_path, self.logger, "Sync thread"
+        )
+        if self.thread_session is None:
+            self.result.emit(sync_out)
+            return
 
         try:
-            result = sync(
-                self.thread_session,
-                self.source,
-                self.target,
-                dry_run=self.dry_run,
-                copy_empty_folders=True,
-            )
+            if self.dry_run:
+                sync_out["result"], sync_out["snapshot"] = self._diff()
+            else:
+                sync(self.thread_session, self.source, self.target, copy_empty_folders=True)
+                if isinstance(self.target, IrodsPath):
+                    LISTING_CACHE.invalidate(self.target)
             self.logger.info(
                 "Sync %s to %s, dry_run %s", str(self.source), str(self.target), str(self.dry_run)
             )
-            if self.dry_run:
-                sync_out["result"] = result
 
         except PermissionError as error:
             sync_out["error"] = f"Sync failed. No access to {error.filename}."
@@ -249,5 +360,151 @@ class SyncThread(PySide6.QtCore.QThread):
                 sync_out["error"]
                 + f"\nSync failed: {str(self.source)} --> {str(self.target)}: {repr(error)}"
             )
-        self._delete_session()
+        self._release_session()
         self.result.emit(sync_out)
+
+    def _diff(self) -> tuple[Operations, FileSnapshot]:
+        """Compute the operations of the sync and the stat results of the local files.
+
+        Files that did not change since the last sync of the same folder and
+        collection are not compared, see sync_state.py.
+        """
+        snapshot = FileSnapshot()
+        state = None
+        try:
+            state = SyncState(self.ienv_path, *self.pair)
+        except Exception as error:
+            self.logger.warning("Sync thread: No sync state, comparing all files: %s", repr(error))
+        checksums = None
+        try:
+            if self.checksums:
+                checksums = LocalChecksums(ChecksumCache())
+            chunks = list(
+                iter_sync_plan(
+                    self.thread_session, self.source, self.target, snapshot, state, checksums
+                )
+            )
+        finally:
+            if state is not None:
+                state.close()
+            if checksums is not None:
+                checksums.close()
+        return combine_operations(chunks), snapshot
+
+    @property
+    def pair(self) -> tuple:
+        """The (local folder, collection) of the sync."""
+        if isinstance(self.source, IrodsPath):
+            return self.target, self.source.absolute()
+        return self.source, self.target.absolute()
+
+
+class ListingThread(PySide6.QtCore.QThread):  # pylint: disable=too-few-public-methods
+    """List the content of a collection and stream it page by page."""
+
+    page = PySide6.QtCore.Signal(object)
+    result = PySide6.QtCore.Signal(dict)
+
+    def __init__(self, ienv_path: Path, logger, irods_path: str):
+        """Pass listing parameters.
+
+        ienv_path : Path
+            path to the irods_environment.json, selects the session pool.
+        logger : logging.Logger
+            Logger
+        irods_path : str
+            Absolute path of the collection to list.
+
+        The pages are emitted as ibridgesgui.catalog.CollectionListing. Call
+        requestInterruption to stop the listing after the current page. Complete
+        listings are stored in the listing cache.
+        """
+        super().__init__()
+
+        self.logger = logger
+        self.ienv_path = ienv_path
+        self.thread_session = None
+        self.irods_path = irods_path
+        self.cache_generation = LISTING_CACHE.generation
+
+    def _release_session(self, discard: bool = False):
+        get_session_pool(self.ienv_path).release(self.thread_session, discard=discard)
+
+    def run(self):
+        """Run the thread."""
+        listing_out = {"error": "", "exists": True, "cancelled": False}
+        self.thread_session, listing_out["error"] = _lease_session(
+            self.ienv_path, self.logger, "Listing thread"
+        )
+        if self.thread_session is None:
+            self.result.emit(listing_out)
+            return
+        try:
+            if not IrodsPath(self.thread_session, self.irods_path).collection_exists():
+                listing_out["exists"] = False
+            else:
+                listing = CollectionListing(self.irods_path)
+                for page in iter_collection_listing(self.thread_session, self.irods_path):
+                    if self.isInterruptionRequested():
+                        listing_out["cancelled"] = True
+                        break
+                    listing.extend(page)
+                    self.page.emit(page)
+                else:
+                    LISTING_CACHE.put(listing, self.cache_generation)
+            self._release_session()
+        except NetworkException as error:
+            self._release_session(discard=True)
+            listing_out["error"] = repr(error)
+        except Exception as error:
+            self._release_session()
+            self.logger.exception("Listing thread: Cannot list %s", self.irods_path)
+            listing_out["error"] = repr(error)
+        self.result.emit(listing_out)
+
+
+class CatalogTaskThread(PySide6.QtCore.QThread):  # pylint: disable=too-few-public-methods
+    """Run a catalog query function with a pooled session in the background."""
+
+    result = PySide6.QtCore.Signal(dict)
+
+    def __init__(self, ienv_path: Path, logger, task, *args):
+        """Pass the task.
+
+        ienv_path : Path
+            path to the irods_environment.json, selects the session pool.
+        logger : logging.Logger
+            Logger
+        task : Callable
+            Function called as task(session, *args), its return value is emitted as
+            "result" together with the "args". It should only return plain python data,
+            no objects that are bound to the session.
+        """
+        super().__init__()
+
+        self.logger = logger
+        self.ienv_path = ienv_path
+        self.thread_session = None
+        self.task = task
+        self.args = args
+
+    def run(self):
+        """Run the thread."""
+        task_out = {"error": "", "args": self.args}
+        self.thread_session, task_out["error"] = _lease_session(
+            self.ienv_path, self.logger, "Catalog task thread"
+        )
+        if self.thread_session is None:
+            self.result.emit(task_out)
+            return
+        discard = False
+        try:
+            task_out["result"] = self.task(self.thread_session, *self.args)
+        except NetworkException as error:
+            discard = True
+            task_out["error"] = repr(error)
+        except Exception as error:
+            self.logger.exception("Catalog task %s failed", self.task.__name__)
+            task_out["error"] = repr(error)
+        get_session_pool(self.ienv_path).release(self.thread_session, discard=discard)
+        self.result.emit(task_out)
@@ -0,0 +1,561 @@
+"""Parallel transfer engine for uploads and downloads.
+
+Uploading or downloading many small objects one after the other is dominated by
+the round trips per object. The engine runs several `_obj_put`/`_obj_get` calls
+at once, each worker thread on its own session leased from the session pool, and
+reports the aggregated progress. Progress is counted per chunk of bytes, so large
+objects move the progress bar while they are transferred, and a rolling throughput
+and the estimated remaining time are reported along with it.
+
+The operations arrive in chunks, e.g. one folder at a time from a planner, and
+the transfers of a chunk start while the next chunk is planned. Small files can be
+bundled, see bundling.py.
+
+With a transfer journal every finished object is recorded. Large objects are then
+written in segments and the journal keeps the number of bytes written, so an
+interrupted transfer of a large object continues after the last segment.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+import irods.keywords as kw
+from ibridges import IrodsPath, Session
+from ibridges.executor import Operations, _obj_get, _obj_put
+
+from ibridgesgui.bundling import Bundle, extract_bundle, plan_bundles, write_bundle, write_manifest
+from ibridgesgui.file_snapshot import FileSnapshot
+from ibridgesgui.session_pool import LEASE_TIMEOUT, get_session_pool
+from ibridgesgui.transfer_journal import DOWNLOAD, UPLOAD, TransferJournal
+
+# objects of at least RESUMABLE_SIZE bytes are transferred in resumable segments
+RESUMABLE_SIZE = 1 << 30
+SEGMENT_SIZE = 256 << 20
+BUFFER_SIZE = 8 << 20
+# minimal seconds between two progress reports during a transfer of bytes
+PROGRESS_INTERVAL = 0.5
+# seconds of transfer history the throughput is computed over
+THROUGHPUT_WINDOW = 10
+# sessions of the pool left for the transfer thread itself and the other threads
+RESERVED_SESSIONS = 3
+
+
+class TransferProgress:
+    """Thread-safe byte and object counts of the uploads and downloads of a transfer.
+
+    The report is a list:
+    [total_size, transferred_size, obj_count, num_objs, obj_failed,
+    bytes_per_second, eta_seconds, current_file, file_transferred, file_size, planning],
+    the totals grow while planning is True, eta_seconds is -1 while it is unknown.
+    """
+
+    def __init__(self, report: Callable):
+        """Pass parameters.
+
+        report : Callable
+            Called with the progress list, at most every PROGRESS_INTERVAL seconds
+            while bytes arrive and after every finished object.
+        """
+        self.total_size = 0
+        self.num_objs = 0
+        self.planning = True
+        self._report = report
+        self._lock = threading.Lock()
+        # bytes of finished objects, and bytes so far of running ones keyed by source
+        self._finished_size = 0
+        self._running = {}
+        self._count = 0
+        self._failed = 0
+        self._current = ""
+        self._samples = deque()
+        self._last_report = 0.0
+
+    def add(self, num_objs: int, size: int):
+        """Add planned objects and their bytes to the totals."""
+        with self._lock:
+            self.num_objs += num_objs
+            self.total_size += size
+
+    def done_planning(self):
+        """Mark the totals as complete."""
+        with self._lock:
+            self.planning = False
+
+    def start(self, source: str, size: int, offset: int = 0):
+        """Register a running object, offset bytes were transferred before."""
+        with self._lock:
+            self._running[source] = [offset, size]
+            self._current = source
+
+    def update(self, source: str, num_bytes: int):
+        """Count num_bytes more bytes of source."""
+        with self._lock:
+            if source not in self._running:
+                return
+            self._running[source][0] += num_bytes
+            self._current = source
+            now = time.monotonic()
+            if now - self._last_report < PROGRESS_INTERVAL:
+                return
+            state = self._state(now)
+        self._report(state)
+
+    def finish(self, source: str, size: int, failed: bool, count: int = 1):
+        """Count a finished or failed object, or count files of a bundle, and report."""
+        with self._lock:
+            self._running.pop(source, None)
+            if failed:
+                self._failed += count
+            else:
+                self._finished_size += size
+                self._count += count
+            state = self._state(time.monotonic())
+        self._report(state)
+
+    def _state(self, now: float) -> list:
+        """Return the progress list, the lock must be held."""
+        transferred = self._finished_size + sum(done for done, _ in self._running.values())
+        self._samples.append((now, transferred))
+        while now - self._samples[0][0] > THROUGHPUT_WINDOW:
+            self._samples.popleft()
+        then, transferred_then = self._samples[0]
+        rate = (transferred - transferred_then) / (now - then) if now > then else 0.0
+        eta = (self.total_size - transferred) / rate if rate > 0 and not self.planning else -1
+        file_transferred, file_size = self._running.get(self._current, (0, 0))
+        self._last_report = now
+        return [
+            self.total_size,
+            transferred,
+            self._count,
+            self.num_objs,
+            self._failed,
+            rate,
+            eta,
+            self._current if self._current in self._running else "",
+            file_transferred,
+            file_size,
+            self.planning,
+        ]
+
+
+class _FileProgress:  # pylint: disable=too-few-public-methods
+    """Progress bar stand-in for _obj_put/_obj_get, forwards chunks to TransferProgress."""
+
+    def __init__(self, progress: TransferProgress, source: str):
+        self.progress = progress
+        self.source = source
+
+    def update(self, num_bytes: int):
+        """Count num_bytes more transferred bytes of the file, called like tqdm.update."""
+        self.progress.update(self.source, num_bytes)
+
+
+class TransferEngine:
+    """Run the uploads and downloads of an Operations object on a pool of workers."""
+
+    def __init__(
+        self,
+        ienv_path: Path,
+        logger,
+        ops: Operations,
+        overwrite: bool,
+        workers: int,
+        journal: Optional[TransferJournal] = None,
+        transfer_id: Optional[int] = None,
+        bundle_threshold: int = 0,
+        bundle_extract: bool = True,
+        snapshot: Optional[FileSnapshot] = None,
+        on_transferred: Optional[Callable] = None,
+    ):
+        """Pass parameters.
+
+        ienv_path : Path
+            path to the irods_environment.json, selects the session pool.
+        logger : logging.Logger
+            Logger
+        ops : ibridges.Operations
+            Resource and options of the transfers.
+        overwrite : bool
+            Overwrite existing data.
+        workers : int
+            Number of transfers that run at the same time, at most the size of the
+            session pool minus RESERVED_SESSIONS.
+        journal : TransferJournal, optional
+            Journal to record finished objects and segments in.
+        transfer_id : int, optional
+            Id of the transfer in the journal.
+        bundle_threshold : int
+            Upload files smaller than this many bytes in tar bundles, 0 disables it.
+            Bundles are only used without overwrite, extracting does not replace data.
+        bundle_extract : bool
+            Extract the bundles on the server, otherwise keep them with a manifest.
+        snapshot : FileSnapshot, optional
+            Stat results of the local files from planning, missing files are statted.
+        on_transferred : Callable, optional
+            Called with (direction, source, destination) of each transferred object.
+        """
+        self.ienv_path = ienv_path
+        self.logger = logger
+        self.ops = ops
+        self.overwrite = overwrite
+        max_workers = max(1, get_session_pool(ienv_path).max_sessions - RESERVED_SESSIONS)
+        if workers > max_workers:
+            logger.warning(
+                "Transfer engine: %d transfer workers configured, the session pool allows %d.",
+                workers,
+                max_workers,
+            )
+        self.workers = max(1, min(workers, max_workers))
+        # size in bytes of each planned source, keyed by str(source)
+        self.sizes = {}
+        self.snapshot = snapshot if snapshot is not None else FileSnapshot()
+        self.on_transferred = on_transferred
+        self.journal = journal
+        self.transfer_id = transfer_id
+        self.bundle_threshold = bundle_threshold if not overwrite else 0
+        self.bundle_extract = bundle_extract
+        # number of bundled files and bundles of the upload
+        self.bundle_stats = {"files": 0, "bundles": 0}
+        # planned objects, the first exception of the planner and the changed collections
+        self.num_planned = 0
+        self.planning_error = None
+        self.changed_collections = set()
+        # bytes of large objects written before an interruption
+        self.offsets = journal.offsets(transfer_id) if journal is not None else {}
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        # TransferProgress of the running upload or download
+        self._progress = None
+
+    def _session(self) -> Session:
+        """Return the session of the calling worker thread, lease it on first use.
+
+        Raises a TimeoutError when the pool has no free session within LEASE_TIMEOUT
+        seconds, the transfer of the worker then fails like any other transfer.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = get_session_pool(self.ienv_path).lease(timeout=LEASE_TIMEOUT)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+            self.logger.debug("Transfer engine: leased worker session.")
+        return session
+
+    def close(self):
+        """Return all worker sessions to the session pool."""
+        pool = get_session_pool(self.ienv_path)
+        with self._sessions_lock:
+            for session in self._sessions:
+                pool.release(session)
+            self._sessions.clear()
+        self.logger.debug("Transfer engine: worker sessions returned to pool.")
+
+    def _resumable(self, source) -> bool:
+        return self.journal is not None and self.sizes.get(str(source), 0) >= RESUMABLE_SIZE
+
+    def _put(self, local_path: Path, irods_path):
+        if self._resumable(local_path):
+            self._put_segments(local_path, irods_path)
+            return
+        source = str(local_path)
+        self._progress.start(source, self.sizes.get(source, 0))
+        # _obj_put adds the progress callback to the options, every call needs its own copy
+        _obj_put(
+            self._session(),
+            local_path,
+            irods_path,
+            overwrite=self.overwrite,
+            options=dict(self.ops.options or {}),
+            resc_name=self.ops.resc_name,
+            pbar=_FileProgress(self._progress, source),
+        )
+
+    def _get(self, irods_path, local_path: Path):
+        if self._resumable(irods_path):
+            self._get_segments(irods_path, local_path)
+            return
+        source = str(irods_path)
+        self._progress.start(source, self.sizes.get(source, 0))
+        _obj_get(
+            self._session(),
+            irods_path,
+            local_path,
+            overwrite=self.overwrite,
+            resc_name=self.ops.resc_name,
+            options=dict(self.ops.options or {}),
+            pbar=_FileProgress(self._progress, source),
+        )
+
+    def _put_segments(self, local_path: Path, irods_path):
+        """Upload a large file segment by segment, continue after the last recorded one.
+
+        Each segment is written with its own open/close of the data object, so the
+        catalog knows the size of the written part when the journal records it.
+        """
+        session = self._session()
+        source = str(local_path)
+        size = self.sizes[source]
+        ipath = IrodsPath(session, irods_path)
+        offset = self.offsets.get((UPLOAD, source), 0)
+        if offset > 0:
+            # continue after the bytes that are registered in the catalog
+            offset = min(offset, ipath.size) if ipath.dataobject_exists() else 0
+        elif not self.overwrite and ipath.dataobject_exists():
+            raise FileExistsError(
+                f"Dataset {irods_path} already exists. "
+                "Use overwrite=True to overwrite the existing file."
+            )
+        if offset > 0:
+            self.logger.info("Transfer data thread: Resume %s at byte %d", local_path, offset)
+        self._progress.start(source, size, offset)
+        options = {kw.DEST_RESC_NAME_KW: self.ops.resc_name} if self.ops.resc_name else {}
+        with open(local_path, "rb") as src:
+            src.seek(offset)
+            while offset < size:
+                end = min(offset + SEGMENT_SIZE, size)
+                mode = "r+" if offset > 0 else "w"
+                with session.irods_session.data_objects.open(str(ipath), mode, **options) as dest:
+                    dest.seek(offset)
+                    while offset < end:
+                        chunk = src.read(min(BUFFER_SIZE, end - offset))
+                        if not chunk:
+                            raise OSError(f"{local_path} changed during the upload.")
+                        dest.write(chunk)
+                        offset += len(chunk)
+                        self._progress.update(source, len(chunk))
+                self.journal.set_offset(self.transfer_id, UPLOAD, source, offset)
+        # register the checksum like a regular put
+        ipath.dataobject.chksum()
+
+    def _get_segments(self, irods_path, local_path: Path):
+        """Download a large object, continue after the last recorded segment."""
+        session = self._session()
+        source = str(irods_path)
+        size = self.sizes[source]
+        local_path = Path(local_path)
+        offset = self.offsets.get((DOWNLOAD, source), 0)
+        if offset > 0:
+            offset = min(offset, local_path.stat().st_size) if local_path.is_file() else 0
+        elif not self.overwrite and local_path.exists():
+            raise FileExistsError(f"{local_path} already exists.")
+        if offset > 0:
+            self.logger.info("Transfer data thread: Resume %s at byte %d", irods_path, offset)
+        self._progress.start(source, size, offset)
+        options = {kw.RESC_NAME_KW: self.ops.resc_name} if self.ops.resc_name else {}
+        src = session.irods_session.data_objects.open(source, "r", **options)
+        with src, open(local_path, "r+b" if offset > 0 else "wb") as dest:
+            src.seek(offset)
+            dest.seek(offset)
+            checkpoint = offset + SEGMENT_SIZE
+            while offset < size:
+                chunk = src.read(min(BUFFER_SIZE, size - offset))
+                if not chunk:
+                    raise OSError(f"{irods_path} changed during the download.")
+                dest.write(chunk)
+                offset += len(chunk)
+                self._progress.update(source, len(chunk))
+                if offset >= checkpoint or offset == size:
+                    dest.flush()
+                    self.journal.set_offset(self.transfer_id, DOWNLOAD, source, offset)
+                    checkpoint = offset + SEGMENT_SIZE
+            dest.truncate(size)
+
+    def _put_bundle(self, bundle: Bundle):
+        """Upload a bundle, then extract it or store its manifest."""
+        session = self._session()
+        self._progress.start(bundle.path, bundle.size)
+        write_bundle(
+            session, bundle, self.ops.resc_name, partial(self._progress.update, bundle.path)
+        )
+        if self.bundle_extract:
+            try:
+                extract_bundle(session, bundle, self.ops.resc_name)
+                bundle.extracted = True
+                return
+            except ValueError as error:
+                self.logger.warning(
+                    "Transfer data thread: Keep bundle %s with manifest; %s",
+                    bundle.path,
+                    repr(error),
+                )
+        write_manifest(session, bundle, self.ops.resc_name)
+
+    def _run_pool(self, jobs: Iterable[tuple], transfer: Callable, on_done: Callable):
+        """Run transfer(*job) for all jobs, at most 2*workers jobs are queued at once."""
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="ibridges-transfer"
+        ) as pool:
+            pending = {}
+            for job in jobs:
+                pending[pool.submit(transfer, *job)] = job
+                if len(pending) >= 2 * self.workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        on_done(pending.pop(future), future.exception())
+            for future in list(pending):
+                on_done(pending.pop(future), future.exception())
+
+    def run(self, chunks: Iterable[Operations], session: Session, progress: Callable) -> str:
+        """Transfer the uploads and downloads of a stream of operations, return the errors.
+
+        chunks : Iterable[Operations]
+            Operations in the order they are planned. The collections and directories
+            of a chunk are created before its transfers are queued, the next chunk is
+            planned while the workers transfer.
+        session : Session
+            Session to create the collections with.
+        progress : Callable
+            Called with the progress list of TransferProgress.
+        """
+        state = {"error": ""}
+        self._progress = TransferProgress(progress)
+        self._run_pool(
+            self._jobs(chunks, session, state), self._transfer, partial(self._on_done, state)
+        )
+        return state["error"]
+
+    def _jobs(self, chunks: Iterable[Operations], session: Session, state: dict) -> Iterator[tuple]:
+        """Yield the transfers of all chunks, a failing planner stops the planning."""
+        try:
+            for chunk in chunks:
+                yield from self._chunk_jobs(chunk, session)
+        except Exception as error:
+            self.planning_error = error
+            self.logger.error(
+                "Transfer data thread: Planning failed; %s", repr(error), exc_info=error
+            )
+            state["error"] += f"\nPlanning failed: {repr(error)}"
+        finally:
+            self._progress.done_planning()
+
+    def _chunk_jobs(self, chunk: Operations, session: Session) -> Iterator[tuple]:
+        sizes = {str(lpath): self.snapshot.size(lpath) for lpath, _ in chunk.upload}
+        sizes.update({str(ipath): ipath.size for ipath, _ in chunk.download})
+        self.sizes.update(sizes)
+        if self.journal is not None:
+            self.journal.add(self.transfer_id, chunk, sizes)
+        chunk.execute_create_coll(session)
+        chunk.execute_create_dir()
+        self.changed_collections.update(str(coll) for coll in chunk.create_collection)
+        self.changed_collections.update(str(ipath.parent) for _, ipath in chunk.upload)
+        num_objs = len(chunk.upload) + len(chunk.download)
+        self.num_planned += num_objs
+        self._progress.add(num_objs, sum(sizes.values()))
+
+        uploads, bundles = chunk.upload, []
+        if self.bundle_threshold > 0:
+            uploads, bundles = plan_bundles(chunk.upload, sizes, self.bundle_threshold)
+        self.bundle_stats["files"] += sum(len(bundle) for bundle in bundles)
+        for bundle in bundles:
+            yield ("bundle", bundle)
+        for local_path, irods_path in uploads:
+            yield (UPLOAD, local_path, irods_path)
+        for irods_path, local_path in chunk.download:
+            yield (DOWNLOAD, irods_path, local_path)
+
+    def _transfer(self, kind: str, *args):
+        if kind == UPLOAD:
+            self._put(*args)
+        elif kind == DOWNLOAD:
+            self._get(*args)
+        else:
+            self._put_bundle(*args)
+
+    def _on_done(self, state: dict, job: tuple, error: Optional[BaseException]):
+        """Count, journal and log a finished transfer."""
+        kind = job[0]
+        if kind == "bundle":
+            self._on_bundle_done(state, job[1], error)
+            return
+        source, dest = job[1], job[2]
+        self._progress.finish(str(source), self.sizes.get(str(source), 0), error is not None)
+        if error is None:
+            if self.journal is not None:
+                self.journal.mark_done(self.transfer_id, kind, str(source))
+            if self.on_transferred is not None:
+                self.on_transferred(kind, source, dest)
+            self.logger.info(
+                "Transfer data thread: Transfer %s -->  %s, overwrite %s",
+                source,
+                dest,
+                self.overwrite,
+                extra=self._log_fields("transferred", kind, source, dest),
+            )
+        else:
+            self.logger.error(
+                "Transfer data thread: Could not transfer  %s --> %s; %s",
+                source,
+                dest,
+                repr(error),
+                exc_info=error,
+                extra=self._log_fields("transfer_failed", kind, source, dest),
+            )
+            state["error"] += f"\nTransfer failed, cannot {kind} {str(source)}: {repr(error)}"
+
+    def _log_fields(self, event: str, kind: str, source, dest) -> dict:
+        """Return the fields of a per-file log record, written to the JSON lines log."""
+        return {
+            "event": event,
+            "transfer_id": self.transfer_id,
+            "kind": kind,
+            "source": str(source),
+            "dest": str(dest),
+            "size": self.sizes.get(str(source), 0),
+        }
+
+    def _on_bundle_done(self, state: dict, bundle: Bundle, error: Optional[BaseException]):
+        self._progress.finish(bundle.path, bundle.size, error is not None, len(bundle))
+        if error is None and not bundle.extracted:
+            # only the archive and its manifest exist, the members are not in iRODS
+            self.bundle_stats["bundles"] += 1
+            self.logger.info(
+                "Transfer data thread: Transfer %d files --> %s, kept with manifest",
+                len(bundle),
+                bundle.path,
+                extra={
+                    "event": "bundle_stored",
+                    "transfer_id": self.transfer_id,
+                    "dest": bundle.path,
+                    "files": len(bundle),
+                    "size": bundle.size,
+                },
+            )
+        elif error is None:
+            self.bundle_stats["bundles"] += 1
+            if self.journal is not None:
+                for local_path, _, _ in bundle.members:
+                    self.journal.mark_done(self.transfer_id, UPLOAD, str(local_path))
+            if self.on_transferred is not None:
+                for local_path, irods_path, _ in bundle.members:
+                    self.on_transferred(UPLOAD, local_path, irods_path)
+            self.logger.info(
+                "Transfer data thread: Transfer %d files --> %s in bundle %s",
+                len(bundle),
+                bundle.collection,
+                bundle.name,
+                extra={
+                    "event": "bundle_transferred",
+                    "transfer_id": self.transfer_id,
+                    "dest": str(bundle.collection),
+                    "files": len(bundle),
+                    "size": bundle.size,
+                },
+            )
+        else:
+            self.bundle_stats["files"] -= len(bundle)
+            self.logger.error(
+                "Transfer data thread: Could not transfer bundle %s; %s",
+                bundle.path,
+                repr(error),
+                exc_info=error,
+            )
+            state["error"] += (
+                f"\nTransfer failed, cannot upload bundle {bundle.path}: {repr(error)}"
+            )
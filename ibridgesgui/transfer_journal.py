@@ -0,0 +1,340 @@
+"""Journal of transfers for resuming them after a crash or network failure.
+
+The plan of a TransferDataThread (the Operations of a dry-run or of a streaming
+planner) is stored in a SQLite database under CONFIG_DIR before its objects are
+transferred. Finished objects
+are marked as done and large objects record how many bytes have been written,
+so that an interrupted transfer can be resumed with only the missing items and
+bytes.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from ibridges import IrodsPath, Session
+from ibridges.executor import Operations
+
+from ibridgesgui.config import CONFIG_DIR, ensure_log_config_location
+
+JOURNAL_FILE = CONFIG_DIR.joinpath("transfer_journal.sqlite")
+UPLOAD = "upload"
+DOWNLOAD = "download"
+# kinds of the folders table
+COLLECTION = "collection"
+DIRECTORY = "dir"
+# finished items are committed in batches
+COMMIT_EVERY = 100
+COMMIT_INTERVAL = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transfers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ienv_path TEXT NOT NULL,
+    overwrite INTEGER NOT NULL,
+    resc_name TEXT NOT NULL,
+    options TEXT NOT NULL,
+    create_collection TEXT NOT NULL,
+    create_dir TEXT NOT NULL,
+    meta_download TEXT NOT NULL,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    transfer_id INTEGER NOT NULL REFERENCES transfers(id) ON DELETE CASCADE,
+    direction TEXT NOT NULL,
+    source TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    offset INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (transfer_id, direction, source)
+);
+CREATE TABLE IF NOT EXISTS folders (
+    transfer_id INTEGER NOT NULL REFERENCES transfers(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (transfer_id, kind, path)
+);
+CREATE TABLE IF NOT EXISTS meta_items (
+    transfer_id INTEGER NOT NULL REFERENCES transfers(id) ON DELETE CASCADE,
+    meta_fp TEXT NOT NULL,
+    root_ipath TEXT NOT NULL,
+    ipath TEXT NOT NULL,
+    PRIMARY KEY (transfer_id, meta_fp, ipath)
+);
+"""
+
+
+class TransferJournal:
+    """Thread-safe access to the transfer journal."""
+
+    def __init__(self, path: Union[str, Path] = JOURNAL_FILE):
+        """Open or create the journal.
+
+        Parameters
+        ----------
+        path : str or Path
+            Location of the SQLite database.
+
+        """
+        ensure_log_config_location()
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def close(self):
+        """Commit outstanding changes and close the database."""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def start(self, ienv_path: Union[str, Path], ops: Operations, overwrite: bool) -> int:
+        """Record a new transfer and return its id, its items are added with add.
+
+        Parameters
+        ----------
+        ienv_path : str or Path
+            Environment the transfer is executed with.
+        ops : Operations
+            Resource, options, collections, directories and metadata of the transfer.
+        overwrite : bool
+            Overwrite existing data.
+
+        """
+        meta_download = {
+            meta_fp: {
+                "root_ipath": str(meta["root_ipath"]),
+                "items": [str(ipath) for ipath in meta["items"]],
+            }
+            for meta_fp, meta in ops.meta_download.items()
+        }
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO transfers (ienv_path, overwrite, resc_name, options, "
+                "create_collection, create_dir, meta_download, started) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(ienv_path),
+                    int(overwrite),
+                    ops.resc_name or "",
+                    json.dumps(ops.options or {}),
+                    json.dumps(sorted(str(coll) for coll in ops.create_collection)),
+                    json.dumps(sorted(str(folder) for folder in ops.create_dir)),
+                    json.dumps(meta_download),
+                    time.time(),
+                ),
+            )
+        return cursor.lastrowid
+
+    def add(self, transfer_id: int, ops: Operations, sizes: dict):
+        """Add the planned items of ops to a transfer, known items are ignored.
+
+        Besides the uploads and downloads, the collections and directories to create
+        and the metadata to download are added, a plan that arrives in chunks is
+        recorded completely.
+
+        Parameters
+        ----------
+        transfer_id : int
+            Id of the transfer, see start.
+        ops : Operations
+            Planned uploads and downloads.
+        sizes : dict
+            Size in bytes of each source, keyed by str(source).
+
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items (transfer_id, direction, source, destination, size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (transfer_id, UPLOAD, str(src), str(dest), sizes.get(str(src), 0))
+                    for src, dest in ops.upload
+                ]
+                + [
+                    (transfer_id, DOWNLOAD, str(src), str(dest), sizes.get(str(src), 0))
+                    for src, dest in ops.download
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO folders (transfer_id, kind, path) VALUES (?, ?, ?)",
+                [(transfer_id, COLLECTION, str(coll)) for coll in ops.create_collection]
+                + [(transfer_id, DIRECTORY, str(folder)) for folder in ops.create_dir],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO meta_items (transfer_id, meta_fp, root_ipath, ipath) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (transfer_id, str(meta_fp), str(meta["root_ipath"]), str(ipath))
+                    for meta_fp, meta in ops.meta_download.items()
+                    for ipath in meta["items"]
+                ],
+            )
+
+    def mark_done(self, transfer_id: int, direction: str, source: str):
+        """Mark an item as transferred, the change is committed in batches."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE items SET done = 1 WHERE transfer_id = ? AND direction = ? AND source = ?",
+                (transfer_id, direction, source),
+            )
+            self._uncommitted += 1
+            if (
+                self._uncommitted >= COMMIT_EVERY
+                or time.monotonic() - self._last_commit > COMMIT_INTERVAL
+            ):
+                self._commit()
+
+    def set_offset(self, transfer_id: int, direction: str, source: str, offset: int):
+        """Record the number of bytes of a large item that are safely written."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE items SET offset = ? "
+                "WHERE transfer_id = ? AND direction = ? AND source = ?",
+                (offset, transfer_id, direction, source),
+            )
+            self._commit()
+
+    def offsets(self, transfer_id: int) -> dict:
+        """Return the recorded offsets of unfinished items, keyed by (direction, source)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT direction, source, offset FROM items "
+                "WHERE transfer_id = ? AND done = 0 AND offset > 0",
+                (transfer_id,),
+            ).fetchall()
+        return {(direction, source): offset for direction, source, offset in rows}
+
+    def flush(self):
+        """Commit all finished items."""
+        with self._lock:
+            self._commit()
+
+    def finish(self, transfer_id: int):
+        """Remove a completed or discarded transfer from the journal."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items WHERE transfer_id = ?", (transfer_id,))
+            self._conn.execute("DELETE FROM folders WHERE transfer_id = ?", (transfer_id,))
+            self._conn.execute("DELETE FROM meta_items WHERE transfer_id = ?", (transfer_id,))
+            self._conn.execute("DELETE FROM transfers WHERE id = ?", (transfer_id,))
+
+    def unfinished(self, ienv_path: Optional[Union[str, Path]] = None) -> list[dict]:
+        """List the transfers that did not complete.
+
+        Parameters
+        ----------
+        ienv_path : str or Path, optional
+            Only list transfers of this environment.
+
+        Returns
+        -------
+        list of dict
+            With "id", "ienv_path", "started", "uploads", "downloads" and "remaining"
+            items.
+
+        """
+        query = (
+            "SELECT t.id, t.ienv_path, t.started, "
+            "SUM(i.direction = ?), SUM(i.direction = ?), SUM(i.done = 0) "
+            "FROM transfers t LEFT JOIN items i ON i.transfer_id = t.id "
+        )
+        params = [UPLOAD, DOWNLOAD]
+        if ienv_path is not None:
+            query += "WHERE t.ienv_path = ? "
+            params.append(str(ienv_path))
+        query += "GROUP BY t.id ORDER BY t.started"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {
+                "id": row[0],
+                "ienv_path": row[1],
+                "started": row[2],
+                "uploads": row[3] or 0,
+                "downloads": row[4] or 0,
+                "remaining": row[5] or 0,
+            }
+            for row in rows
+        ]
+
+    def load(self, transfer_id: int, session: Session) -> tuple[Operations, bool]:
+        """Rebuild the operations of the unfinished items of a transfer.
+
+        Parameters
+        ----------
+        transfer_id : int
+            Id of the transfer, see unfinished.
+        session : Session
+            Session the IrodsPaths are bound to.
+
+        Returns
+        -------
+        Operations
+            The remaining operations.
+        bool
+            Whether the transfer overwrites existing data. Large items with a recorded
+            offset are continued regardless, see TransferEngine.
+
+        """
+        with self._lock:
+            transfer = self._conn.execute(
+                "SELECT resc_name, options, create_collection, create_dir, meta_download, "
+                "overwrite FROM transfers WHERE id = ?",
+                (transfer_id,),
+            ).fetchone()
+            if transfer is None:
+                raise KeyError(f"No transfer {transfer_id} in the journal.")
+            items = self._conn.execute(
+                "SELECT direction, source, destination FROM items "
+                "WHERE transfer_id = ? AND done = 0",
+                (transfer_id,),
+            ).fetchall()
+            folders = self._conn.execute(
+                "SELECT kind, path FROM folders WHERE transfer_id = ?", (transfer_id,)
+            ).fetchall()
+            meta_items = self._conn.execute(
+                "SELECT meta_fp, root_ipath, ipath FROM meta_items WHERE transfer_id = ?",
+                (transfer_id,),
+            ).fetchall()
+        resc_name, options, create_collection, create_dir, meta_download, overwrite = transfer
+        ops = Operations()
+        ops.resc_name = resc_name
+        ops.options = json.loads(options)
+        ops.create_collection = set(json.loads(create_collection))
+        ops.create_dir = set(json.loads(create_dir))
+        for kind, path in folders:
+            if kind == COLLECTION:
+                ops.add_create_coll(IrodsPath(session, path))
+            else:
+                ops.add_create_dir(Path(path))
+        # metadata recorded at the start and with the chunks of the plan
+        meta_items += [
+            (meta_fp, meta["root_ipath"], ipath)
+            for meta_fp, meta in json.loads(meta_download).items()
+            for ipath in meta["items"]
+        ]
+        for meta_fp, root_ipath, ipath in dict.fromkeys(meta_items):
+            ops.add_meta_download(
+                IrodsPath(session, root_ipath), IrodsPath(session, ipath), meta_fp
+            )
+        # the folders of items from streamed plans might not have been created yet
+        for direction, source, destination in items:
+            if direction == UPLOAD:
+                ops.add_upload(Path(source), IrodsPath(session, destination))
+                ops.add_create_coll(IrodsPath(session, destination).parent)
+            else:
+                ops.add_download(IrodsPath(session, source), Path(destination))
+                ops.add_create_dir(Path(destination).parent)
+        return ops, bool(overwrite)
+
+    def _commit(self):
+        """Commit, the lock must be held."""
+        self._conn.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
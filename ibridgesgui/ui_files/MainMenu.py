@@ -26,7 +26,7 @@ class Ui_MainWindow(object):
         MainWindow.resize(1300, 850)
         MainWindow.setMinimumSize(QSize(1300, 850))
         icon = QIcon()
-        icon.addFile(u"../icons/logo.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        icon.addFile(u"icons/logo.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         MainWindow.setWindowIcon(icon)
         MainWindow.setStyleSheet(u"QWidget\n"
 "{\n"
@@ -139,3 +139,5 @@ class Ui_MainWindow(object):
 
     # retranslateUi
 
+
+# ui source sha256: 03199a3a7f8b0f401d879cb5f8fc6bb46dbaafb38401bc0d9c4f0146b0b849b3
@@ -150,3 +150,5 @@ class Ui_configCheck(object):
         self.close_button.setText(QCoreApplication.translate("configCheck", u"Close", None))
     # retranslateUi
 
+
+# ui source sha256: f6845f894d5f4a037266f3609b88e20544a043bebb338aa455683922991452a0
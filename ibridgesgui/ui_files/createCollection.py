@@ -121,3 +121,5 @@ class Ui_createCollection(object):
         self.error_label.setText("")
     # retranslateUi
 
+
+# ui source sha256: f472a45d96dcdb27093d1719941379291760cff0fed33df13231a969c4ff5c59
@@ -190,3 +190,5 @@ class Ui_downloadData(object):
         self.error_label.setText("")
     # retranslateUi
 
+
+# ui source sha256: 044ab903588f545ce51b67c23ee34e62367c218bb338c188357a84000a3a5870
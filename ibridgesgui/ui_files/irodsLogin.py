@@ -174,3 +174,5 @@ class Ui_irodsLogin(object):
         self.connect_button.setText(QCoreApplication.translate("irodsLogin", u"Connect", None))
     # retranslateUi
 
+
+# ui source sha256: 673cdbc6a4b29e11e172ccb1ca05a7d0abd3a1080df3a1b2089c804795a1326e
@@ -112,3 +112,5 @@ class Ui_renameItem(object):
         self.error_label.setText("")
     # retranslateUi
 
+
+# ui source sha256: 3804f6be33eb03e7772db852837e20566c8dde0ae1d1372b99f590a3df7a9a23
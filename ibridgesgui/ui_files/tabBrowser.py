@@ -18,8 +18,8 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
 from PySide6.QtWidgets import (QAbstractItemView, QAbstractScrollArea, QApplication, QComboBox,
     QGridLayout, QHBoxLayout, QHeaderView, QLabel,
     QLineEdit, QPushButton, QSizePolicy, QSpacerItem,
-    QTabWidget, QTableWidget, QTableWidgetItem, QTextBrowser,
-    QVBoxLayout, QWidget)
+    QTabWidget, QTableView, QTableWidget, QTableWidgetItem,
+    QTextBrowser, QVBoxLayout, QWidget)
 
 class Ui_tabBrowser(object):
     def setupUi(self, tabBrowser):
@@ -40,7 +40,7 @@ class Ui_tabBrowser(object):
 "    color: rgb(220, 130, 30);\n"
 "}\n"
 "\n"
-"QLineEdit, QTextEdit, QTableWidget\n"
+"QLineEdit, QTextEdit, QTableWidget, QTableView\n"
 "{\n"
 "   background-color:  rgb(245, 244, 244)\n"
 "}\n"
@@ -92,7 +92,7 @@ class Ui_tabBrowser(object):
         self.refresh_button = QPushButton(tabBrowser)
         self.refresh_button.setObjectName(u"refresh_button")
         icon = QIcon()
-        icon.addFile(u"../icons/refresh.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        icon.addFile(u"icons/refresh.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.refresh_button.setIcon(icon)
 
         self.gridLayout.addWidget(self.refresh_button, 0, 2, 1, 1)
@@ -101,7 +101,7 @@ class Ui_tabBrowser(object):
         self.parent_button.setObjectName(u"parent_button")
         self.parent_button.setEnabled(True)
         icon1 = QIcon()
-        icon1.addFile(u"../icons/arrow-up.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        icon1.addFile(u"icons/arrow-up.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.parent_button.setIcon(icon1)
 
         self.gridLayout.addWidget(self.parent_button, 0, 3, 1, 1)
@@ -109,7 +109,7 @@ class Ui_tabBrowser(object):
         self.home_button = QPushButton(tabBrowser)
         self.home_button.setObjectName(u"home_button")
         icon2 = QIcon()
-        icon2.addFile(u"../icons/home.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        icon2.addFile(u"icons/home.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.home_button.setIcon(icon2)
 
         self.gridLayout.addWidget(self.home_button, 0, 4, 1, 1)
@@ -160,22 +160,7 @@ class Ui_tabBrowser(object):
 
         self.verticalLayout.addLayout(self.gridLayout)
 
-        self.browser_table = QTableWidget(tabBrowser)
-        if (self.browser_table.columnCount() < 6):
-            self.browser_table.setColumnCount(6)
-        __qtablewidgetitem = QTableWidgetItem()
-        __qtablewidgetitem.setText(u"Status");
-        self.browser_table.setHorizontalHeaderItem(0, __qtablewidgetitem)
-        __qtablewidgetitem1 = QTableWidgetItem()
-        self.browser_table.setHorizontalHeaderItem(1, __qtablewidgetitem1)
-        __qtablewidgetitem2 = QTableWidgetItem()
-        self.browser_table.setHorizontalHeaderItem(2, __qtablewidgetitem2)
-        __qtablewidgetitem3 = QTableWidgetItem()
-        self.browser_table.setHorizontalHeaderItem(3, __qtablewidgetitem3)
-        __qtablewidgetitem4 = QTableWidgetItem()
-        self.browser_table.setHorizontalHeaderItem(4, __qtablewidgetitem4)
-        __qtablewidgetitem5 = QTableWidgetItem()
-        self.browser_table.setHorizontalHeaderItem(5, __qtablewidgetitem5)
+        self.browser_table = QTableView(tabBrowser)
         self.browser_table.setObjectName(u"browser_table")
         self.browser_table.setMinimumSize(QSize(0, 250))
         self.browser_table.setStyleSheet(u"")
@@ -206,12 +191,12 @@ class Ui_tabBrowser(object):
         self.meta_table = QTableWidget(self.metadata)
         if (self.meta_table.columnCount() < 3):
             self.meta_table.setColumnCount(3)
-        __qtablewidgetitem6 = QTableWidgetItem()
-        self.meta_table.setHorizontalHeaderItem(0, __qtablewidgetitem6)
-        __qtablewidgetitem7 = QTableWidgetItem()
-        self.meta_table.setHorizontalHeaderItem(1, __qtablewidgetitem7)
-        __qtablewidgetitem8 = QTableWidgetItem()
-        self.meta_table.setHorizontalHeaderItem(2, __qtablewidgetitem8)
+        __qtablewidgetitem = QTableWidgetItem()
+        self.meta_table.setHorizontalHeaderItem(0, __qtablewidgetitem)
+        __qtablewidgetitem1 = QTableWidgetItem()
+        self.meta_table.setHorizontalHeaderItem(1, __qtablewidgetitem1)
+        __qtablewidgetitem2 = QTableWidgetItem()
+        self.meta_table.setHorizontalHeaderItem(2, __qtablewidgetitem2)
         self.meta_table.setObjectName(u"meta_table")
         self.meta_table.setMinimumSize(QSize(600, 200))
         self.meta_table.setStyleSheet(u"")
@@ -306,14 +291,14 @@ class Ui_tabBrowser(object):
         self.acl_table = QTableWidget(self.permissions)
         if (self.acl_table.columnCount() < 4):
             self.acl_table.setColumnCount(4)
-        __qtablewidgetitem9 = QTableWidgetItem()
-        self.acl_table.setHorizontalHeaderItem(0, __qtablewidgetitem9)
-        __qtablewidgetitem10 = QTableWidgetItem()
-        self.acl_table.setHorizontalHeaderItem(1, __qtablewidgetitem10)
-        __qtablewidgetitem11 = QTableWidgetItem()
-        self.acl_table.setHorizontalHeaderItem(2, __qtablewidgetitem11)
-        __qtablewidgetitem12 = QTableWidgetItem()
-        self.acl_table.setHorizontalHeaderItem(3, __qtablewidgetitem12)
+        __qtablewidgetitem3 = QTableWidgetItem()
+        self.acl_table.setHorizontalHeaderItem(0, __qtablewidgetitem3)
+        __qtablewidgetitem4 = QTableWidgetItem()
+        self.acl_table.setHorizontalHeaderItem(1, __qtablewidgetitem4)
+        __qtablewidgetitem5 = QTableWidgetItem()
+        self.acl_table.setHorizontalHeaderItem(2, __qtablewidgetitem5)
+        __qtablewidgetitem6 = QTableWidgetItem()
+        self.acl_table.setHorizontalHeaderItem(3, __qtablewidgetitem6)
         self.acl_table.setObjectName(u"acl_table")
         self.acl_table.setMinimumSize(QSize(600, 200))
         self.acl_table.setStyleSheet(u"")
@@ -412,16 +397,16 @@ class Ui_tabBrowser(object):
         self.replica_table = QTableWidget(self.replicas)
         if (self.replica_table.columnCount() < 5):
             self.replica_table.setColumnCount(5)
-        __qtablewidgetitem13 = QTableWidgetItem()
-        self.replica_table.setHorizontalHeaderItem(0, __qtablewidgetitem13)
-        __qtablewidgetitem14 = QTableWidgetItem()
-        self.replica_table.setHorizontalHeaderItem(1, __qtablewidgetitem14)
-        __qtablewidgetitem15 = QTableWidgetItem()
-        self.replica_table.setHorizontalHeaderItem(2, __qtablewidgetitem15)
-        __qtablewidgetitem16 = QTableWidgetItem()
-        self.replica_table.setHorizontalHeaderItem(3, __qtablewidgetitem16)
-        __qtablewidgetitem17 = QTableWidgetItem()
-        self.replica_table.setHorizontalHeaderItem(4, __qtablewidgetitem17)
+        __qtablewidgetitem7 = QTableWidgetItem()
+        self.replica_table.setHorizontalHeaderItem(0, __qtablewidgetitem7)
+        __qtablewidgetitem8 = QTableWidgetItem()
+        self.replica_table.setHorizontalHeaderItem(1, __qtablewidgetitem8)
+        __qtablewidgetitem9 = QTableWidgetItem()
+        self.replica_table.setHorizontalHeaderItem(2, __qtablewidgetitem9)
+        __qtablewidgetitem10 = QTableWidgetItem()
+        self.replica_table.setHorizontalHeaderItem(3, __qtablewidgetitem10)
+        __qtablewidgetitem11 = QTableWidgetItem()
+        self.replica_table.setHorizontalHeaderItem(4, __qtablewidgetitem11)
         self.replica_table.setObjectName(u"replica_table")
         self.replica_table.setStyleSheet(u"")
         self.replica_table.setSizeAdjustPolicy(QAbstractScrollArea.AdjustToContents)
@@ -469,22 +454,12 @@ class Ui_tabBrowser(object):
         self.upload_button.setText(QCoreApplication.translate("tabBrowser", u"Upload", None))
         self.download_button.setText(QCoreApplication.translate("tabBrowser", u"Download", None))
         self.delete_button.setText(QCoreApplication.translate("tabBrowser", u"Delete", None))
-        ___qtablewidgetitem = self.browser_table.horizontalHeaderItem(1)
-        ___qtablewidgetitem.setText(QCoreApplication.translate("tabBrowser", u"Name", None));
-        ___qtablewidgetitem1 = self.browser_table.horizontalHeaderItem(2)
-        ___qtablewidgetitem1.setText(QCoreApplication.translate("tabBrowser", u"Size [bytes]", None));
-        ___qtablewidgetitem2 = self.browser_table.horizontalHeaderItem(3)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("tabBrowser", u"Checksum/Fingerprint", None));
-        ___qtablewidgetitem3 = self.browser_table.horizontalHeaderItem(4)
-        ___qtablewidgetitem3.setText(QCoreApplication.translate("tabBrowser", u"Created", None));
-        ___qtablewidgetitem4 = self.browser_table.horizontalHeaderItem(5)
-        ___qtablewidgetitem4.setText(QCoreApplication.translate("tabBrowser", u"Modified", None));
-        ___qtablewidgetitem5 = self.meta_table.horizontalHeaderItem(0)
-        ___qtablewidgetitem5.setText(QCoreApplication.translate("tabBrowser", u"Key", None));
-        ___qtablewidgetitem6 = self.meta_table.horizontalHeaderItem(1)
-        ___qtablewidgetitem6.setText(QCoreApplication.translate("tabBrowser", u"Value", None));
-        ___qtablewidgetitem7 = self.meta_table.horizontalHeaderItem(2)
-        ___qtablewidgetitem7.setText(QCoreApplication.translate("tabBrowser", u"Units", None));
+        ___qtablewidgetitem = self.meta_table.horizontalHeaderItem(0)
+        ___qtablewidgetitem.setText(QCoreApplication.translate("tabBrowser", u"Key", None));
+        ___qtablewidgetitem1 = self.meta_table.horizontalHeaderItem(1)
+        ___qtablewidgetitem1.setText(QCoreApplication.translate("tabBrowser", u"Value", None));
+        ___qtablewidgetitem2 = self.meta_table.horizontalHeaderItem(2)
+        ___qtablewidgetitem2.setText(QCoreApplication.translate("tabBrowser", u"Units", None));
         self.add_meta_button.setText(QCoreApplication.translate("tabBrowser", u"Add", None))
         self.label_5.setText(QCoreApplication.translate("tabBrowser", u"Units", None))
         self.delete_meta_button.setText(QCoreApplication.translate("tabBrowser", u"Delete", None))
@@ -494,14 +469,14 @@ class Ui_tabBrowser(object):
         self.label_6.setText(QCoreApplication.translate("tabBrowser", u"Value", None))
         self.info_tabs.setTabText(self.info_tabs.indexOf(self.metadata), QCoreApplication.translate("tabBrowser", u"Metadata", None))
         self.info_tabs.setTabText(self.info_tabs.indexOf(self.preview), QCoreApplication.translate("tabBrowser", u"Preview", None))
-        ___qtablewidgetitem8 = self.acl_table.horizontalHeaderItem(0)
-        ___qtablewidgetitem8.setText(QCoreApplication.translate("tabBrowser", u"User", None));
-        ___qtablewidgetitem9 = self.acl_table.horizontalHeaderItem(1)
-        ___qtablewidgetitem9.setText(QCoreApplication.translate("tabBrowser", u"Zone", None));
-        ___qtablewidgetitem10 = self.acl_table.horizontalHeaderItem(2)
-        ___qtablewidgetitem10.setText(QCoreApplication.translate("tabBrowser", u"Access", None));
-        ___qtablewidgetitem11 = self.acl_table.horizontalHeaderItem(3)
-        ___qtablewidgetitem11.setText(QCoreApplication.translate("tabBrowser", u"Inherit", None));
+        ___qtablewidgetitem3 = self.acl_table.horizontalHeaderItem(0)
+        ___qtablewidgetitem3.setText(QCoreApplication.translate("tabBrowser", u"User", None));
+        ___qtablewidgetitem4 = self.acl_table.horizontalHeaderItem(1)
+        ___qtablewidgetitem4.setText(QCoreApplication.translate("tabBrowser", u"Zone", None));
+        ___qtablewidgetitem5 = self.acl_table.horizontalHeaderItem(2)
+        ___qtablewidgetitem5.setText(QCoreApplication.translate("tabBrowser", u"Access", None));
+        ___qtablewidgetitem6 = self.acl_table.horizontalHeaderItem(3)
+        ___qtablewidgetitem6.setText(QCoreApplication.translate("tabBrowser", u"Inherit", None));
         self.label_11.setText(QCoreApplication.translate("tabBrowser", u"Edit", None))
         self.label_13.setText(QCoreApplication.translate("tabBrowser", u"User name", None))
         self.label_8.setText(QCoreApplication.translate("tabBrowser", u"Zone", None))
@@ -520,18 +495,20 @@ class Ui_tabBrowser(object):
         self.owner.setText(QCoreApplication.translate("tabBrowser", u"Owner: ", None))
         self.owner_label.setText("")
         self.info_tabs.setTabText(self.info_tabs.indexOf(self.permissions), QCoreApplication.translate("tabBrowser", u"Permissions", None))
-        ___qtablewidgetitem12 = self.replica_table.horizontalHeaderItem(0)
-        ___qtablewidgetitem12.setText(QCoreApplication.translate("tabBrowser", u"Replica", None));
-        ___qtablewidgetitem13 = self.replica_table.horizontalHeaderItem(1)
-        ___qtablewidgetitem13.setText(QCoreApplication.translate("tabBrowser", u"Hierarchy", None));
-        ___qtablewidgetitem14 = self.replica_table.horizontalHeaderItem(2)
-        ___qtablewidgetitem14.setText(QCoreApplication.translate("tabBrowser", u"Checksum", None));
-        ___qtablewidgetitem15 = self.replica_table.horizontalHeaderItem(3)
-        ___qtablewidgetitem15.setText(QCoreApplication.translate("tabBrowser", u"Size [bytes]", None));
-        ___qtablewidgetitem16 = self.replica_table.horizontalHeaderItem(4)
-        ___qtablewidgetitem16.setText(QCoreApplication.translate("tabBrowser", u"Status", None));
+        ___qtablewidgetitem7 = self.replica_table.horizontalHeaderItem(0)
+        ___qtablewidgetitem7.setText(QCoreApplication.translate("tabBrowser", u"Replica", None));
+        ___qtablewidgetitem8 = self.replica_table.horizontalHeaderItem(1)
+        ___qtablewidgetitem8.setText(QCoreApplication.translate("tabBrowser", u"Hierarchy", None));
+        ___qtablewidgetitem9 = self.replica_table.horizontalHeaderItem(2)
+        ___qtablewidgetitem9.setText(QCoreApplication.translate("tabBrowser", u"Checksum", None));
+        ___qtablewidgetitem10 = self.replica_table.horizontalHeaderItem(3)
+        ___qtablewidgetitem10.setText(QCoreApplication.translate("tabBrowser", u"Size [bytes]", None));
+        ___qtablewidgetitem11 = self.replica_table.horizontalHeaderItem(4)
+        ___qtablewidgetitem11.setText(QCoreApplication.translate("tabBrowser", u"Status", None));
         self.info_tabs.setTabText(self.info_tabs.indexOf(self.replicas), QCoreApplication.translate("tabBrowser", u"Replicas", None))
         self.no_meta_label.setText("")
         self.error_label.setText("")
     # retranslateUi
 
+
+# ui source sha256: b14cf6b54b05a024b01e42a96d2e60f68ba6ca144068cfd135dc110048d44b1a
@@ -263,3 +263,5 @@ class Ui_tabInfo(object):
         self.server_label.setText("")
     # retranslateUi
 
+
+# ui source sha256: e18e14b28b882487dc9a58eacca7204fe1a964dbe41d5c86b46f4d2c02a3fbf2
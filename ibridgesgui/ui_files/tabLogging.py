@@ -64,3 +64,5 @@ class Ui_tabLogging(object):
         self.log_label.setText(QCoreApplication.translate("tabLogging", u"Log file", None))
     # retranslateUi
 
+
+# ui source sha256: ae420c3c5a17bbbb05572c95b2d4d6e5c200d4bd801f9fb6ed785dcf7612b004
@@ -246,6 +246,15 @@ class Ui_tabSearch(object):
 
         self.horizontalLayout_5.addItem(self.horizontalSpacer)
 
+        self.select_all_box = QCheckBox(tabSearch)
+        self.select_all_box.setObjectName(u"select_all_box")
+
+        self.horizontalLayout_5.addWidget(self.select_all_box)
+
+        self.horizontalSpacer_3 = QSpacerItem(20, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_5.addItem(self.horizontalSpacer_3)
+
         self.download_button = QPushButton(tabSearch)
         self.download_button.setObjectName(u"download_button")
         self.download_button.setFont(font)
@@ -262,8 +271,8 @@ class Ui_tabSearch(object):
         self.verticalLayout.addWidget(self.error_label)
 
         self.search_table = QTableWidget(tabSearch)
-        if (self.search_table.columnCount() < 5):
-            self.search_table.setColumnCount(5)
+        if (self.search_table.columnCount() < 6):
+            self.search_table.setColumnCount(6)
         __qtablewidgetitem = QTableWidgetItem()
         __qtablewidgetitem.setText(u"Type");
         self.search_table.setHorizontalHeaderItem(0, __qtablewidgetitem)
@@ -275,6 +284,8 @@ class Ui_tabSearch(object):
         self.search_table.setHorizontalHeaderItem(3, __qtablewidgetitem3)
         __qtablewidgetitem4 = QTableWidgetItem()
         self.search_table.setHorizontalHeaderItem(4, __qtablewidgetitem4)
+        __qtablewidgetitem5 = QTableWidgetItem()
+        self.search_table.setHorizontalHeaderItem(5, __qtablewidgetitem5)
         self.search_table.setObjectName(u"search_table")
         self.search_table.setMinimumSize(QSize(0, 250))
         self.search_table.setMaximumSize(QSize(16777215, 400))
@@ -322,7 +333,8 @@ class Ui_tabSearch(object):
         self.case_sensitive_box.setText(QCoreApplication.translate("tabSearch", u"Case sensitive", None))
         self.search_button.setText(QCoreApplication.translate("tabSearch", u"Search", None))
         self.clear_button.setText(QCoreApplication.translate("tabSearch", u"Clear Results", None))
-        self.load_more_button.setText(QCoreApplication.translate("tabSearch", u"Next 25", None))
+        self.load_more_button.setText(QCoreApplication.translate("tabSearch", u"Next 200", None))
+        self.select_all_box.setText(QCoreApplication.translate("tabSearch", u"Select all", None))
         self.download_button.setText(QCoreApplication.translate("tabSearch", u"Download Selection", None))
         self.error_label.setText("")
         ___qtablewidgetitem = self.search_table.horizontalHeaderItem(1)
@@ -330,8 +342,12 @@ class Ui_tabSearch(object):
         ___qtablewidgetitem1 = self.search_table.horizontalHeaderItem(2)
         ___qtablewidgetitem1.setText(QCoreApplication.translate("tabSearch", u"Size [bytes]", None));
         ___qtablewidgetitem2 = self.search_table.horizontalHeaderItem(3)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("tabSearch", u"Created", None));
+        ___qtablewidgetitem2.setText(QCoreApplication.translate("tabSearch", u"Checksum", None));
         ___qtablewidgetitem3 = self.search_table.horizontalHeaderItem(4)
-        ___qtablewidgetitem3.setText(QCoreApplication.translate("tabSearch", u"Modified", None));
+        ___qtablewidgetitem3.setText(QCoreApplication.translate("tabSearch", u"Created", None));
+        ___qtablewidgetitem4 = self.search_table.horizontalHeaderItem(5)
+        ___qtablewidgetitem4.setText(QCoreApplication.translate("tabSearch", u"Modified", None));
     # retranslateUi
 
+
+# ui source sha256: 7e65b6f3e50498f2609096f74d4ae3dd11cc9fb76e90e25281a8a8f95cd9af08
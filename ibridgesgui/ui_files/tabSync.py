@@ -15,11 +15,11 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QFont, QFontDatabase, QGradient, QIcon,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
-from PySide6.QtWidgets import (QAbstractItemView, QAbstractScrollArea, QApplication, QGridLayout,
-    QHBoxLayout, QHeaderView, QLabel, QLayout,
-    QProgressBar, QPushButton, QSizePolicy, QSpacerItem,
-    QTableWidget, QTableWidgetItem, QTreeView, QVBoxLayout,
-    QWidget)
+from PySide6.QtWidgets import (QAbstractItemView, QAbstractScrollArea, QApplication, QCheckBox,
+    QComboBox, QGridLayout, QHBoxLayout, QHeaderView,
+    QLabel, QLayout, QProgressBar, QPushButton,
+    QSizePolicy, QSpacerItem, QTableView, QTreeView,
+    QVBoxLayout, QWidget)
 
 class Ui_tabSync(object):
     def setupUi(self, tabSync):
@@ -154,7 +154,7 @@ class Ui_tabSync(object):
         self.local_to_irods_button.setObjectName(u"local_to_irods_button")
         self.local_to_irods_button.setMinimumSize(QSize(100, 0))
         icon = QIcon()
-        icon.addFile(u"../icons/arrow-right.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        icon.addFile(u"icons/arrow-right.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.local_to_irods_button.setIcon(icon)
         self.local_to_irods_button.setIconSize(QSize(50, 50))
 
@@ -173,7 +173,7 @@ class Ui_tabSync(object):
         self.irods_to_local_button.setSizePolicy(sizePolicy2)
         self.irods_to_local_button.setMinimumSize(QSize(100, 0))
         icon1 = QIcon()
-        icon1.addFile(u"../icons/arrow-left.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        icon1.addFile(u"icons/arrow-left.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.irods_to_local_button.setIcon(icon1)
         self.irods_to_local_button.setIconSize(QSize(50, 50))
 
@@ -187,6 +187,21 @@ class Ui_tabSync(object):
 
         self.gridLayout_7.addItem(self.verticalSpacer_11, 1, 1, 1, 1)
 
+        self.verticalSpacer_22 = QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Maximum)
+
+        self.gridLayout_7.addItem(self.verticalSpacer_22, 4, 1, 1, 1)
+
+        self.watch_button = QPushButton(self.layoutWidget)
+        self.watch_button.setObjectName(u"watch_button")
+        self.watch_button.setMinimumSize(QSize(100, 0))
+
+        self.gridLayout_7.addWidget(self.watch_button, 5, 1, 1, 1)
+
+        self.checksum_box = QCheckBox(self.layoutWidget)
+        self.checksum_box.setObjectName(u"checksum_box")
+
+        self.gridLayout_7.addWidget(self.checksum_box, 6, 1, 1, 1)
+
 
         self.verticalLayout_15.addLayout(self.gridLayout_7)
 
@@ -272,19 +287,35 @@ class Ui_tabSync(object):
 
         self.verticalLayout_11.addItem(self.verticalSpacer_13)
 
-        self.diff_table = QTableWidget(self.layoutWidget)
-        if (self.diff_table.columnCount() < 3):
-            self.diff_table.setColumnCount(3)
-        __qtablewidgetitem = QTableWidgetItem()
-        self.diff_table.setHorizontalHeaderItem(0, __qtablewidgetitem)
-        __qtablewidgetitem1 = QTableWidgetItem()
-        self.diff_table.setHorizontalHeaderItem(1, __qtablewidgetitem1)
-        __qtablewidgetitem2 = QTableWidgetItem()
-        self.diff_table.setHorizontalHeaderItem(2, __qtablewidgetitem2)
+        self.horizontalLayout_16 = QHBoxLayout()
+        self.horizontalLayout_16.setObjectName(u"horizontalLayout_16")
+        self.direction_box = QComboBox(self.layoutWidget)
+        self.direction_box.addItem("")
+        self.direction_box.addItem("")
+        self.direction_box.addItem("")
+        self.direction_box.setObjectName(u"direction_box")
+
+        self.horizontalLayout_16.addWidget(self.direction_box)
+
+        self.horizontalSpacer_16 = QSpacerItem(40, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_16.addItem(self.horizontalSpacer_16)
+
+        self.totals_label = QLabel(self.layoutWidget)
+        self.totals_label.setObjectName(u"totals_label")
+
+        self.horizontalLayout_16.addWidget(self.totals_label)
+
+
+        self.verticalLayout_11.addLayout(self.horizontalLayout_16)
+
+        self.diff_table = QTableView(self.layoutWidget)
         self.diff_table.setObjectName(u"diff_table")
         self.diff_table.setMinimumSize(QSize(0, 300))
+        self.diff_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.diff_table.setSelectionMode(QAbstractItemView.NoSelection)
         self.diff_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.diff_table.setSortingEnabled(True)
 
         self.verticalLayout_11.addWidget(self.diff_table)
 
@@ -310,15 +341,18 @@ class Ui_tabSync(object):
         self.label.setText("")
         self.local_to_irods_button.setText("")
         self.irods_to_local_button.setText("")
+        self.watch_button.setText(QCoreApplication.translate("tabSync", u"Watch", None))
+        self.checksum_box.setText(QCoreApplication.translate("tabSync", u"Checksums", None))
         self.label_20.setText(QCoreApplication.translate("tabSync", u"IRODS", None))
         self.create_coll_button.setText(QCoreApplication.translate("tabSync", u"Create Collection", None))
         self.error_label.setText("")
-        ___qtablewidgetitem = self.diff_table.horizontalHeaderItem(0)
-        ___qtablewidgetitem.setText(QCoreApplication.translate("tabSync", u"Source", None));
-        ___qtablewidgetitem1 = self.diff_table.horizontalHeaderItem(1)
-        ___qtablewidgetitem1.setText(QCoreApplication.translate("tabSync", u"Destination", None));
-        ___qtablewidgetitem2 = self.diff_table.horizontalHeaderItem(2)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("tabSync", u"Size in Bytes", None));
+        self.direction_box.setItemText(0, QCoreApplication.translate("tabSync", u"All", None))
+        self.direction_box.setItemText(1, QCoreApplication.translate("tabSync", u"Uploads", None))
+        self.direction_box.setItemText(2, QCoreApplication.translate("tabSync", u"Downloads", None))
+
+        self.totals_label.setText("")
         self.sync_button.setText(QCoreApplication.translate("tabSync", u"Synchronise", None))
     # retranslateUi
 
+
+# ui source sha256: 1f094f267dc66d1624d47792273a2c12551db2c1a96583331745d01d3ad335b5
@@ -117,7 +117,7 @@ class Ui_transferData(object):
         self.local_to_irods_button.setObjectName(u"local_to_irods_button")
         self.local_to_irods_button.setMinimumSize(QSize(100, 0))
         icon = QIcon()
-        icon.addFile(u"../icons/arrow-right.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        icon.addFile(u"icons/arrow-right.png", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.local_to_irods_button.setIcon(icon)
         self.local_to_irods_button.setIconSize(QSize(50, 50))
 
@@ -179,3 +179,5 @@ class Ui_transferData(object):
         self.label_3.setText("")
     # retranslateUi
 
+
+# ui source sha256: 46294ec8e46c9a5cc82bf49be4bcccf48b00d0a4c07c3b7efa06cbcb6215b06d
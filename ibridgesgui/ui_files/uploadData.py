@@ -72,10 +72,20 @@ class Ui_uploadData(object):
 
         self.gridLayout.addWidget(self.destination_label, 2, 2, 1, 1)
 
+        self.horizontalLayout_2 = QHBoxLayout()
+        self.horizontalLayout_2.setObjectName(u"horizontalLayout_2")
         self.overwrite = QCheckBox(uploadData)
         self.overwrite.setObjectName(u"overwrite")
 
-        self.gridLayout.addWidget(self.overwrite, 3, 2, 1, 1)
+        self.horizontalLayout_2.addWidget(self.overwrite)
+
+        self.bundle_files = QCheckBox(uploadData)
+        self.bundle_files.setObjectName(u"bundle_files")
+
+        self.horizontalLayout_2.addWidget(self.bundle_files)
+
+
+        self.gridLayout.addLayout(self.horizontalLayout_2, 3, 2, 1, 1)
 
         self.label_5 = QLabel(uploadData)
         self.label_5.setObjectName(u"label_5")
@@ -175,6 +185,10 @@ class Ui_uploadData(object):
         uploadData.setWindowTitle(QCoreApplication.translate("uploadData", u"Upload", None))
         self.destination_label.setText("")
         self.overwrite.setText(QCoreApplication.translate("uploadData", u"Overwrite existing data", None))
+#if QT_CONFIG(tooltip)
+        self.bundle_files.setToolTip(QCoreApplication.translate("uploadData", u"Upload small new files in tar bundles, the threshold is \"bundle_threshold\" in the ibridges_gui.json", None))
+#endif // QT_CONFIG(tooltip)
+        self.bundle_files.setText(QCoreApplication.translate("uploadData", u"Bundle small files", None))
         self.label_5.setText(QCoreApplication.translate("uploadData", u"Uploading to", None))
         self.label_4.setText("")
         self.label_3.setText("")
@@ -187,3 +201,5 @@ class Ui_uploadData(object):
         self.hide_button.setText(QCoreApplication.translate("uploadData", u"Close Window", None))
     # retranslateUi
 
+
+# ui source sha256: 2ac703db70d849490b89c92254d2349654dcbe688a9ad10af424427651206cdf
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+################################################################################
+## Form generated from reading UI file 'watchSync.ui'
+##
+## Created by: Qt User Interface Compiler version 6.8.1
+##
+## WARNING! All changes made in this file will be lost when recompiling UI file!
+################################################################################
+
+from PySide6.QtCore import (QCoreApplication, QDate, QDateTime, QLocale,
+    QMetaObject, QObject, QPoint, QRect,
+    QSize, QTime, QUrl, Qt)
+from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
+    QFont, QFontDatabase, QGradient, QIcon,
+    QImage, QKeySequence, QLinearGradient, QPainter,
+    QPalette, QPixmap, QRadialGradient, QTransform)
+from PySide6.QtWidgets import (QAbstractItemView, QApplication, QGridLayout, QHBoxLayout,
+    QHeaderView, QLabel, QProgressBar, QPushButton,
+    QSizePolicy, QSpacerItem, QTableWidget, QTableWidgetItem,
+    QWidget)
+
+class Ui_watchSync(object):
+    def setupUi(self, watchSync):
+        if not watchSync.objectName():
+            watchSync.setObjectName(u"watchSync")
+        watchSync.resize(936, 520)
+        watchSync.setStyleSheet(u"QWidget\n"
+"{\n"
+"    background-color: rgb(211,211,211);\n"
+"    color: rgb(88, 88, 90);\n"
+"    selection-background-color: rgb(21, 165, 137);\n"
+"    selection-color: rgb(245, 244, 244);\n"
+"    font: 16pt\n"
+"}\n"
+"\n"
+"QProgressBar::chunk\n"
+"{\n"
+"  background-color: rgb(21, 165, 137);\n"
+"}\n"
+"\n"
+"QLabel#error_label\n"
+"{\n"
+"    color: rgb(220, 130, 30);\n"
+"}\n"
+"\n"
+"QLineEdit, QTextEdit, QTableWidget\n"
+"{\n"
+"   background-color:  rgb(245, 244, 244)\n"
+"}\n"
+"\n"
+"QPushButton\n"
+"{\n"
+"	background-color: rgb(21, 165, 137);\n"
+"    color: rgb(245, 244, 244);\n"
+"}\n"
+"\n"
+"QPushButton#home_button, QPushButton#parent_button, QPushButton#refresh_button\n"
+"{\n"
+"    background-color: rgb(245, 244, 244);\n"
+"}\n"
+"\n"
+"QTabWidget#info_tabs\n"
+"{\n"
+"     background-color: background-color: rgb(211,211,211);\n"
+"}\n"
+"\n"
+"")
+        self.gridLayout = QGridLayout(watchSync)
+        self.gridLayout.setObjectName(u"gridLayout")
+        self.label = QLabel(watchSync)
+        self.label.setObjectName(u"label")
+
+        self.gridLayout.addWidget(self.label, 0, 0, 1, 1)
+
+        self.source_label = QLabel(watchSync)
+        self.source_label.setObjectName(u"source_label")
+
+        self.gridLayout.addWidget(self.source_label, 0, 1, 1, 1)
+
+        self.label_2 = QLabel(watchSync)
+        self.label_2.setObjectName(u"label_2")
+
+        self.gridLayout.addWidget(self.label_2, 1, 0, 1, 1)
+
+        self.target_label = QLabel(watchSync)
+        self.target_label.setObjectName(u"target_label")
+
+        self.gridLayout.addWidget(self.target_label, 1, 1, 1, 1)
+
+        self.label_3 = QLabel(watchSync)
+        self.label_3.setObjectName(u"label_3")
+
+        self.gridLayout.addWidget(self.label_3, 2, 0, 1, 1)
+
+        self.queue_table = QTableWidget(watchSync)
+        if (self.queue_table.columnCount() < 3):
+            self.queue_table.setColumnCount(3)
+        __qtablewidgetitem = QTableWidgetItem()
+        self.queue_table.setHorizontalHeaderItem(0, __qtablewidgetitem)
+        __qtablewidgetitem1 = QTableWidgetItem()
+        self.queue_table.setHorizontalHeaderItem(1, __qtablewidgetitem1)
+        __qtablewidgetitem2 = QTableWidgetItem()
+        self.queue_table.setHorizontalHeaderItem(2, __qtablewidgetitem2)
+        self.queue_table.setObjectName(u"queue_table")
+        self.queue_table.setMinimumSize(QSize(0, 200))
+        self.queue_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.queue_table.setSelectionMode(QAbstractItemView.NoSelection)
+
+        self.gridLayout.addWidget(self.queue_table, 3, 0, 1, 2)
+
+        self.progress_bar = QProgressBar(watchSync)
+        self.progress_bar.setObjectName(u"progress_bar")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setAlignment(Qt.AlignCenter)
+        self.progress_bar.setTextVisible(True)
+
+        self.gridLayout.addWidget(self.progress_bar, 4, 0, 1, 2)
+
+        self.status_label = QLabel(watchSync)
+        self.status_label.setObjectName(u"status_label")
+
+        self.gridLayout.addWidget(self.status_label, 5, 0, 1, 2)
+
+        self.horizontalLayout = QHBoxLayout()
+        self.horizontalLayout.setObjectName(u"horizontalLayout")
+        self.pause_button = QPushButton(watchSync)
+        self.pause_button.setObjectName(u"pause_button")
+
+        self.horizontalLayout.addWidget(self.pause_button)
+
+        self.horizontalSpacer = QSpacerItem(40, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout.addItem(self.horizontalSpacer)
+
+        self.stop_button = QPushButton(watchSync)
+        self.stop_button.setObjectName(u"stop_button")
+
+        self.horizontalLayout.addWidget(self.stop_button)
+
+
+        self.gridLayout.addLayout(self.horizontalLayout, 6, 0, 1, 2)
+
+        self.error_label = QLabel(watchSync)
+        self.error_label.setObjectName(u"error_label")
+
+        self.gridLayout.addWidget(self.error_label, 7, 0, 1, 2)
+
+
+        self.retranslateUi(watchSync)
+
+        QMetaObject.connectSlotsByName(watchSync)
+    # setupUi
+
+    def retranslateUi(self, watchSync):
+        watchSync.setWindowTitle(QCoreApplication.translate("watchSync", u"Watch", None))
+        self.label.setText(QCoreApplication.translate("watchSync", u"Watching:", None))
+        self.source_label.setText("")
+        self.label_2.setText(QCoreApplication.translate("watchSync", u"Upload to:", None))
+        self.target_label.setText("")
+        self.label_3.setText(QCoreApplication.translate("watchSync", u"Queue:", None))
+        ___qtablewidgetitem = self.queue_table.horizontalHeaderItem(0)
+        ___qtablewidgetitem.setText(QCoreApplication.translate("watchSync", u"Folder", None));
+        ___qtablewidgetitem1 = self.queue_table.horizontalHeaderItem(1)
+        ___qtablewidgetitem1.setText(QCoreApplication.translate("watchSync", u"Status", None));
+        ___qtablewidgetitem2 = self.queue_table.horizontalHeaderItem(2)
+        ___qtablewidgetitem2.setText(QCoreApplication.translate("watchSync", u"Changed", None));
+        self.status_label.setText("")
+        self.pause_button.setText(QCoreApplication.translate("watchSync", u"Pause", None))
+        self.stop_button.setText(QCoreApplication.translate("watchSync", u"Stop watching", None))
+        self.error_label.setText("")
+    # retranslateUi
+
+
+# ui source sha256: ffc297a23e205c1eac668e6308d5027d803f50da62b2e100fb009164b05eb5cd
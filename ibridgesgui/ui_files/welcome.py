@@ -58,3 +58,5 @@ class Ui_Welcome(object):
         Welcome.setWindowTitle(QCoreApplication.translate("Welcome", u"Form", None))
     # retranslateUi
 
+
+# ui source sha256: 4d72b8970d089fd32ee08c836bbf49ec9aba52262fd1b783f982f75329c69506
@@ -0,0 +1,303 @@
+"""Watch a local folder and upload its changes continuously.
+
+The folder, all its subfolders and their files are watched with a QFileSystemWatcher
+(inotify on Linux): the folders report added, removed and renamed entries, the files
+report modifications in place. Change events are collected per folder and handed on
+in batches once the folder has been quiet for a moment. Each batch is planned with
+iter_watch_plan, only the changed folders are compared with iRODS and the differing
+files are uploaded by the transfer engine. Files that are still being written are
+picked up again later, the folders of a failed upload are retried after a growing
+delay.
+"""
+
+import os
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Iterator, Optional
+
+import PySide6.QtCore
+import PySide6.QtWidgets
+from ibridges import IrodsPath, Session
+from ibridges.executor import Operations
+
+from ibridgesgui.file_snapshot import FileSnapshot
+from ibridgesgui.gui_utils import (
+    populate_table,
+    setup_ui,
+    transfer_percentage,
+    transfer_status_text,
+)
+from ibridgesgui.planner import iter_watch_plan
+from ibridgesgui.sync_state import SyncState
+from ibridgesgui.threads import TransferDataThread
+from ibridgesgui.ui_files.watchSync import Ui_watchSync
+
+# seconds a folder has to be quiet before its changes are uploaded
+WATCH_DEBOUNCE = 2
+# seconds after which changes are uploaded even if the folder is still busy
+WATCH_MAX_DELAY = 30
+# files modified within this many seconds are considered as being written
+WATCH_SETTLE = 5
+# seconds before the folders of a failed upload are uploaded again, doubled after
+# each failure in a row up to WATCH_MAX_RETRY
+WATCH_RETRY = 10
+WATCH_MAX_RETRY = 600
+
+
+class FolderWatcher(PySide6.QtCore.QObject):
+    """Debounced change events of a folder tree.
+
+    The signal changed is emitted with the sorted list of folders in which files
+    were added, removed, renamed or modified since the previous emit.
+    """
+
+    changed = PySide6.QtCore.Signal(list)
+
+    def __init__(self, root: Path, parent=None):
+        """Watch root and all its subfolders."""
+        super().__init__(parent)
+        self.root = root
+        self._watcher = PySide6.QtCore.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._pending = set()
+        self._first_change = None
+        self._timer = PySide6.QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._emit)
+        failed = self._watch_tree(root)
+        if failed:
+            raise OSError(f"Cannot watch {len(failed)} folders or files, e.g. {failed[0]}.")
+
+    def stop(self):
+        """Stop watching, pending changes are dropped."""
+        self._timer.stop()
+        self._pending.clear()
+        paths = self._watcher.directories() + self._watcher.files()
+        if paths:
+            self._watcher.removePaths(paths)
+
+    def queue(self, folders):
+        """Report folders as changed, e.g. to look at them again later."""
+        if not folders:
+            return
+        self._pending.update(str(folder) for folder in folders)
+        if self._first_change is None:
+            self._first_change = time.monotonic()
+        # restart the quiet period unless the changes waited long enough
+        if time.monotonic() - self._first_change < WATCH_MAX_DELAY or not self._timer.isActive():
+            self._timer.start(WATCH_DEBOUNCE * 1000)
+
+    def _watch_tree(self, folder: Path) -> list:
+        """Watch the folders and files of a tree that are not watched yet, return the failures."""
+        watched = set(self._watcher.directories())
+        watched.update(self._watcher.files())
+        new = []
+        for root, dirs, files in os.walk(folder):
+            # symlinks are not synchronised, see planner._scandir
+            dirs[:] = [name for name in dirs if not os.path.islink(os.path.join(root, name))]
+            if root not in watched:
+                new.append(root)
+            new.extend(
+                path
+                for path in (os.path.join(root, name) for name in files)
+                if path not in watched and not os.path.islink(path)
+            )
+        return self._watcher.addPaths(new) if new else []
+
+    def _on_directory_changed(self, path: str):
+        folder = Path(path)
+        if folder.is_dir():
+            # new subfolders are watched as well and their content is planned with them
+            self._watch_tree(folder)
+        self.queue([folder])
+
+    def _on_file_changed(self, path: str):
+        # modified in place, removed files are also reported by their folder
+        self.queue([Path(path).parent])
+
+    def _emit(self):
+        folders = sorted(self._pending)
+        self._pending.clear()
+        self._first_change = None
+        self.changed.emit(folders)
+
+
+class WatchSync(PySide6.QtWidgets.QWidget, Ui_watchSync):
+    """Window of a running watch of a local folder and a collection."""
+
+    def __init__(self, ienv_path: Path, logger, local_path: Path, irods_path: IrodsPath):
+        """Start watching local_path and upload its changes into irods_path.
+
+        Parameters
+        ----------
+        ienv_path : Path
+            path to the irods_environment.json, selects the session pool.
+        logger : logging.Logger
+            Logger
+        local_path : Path
+            Folder to watch.
+        irods_path : IrodsPath
+            Collection the content of the folder is synchronised into.
+
+        The whole folder is synchronised first, afterwards only the folders with
+        changes are compared.
+
+        """
+        super().__init__()
+        setup_ui(self, "watchSync")
+
+        self.logger = logger
+        self.ienv_path = ienv_path
+        self.local_path = local_path.absolute()
+        self.irods_path = irods_path.absolute()
+        self.setWindowTitle("Watch")
+        self.source_label.setText(str(self.local_path))
+        self.target_label.setText(str(self.irods_path))
+
+        # changed folders and when they were reported, None stands for the whole tree
+        self.pending = {None: datetime.now()}
+        self.running = {}
+        self.paused = False
+        self.transfer_thread = None
+        # folders with files that were still being written during planning
+        self.unsettled = set()
+        # a failed upload is retried with its folders after retry_delay seconds
+        self.failed = False
+        self.retry_delay = WATCH_RETRY
+        self.retry_timer = PySide6.QtCore.QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self._start_next)
+
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.stop_button.clicked.connect(self.close)
+        self.watcher = FolderWatcher(self.local_path, self)
+        self.watcher.changed.connect(self._on_changed)
+        self.logger.info("Watching %s for %s", self.local_path, self.irods_path)
+        self._start_next()
+
+    def toggle_pause(self):
+        """Pause or resume the uploads, changes are still collected while paused."""
+        self.paused = not self.paused
+        self.pause_button.setText("Resume" if self.paused else "Pause")
+        if self.paused:
+            self.status_label.setText("Paused, the running upload is completed.")
+        self._refresh_queue()
+        self._start_next()
+
+    # pylint: disable=C0103
+    def closeEvent(self, event):  # noqa
+        """Stop watching, a running upload is completed in the background."""
+        self.watcher.stop()
+        self.retry_timer.stop()
+        self.paused = True
+        self.logger.info("Stopped watching %s", self.local_path)
+        event.accept()
+
+    def _on_changed(self, folders: list):
+        now = datetime.now()
+        for folder in folders:
+            self.pending.setdefault(folder, now)
+        self._refresh_queue()
+        self._start_next()
+
+    def _start_next(self):
+        if (
+            self.paused
+            or self.transfer_thread is not None
+            or self.retry_timer.isActive()
+            or not self.pending
+        ):
+            return
+        self.running, self.pending = self.pending, {}
+        self.unsettled = set()
+        self.failed = False
+        folders = None if None in self.running else list(self.running)
+        self.error_label.clear()
+        try:
+            self.transfer_thread = TransferDataThread(
+                self.ienv_path,
+                self.logger,
+                None,
+                overwrite=True,
+                planner=partial(self._plan, folders),
+                sync_pair=(self.local_path, self.irods_path),
+            )
+        except Exception as error:
+            self.error_label.setText(f"Could not start the upload: {repr(error)}")
+            self.pending.update(self.running)
+            self.running = {}
+            self.transfer_thread = None
+            return
+        self.transfer_thread.current_progress.connect(self._transfer_status)
+        self.transfer_thread.result.connect(self._transfer_end)
+        self.transfer_thread.finished.connect(self._finish_transfer)
+        self._refresh_queue()
+        self.transfer_thread.start()
+
+    def _plan(
+        self, folders: Optional[list], session: Session, snapshot: FileSnapshot
+    ) -> Iterator[Operations]:
+        """Plan the upload of the changed folders, runs in the transfer thread."""
+        settled_before = time.time() - WATCH_SETTLE
+        state = SyncState(self.ienv_path, self.local_path, self.irods_path)
+        try:
+            yield from iter_watch_plan(
+                session,
+                self.local_path,
+                self.irods_path,
+                folders,
+                snapshot,
+                state,
+                skip=partial(self._unsettled, settled_before),
+            )
+        finally:
+            state.close()
+
+    def _unsettled(self, settled_before: float, local_path: Path, stat_result) -> bool:
+        """Whether the file was modified too recently, its folder is looked at again."""
+        if stat_result.st_mtime <= settled_before:
+            return False
+        self.unsettled.add(local_path.parent)
+        return True
+
+    def _transfer_status(self, state: list):
+        self.progress_bar.setValue(transfer_percentage(state))
+        self.status_label.setText(transfer_status_text(state))
+
+    def _transfer_end(self, thread_output: dict):
+        if thread_output["error"] != "":
+            self.failed = True
+            self.error_label.setText(thread_output["error"])
+        elif thread_output.get("planned", 0) > 0:
+            self.status_label.setText(
+                f"{datetime.now().strftime('%H:%M:%S')}: "
+                f"uploaded {thread_output['planned']} changed files."
+            )
+
+    def _finish_transfer(self):
+        self.transfer_thread = None
+        if self.failed:
+            # the changes of the batch are kept, with the time they were first reported
+            self.pending.update(self.running)
+            self.status_label.setText(f"Upload failed, retrying in {self.retry_delay} seconds.")
+            self.retry_timer.start(self.retry_delay * 1000)
+            self.retry_delay = min(2 * self.retry_delay, WATCH_MAX_RETRY)
+        else:
+            self.retry_delay = WATCH_RETRY
+        self.running = {}
+        self.watcher.queue(self.unsettled)
+        self._refresh_queue()
+        self._start_next()
+
+    def _refresh_queue(self):
+        """Show the folders of the running upload and the waiting changes."""
+        waiting = "paused" if self.paused else "waiting"
+        rows = [
+            (self.local_path if folder is None else folder, status, changed.strftime("%H:%M:%S"))
+            for items, status in ((self.running, "uploading"), (self.pending, waiting))
+            for folder, changed in items.items()
+        ]
+        populate_table(self.queue_table, len(rows), rows)
@@ -1,13 +1,12 @@
 """Welcome tab."""
 
-import sys
 from datetime import datetime
 
 import PySide6.QtCore
 import PySide6.QtGui
 import PySide6.QtWidgets
 
-from ibridgesgui.gui_utils import LOGO_DIR, UI_FILE_DIR, load_ui
+from ibridgesgui.gui_utils import LOGO_DIR, setup_ui
 from ibridgesgui.ui_files.welcome import Ui_Welcome
 
 
@@ -17,10 +16,7 @@ class Welcome(PySide6.QtWidgets.QWidget, Ui_Welcome):
     def __init__(self):
         """Initialize welcome tab."""
         super().__init__()
-        if getattr(sys, "frozen", False) or ("__compiled__" in globals()):
-            super().setupUi(self)
-        else:
-            load_ui(UI_FILE_DIR / "welcome.ui", self)
+        setup_ui(self, "welcome")
 
         if datetime.today().month == 12:
             self.pixmap = PySide6.QtGui.QPixmap(str(LOGO_DIR / "christmas-logo.png"))